@@ -29,6 +29,56 @@ class Config:
     
     # 缓存配置
     CACHE_TTL = int(os.getenv('CACHE_TTL', 300))  # 5分钟
+    CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', 1024))  # 每个客户端的最大缓存条目数
+    METRICS_CACHE_TTL = int(os.getenv('METRICS_CACHE_TTL', 60))  # 监控指标
+    INVENTORY_CACHE_TTL = int(os.getenv('INVENTORY_CACHE_TTL', 120))  # 资源清单
+    S3_METRICS_CACHE_TTL = int(os.getenv('S3_METRICS_CACHE_TTL', 86400))  # S3存储指标每天生成一次
+    RECOMMENDATIONS_CACHE_TTL = int(os.getenv('RECOMMENDATIONS_CACHE_TTL', 3600))  # 优化建议每天更新
+    
+    # 执行器配置
+    EXECUTOR_MAX_WORKERS = int(os.getenv('EXECUTOR_MAX_WORKERS', 8))  # 每个AWS服务的线程数
+    REPORT_TIMEOUT = float(os.getenv('REPORT_TIMEOUT', 15))  # 综合报告截止时间(秒)
+    
+    # 本地数据目录(项目根目录下的 data/)，与启动时的工作目录无关
+    DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+    
+    # 成本仓库配置 (COST_STORE_PATH 为空时直接查询Cost Explorer)
+    COST_STORE_PATH = os.getenv('COST_STORE_PATH', os.path.join(DATA_DIR, 'cost_store.db'))
+    COST_SETTLE_DAYS = int(os.getenv('COST_SETTLE_DAYS', 3))  # 最近几天的成本尚未结算
+    COST_RESYNC_INTERVAL = int(os.getenv('COST_RESYNC_INTERVAL', 3600))  # 未结算日期的重新同步间隔(秒)
+    COST_CUBE_CACHE_SIZE = int(os.getenv('COST_CUBE_CACHE_SIZE', 64))  # 内存中按日期区间缓存按日成本的维度数
+    COST_CUBE_CACHE_SEGMENTS = int(os.getenv('COST_CUBE_CACHE_SEGMENTS', 512))  # 所有维度最多缓存的日期区间数
+    
+    # 资源清单仓库配置 (INVENTORY_STORE_PATH 为空时不保存存储桶区域)
+    INVENTORY_STORE_PATH = os.getenv('INVENTORY_STORE_PATH', os.path.join(DATA_DIR, 'inventory.db'))
+    S3_ENRICH_CONCURRENCY = int(os.getenv('S3_ENRICH_CONCURRENCY', 16))  # 并发获取存储桶信息的线程数
+    S3_ENRICH_TIMEOUT = float(os.getenv('S3_ENRICH_TIMEOUT', 5))  # 单次调用的连接和读取超时(秒)
+    INVENTORY_CHANGES_RETENTION_DAYS = int(os.getenv('INVENTORY_CHANGES_RETENTION_DAYS', 7))  # 清单变更记录的保留天数
+    
+    # 多区域资源清单配置 (INVENTORY_REGIONS 为空时使用账户已启用的所有区域)
+    INVENTORY_REGIONS = [region.strip() for region in os.getenv('INVENTORY_REGIONS', '').split(',') if region.strip()]
+    INVENTORY_CONCURRENCY = int(os.getenv('INVENTORY_CONCURRENCY', 16))  # 所有请求共享的区域并发数上限
+    INVENTORY_REGIONS_CACHE_TTL = int(os.getenv('INVENTORY_REGIONS_CACHE_TTL', 86400))  # 已启用区域列表的缓存时间(秒)
+    
+    # Cost Explorer 请求限流与并发
+    CE_REQUESTS_PER_SECOND = float(os.getenv('CE_REQUESTS_PER_SECOND', 5))
+    COST_QUERY_CONCURRENCY = int(os.getenv('COST_QUERY_CONCURRENCY', 4))  # 多维度查询的并发请求数
+    
+    # CloudWatch GetMetricData 批量查询
+    METRICS_BATCH_CONCURRENCY = int(os.getenv('METRICS_BATCH_CONCURRENCY', 4))  # 并发执行的批次数
+    METRICS_SERIES_CACHE_POINTS = int(os.getenv('METRICS_SERIES_CACHE_POINTS', 2000000))  # 时间序列缓存的最大数据点数
+    METRICS_DEFAULT_PERIOD = int(os.getenv('METRICS_DEFAULT_PERIOD', 3600))  # 最小数据点间隔(秒)，低于3600时按保留期进一步限制
+    METRICS_MAX_SERIES_POINTS = int(os.getenv('METRICS_MAX_SERIES_POINTS', 5000))  # 超过时自动增大间隔
+    METRICS_TAIL_POLL_INTERVAL = int(os.getenv('METRICS_TAIL_POLL_INTERVAL', 60))  # 实时推送轮询失败后的最长重试间隔(秒)
+    METRICS_TAIL_BACKLOG_HOURS = int(os.getenv('METRICS_TAIL_BACKLOG_HOURS', 3))  # 新订阅者快照包含的小时数
+    METRICS_TAIL_MAX_SERIES = int(os.getenv('METRICS_TAIL_MAX_SERIES', 100))  # 同时实时推送的序列数上限
+    
+    # 闲置资源检测阈值
+    IDLE_LOOKBACK_HOURS = int(os.getenv('IDLE_LOOKBACK_HOURS', 168))  # 统计过去多少小时的指标
+    IDLE_CPU_PERCENT = float(os.getenv('IDLE_CPU_PERCENT', 10))  # EC2平均CPU使用率(%)
+    IDLE_NETWORK_MB_PER_DAY = float(os.getenv('IDLE_NETWORK_MB_PER_DAY', 5))  # EC2日均网络流量(MB)
+    IDLE_RDS_CONNECTIONS = float(os.getenv('IDLE_RDS_CONNECTIONS', 1))  # RDS最大连接数
+    IDLE_LAMBDA_INVOCATIONS = float(os.getenv('IDLE_LAMBDA_INVOCATIONS', 1))  # Lambda调用次数
     
     # 限流配置
     RATE_LIMIT_REQUESTS = int(os.getenv('RATE_LIMIT_REQUESTS', 100))
@@ -38,7 +88,7 @@ class Config:
     DEFAULT_DAYS = 30
     DEFAULT_HOURS = 24
     MAX_DAYS = 365
-    MAX_HOURS = 168  # 7天
+    MAX_HOURS = 455 * 24  # CloudWatch小时级数据保留455天
     
     # 支持的指标
     EC2_METRICS = [
@@ -75,6 +125,31 @@ class Config:
         'NumberOfObjects'
     ]
     
+    # GetMetricData 不返回单位，按指标名称补充
+    METRIC_UNITS = {
+        'CPUUtilization': 'Percent',
+        'NetworkIn': 'Bytes',
+        'NetworkOut': 'Bytes',
+        'DiskReadOps': 'Count',
+        'DiskWriteOps': 'Count',
+        'DiskReadBytes': 'Bytes',
+        'DiskWriteBytes': 'Bytes',
+        'DatabaseConnections': 'Count',
+        'FreeableMemory': 'Bytes',
+        'ReadIOPS': 'Count/Second',
+        'WriteIOPS': 'Count/Second',
+        'ReadLatency': 'Seconds',
+        'WriteLatency': 'Seconds',
+        'FreeStorageSpace': 'Bytes',
+        'Invocations': 'Count',
+        'Duration': 'Milliseconds',
+        'Errors': 'Count',
+        'Throttles': 'Count',
+        'ConcurrentExecutions': 'Count',
+        'BucketSizeBytes': 'Bytes',
+        'NumberOfObjects': 'Count'
+    }
+    
     # 成本维度
     COST_DIMENSIONS = [
         'SERVICE',
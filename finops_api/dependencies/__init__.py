@@ -3,66 +3,154 @@
 """
 
 from fastapi import HTTPException
+from config import Config
 from .clients import (
     CostExplorerClient,
     CloudWatchClient,
     BudgetsClient,
     ResourceInventoryClient,
-    OptimizationClient
+    OptimizationClient,
+    IdleResourceDetector,
+    InventoryIndex,
+    ServiceExecutor,
+    AsyncClient,
+    MetricTailHub
 )
 
-# 全局客户端实例
+# 全局客户端实例 (异步代理)
+_executor = None
 _cost_client = None
 _cloudwatch_client = None
 _budgets_client = None
 _inventory_client = None
 _optimization_client = None
+_idle_detector = None
+_inventory_index = None
+_metric_tail_hub = None
 
 def init_clients():
     """初始化所有客户端"""
-    global _cost_client, _cloudwatch_client, _budgets_client, _inventory_client, _optimization_client
-    
-    _cost_client = CostExplorerClient()
-    _cloudwatch_client = CloudWatchClient()
-    _budgets_client = BudgetsClient()
-    _inventory_client = ResourceInventoryClient()
-    _optimization_client = OptimizationClient()
-
-def get_cost_client() -> CostExplorerClient:
+    global _executor, _cost_client, _cloudwatch_client, _budgets_client, _inventory_client, _optimization_client, _idle_detector, _inventory_index, _metric_tail_hub
+
+    _executor = ServiceExecutor(max_workers=Config.EXECUTOR_MAX_WORKERS)
+    _cost_client = AsyncClient(CostExplorerClient(), 'ce', _executor)
+    # S3存储指标按存储桶所在区域查询: 区域由资源清单客户端解析(使用本地仓库中已知的区域)，
+    # 清单中的存储桶存储量则通过同一个CloudWatch客户端获取
+    cloudwatch = CloudWatchClient(bucket_regions=lambda: inventory.get_bucket_regions())
+    inventory = ResourceInventoryClient(cloudwatch=cloudwatch)
+    _cloudwatch_client = AsyncClient(cloudwatch, 'cloudwatch', _executor)
+    _budgets_client = AsyncClient(BudgetsClient(), 'budgets', _executor)
+    _inventory_client = AsyncClient(inventory, 'inventory', _executor)
+    _optimization_client = AsyncClient(OptimizationClient(), 'optimization', _executor)
+    _idle_detector = AsyncClient(
+        IdleResourceDetector(_inventory_client.client, _cloudwatch_client.client), 'optimization', _executor
+    )
+    _inventory_index = AsyncClient(InventoryIndex(_inventory_client.client), 'inventory', _executor)
+    _metric_tail_hub = MetricTailHub(
+        _cloudwatch_client,
+        poll_interval=Config.METRICS_TAIL_POLL_INTERVAL,
+        backlog_hours=Config.METRICS_TAIL_BACKLOG_HOURS,
+        max_series=Config.METRICS_TAIL_MAX_SERIES
+    )
+
+def shutdown_clients():
+    """关闭客户端线程池"""
+    global _executor, _metric_tail_hub
+
+    if _metric_tail_hub is not None:
+        _metric_tail_hub.close()
+        _metric_tail_hub = None
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+def get_cache_stats() -> dict:
+    """获取各客户端的缓存及请求合并统计"""
+    clients = {
+        'cost_explorer': _cost_client,
+        'cloudwatch': _cloudwatch_client,
+        'budgets': _budgets_client,
+        'inventory': _inventory_client,
+        'optimization': _optimization_client
+    }
+    stats = {
+        name: {
+            **client.client.cache.stats(),
+            'singleflight': client.client.flight.stats()
+        }
+        for name, client in clients.items()
+        if client is not None
+    }
+    if _cost_client is not None:
+        stats['cost_explorer']['daily_cubes'] = _cost_client.client.cubes.stats()
+    if _cloudwatch_client is not None:
+        stats['cloudwatch']['series'] = _cloudwatch_client.client.series_cache.stats()
+    if _metric_tail_hub is not None:
+        stats['cloudwatch']['tail'] = _metric_tail_hub.stats()
+    if _inventory_client is not None and _inventory_client.client.store is not None:
+        stats['inventory']['store'] = _inventory_client.client.store.stats()
+    if _inventory_index is not None:
+        stats['inventory']['index'] = _inventory_index.client.stats()
+    return stats
+
+def get_cost_client() -> AsyncClient:
     """获取Cost Explorer客户端"""
     if _cost_client is None:
         raise HTTPException(status_code=500, detail="Cost Explorer客户端未初始化")
     return _cost_client
 
-def get_cloudwatch_client() -> CloudWatchClient:
+def get_cloudwatch_client() -> AsyncClient:
     """获取CloudWatch客户端"""
     if _cloudwatch_client is None:
         raise HTTPException(status_code=500, detail="CloudWatch客户端未初始化")
     return _cloudwatch_client
 
-def get_budgets_client() -> BudgetsClient:
+def get_budgets_client() -> AsyncClient:
     """获取Budgets客户端"""
     if _budgets_client is None:
         raise HTTPException(status_code=500, detail="Budgets客户端未初始化")
     return _budgets_client
 
-def get_inventory_client() -> ResourceInventoryClient:
+def get_inventory_client() -> AsyncClient:
     """获取资源清单客户端"""
     if _inventory_client is None:
         raise HTTPException(status_code=500, detail="资源清单客户端未初始化")
     return _inventory_client
 
-def get_optimization_client() -> OptimizationClient:
+def get_optimization_client() -> AsyncClient:
     """获取优化建议客户端"""
     if _optimization_client is None:
         raise HTTPException(status_code=500, detail="优化建议客户端未初始化")
     return _optimization_client
 
+def get_idle_detector() -> AsyncClient:
+    """获取闲置资源检测"""
+    if _idle_detector is None:
+        raise HTTPException(status_code=500, detail="闲置资源检测未初始化")
+    return _idle_detector
+
+def get_inventory_index() -> AsyncClient:
+    """获取资源清单索引"""
+    if _inventory_index is None:
+        raise HTTPException(status_code=500, detail="资源清单索引未初始化")
+    return _inventory_index
+
+def get_metric_tail_hub() -> MetricTailHub:
+    """获取指标实时推送中心"""
+    if _metric_tail_hub is None:
+        raise HTTPException(status_code=500, detail="指标实时推送未初始化")
+    return _metric_tail_hub
+
 __all__ = [
     "init_clients",
+    "shutdown_clients",
+    "get_cache_stats",
     "get_cost_client",
-    "get_cloudwatch_client", 
+    "get_cloudwatch_client",
     "get_budgets_client",
     "get_inventory_client",
-    "get_optimization_client"
+    "get_optimization_client",
+    "get_idle_detector",
+    "get_inventory_index",
+    "get_metric_tail_hub"
 ]
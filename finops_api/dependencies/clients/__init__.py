@@ -7,11 +7,24 @@ from .cloudwatch_client import CloudWatchClient
 from .budgets_client import BudgetsClient
 from .resource_inventory_client import ResourceInventoryClient
 from .optimization_client import OptimizationClient
+from .idle_resources import IdleResourceDetector
+from .inventory_index import InventoryIndex
+from .executor import ServiceExecutor, AsyncClient
+from .metric_tail import MetricTailHub
+from .cache import TTLCache
+from .singleflight import SingleFlight
 
 __all__ = [
     "CostExplorerClient",
     "CloudWatchClient", 
     "BudgetsClient",
     "ResourceInventoryClient",
-    "OptimizationClient"
+    "OptimizationClient",
+    "IdleResourceDetector",
+    "InventoryIndex",
+    "ServiceExecutor",
+    "AsyncClient",
+    "MetricTailHub",
+    "TTLCache",
+    "SingleFlight"
 ]
@@ -5,10 +5,15 @@ AWS Budgets API 客户端
 """
 
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 
+from config import Config
+from .cache import TTLCache, cached
+from .singleflight import SingleFlight
+
 class BudgetsClient:
     def __init__(self, region_name: str = 'us-east-1'):
         """
@@ -20,7 +25,10 @@ class BudgetsClient:
         self.client = boto3.client('budgets', region_name=region_name)
         self.account_id = boto3.client('sts').get_caller_identity()['Account']
         self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(maxsize=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self.flight = SingleFlight()
     
+    @cached()
     def get_all_budgets(self) -> Dict:
         """
         获取所有预算信息
@@ -33,30 +41,36 @@ class BudgetsClient:
                 AccountId=self.account_id
             )
             
-            budgets_data = []
+            budgets = response.get('Budgets', [])
+            budgets_data = [self._format_budget_info(budget) for budget in budgets]
             
-            for budget in response.get('Budgets', []):
-                budget_info = self._format_budget_info(budget)
-                
-                # 获取预算的实际支出
-                try:
-                    actual_spend = self.get_budget_performance(budget['BudgetName'])
-                    budget_info.update(actual_spend)
-                except Exception as e:
-                    self.logger.warning(f"获取预算 {budget['BudgetName']} 的实际支出失败: {str(e)}")
-                
-                budgets_data.append(budget_info)
+            # 并发获取各预算的实际支出
+            failed = []
+            if budgets:
+                with ThreadPoolExecutor(max_workers=min(len(budgets), Config.EXECUTOR_MAX_WORKERS)) as pool:
+                    futures = [pool.submit(self.get_budget_performance, budget['BudgetName']) for budget in budgets]
+                    for budget, budget_info, future in zip(budgets, budgets_data, futures):
+                        try:
+                            budget_info.update(future.result())
+                        except Exception as e:
+                            self.logger.warning(f"获取预算 {budget['BudgetName']} 的实际支出失败: {str(e)}")
+                            failed.append(budget['BudgetName'])
             
-            return {
+            result = {
                 'account_id': self.account_id,
                 'budgets_count': len(budgets_data),
                 'budgets': budgets_data
             }
+            # 部分预算的实际支出获取失败时标记错误，避免不完整的结果被缓存
+            if failed:
+                result['error'] = f"获取预算实际支出失败: {', '.join(failed)}"
+            return result
             
         except Exception as e:
             self.logger.error(f"获取预算信息失败: {str(e)}")
             raise
     
+    @cached()
     def get_budget_details(self, budget_name: str) -> Dict:
         """
         获取特定预算的详细信息
@@ -76,13 +90,24 @@ class BudgetsClient:
             budget = response['Budget']
             budget_info = self._format_budget_info(budget)
             
+            errors = []
+            
             # 获取预算性能数据
-            performance = self.get_budget_performance(budget_name)
-            budget_info.update(performance)
+            try:
+                budget_info.update(self.get_budget_performance(budget_name))
+            except Exception as e:
+                errors.append(f"预算执行情况: {str(e)}")
             
             # 获取预算历史
-            history = self.get_budget_history(budget_name)
-            budget_info['history'] = history
+            try:
+                budget_info['history'] = self.get_budget_history(budget_name)
+            except Exception as e:
+                budget_info['history'] = []
+                errors.append(f"预算历史数据: {str(e)}")
+            
+            # 部分数据获取失败时标记错误，避免不完整的结果被缓存
+            if errors:
+                budget_info['error'] = '; '.join(errors)
             
             return budget_info
             
@@ -90,6 +115,7 @@ class BudgetsClient:
             self.logger.error(f"获取预算详细信息失败: {str(e)}")
             raise
     
+    @cached()
     def get_budget_performance(self, budget_name: str) -> Dict:
         """
         获取预算执行情况
@@ -138,13 +164,9 @@ class BudgetsClient:
             
         except Exception as e:
             self.logger.error(f"获取预算执行情况失败: {str(e)}")
-            return {
-                'actual_spend': 0.0,
-                'forecasted_spend': 0.0,
-                'percentage_used': 0.0,
-                'status': 'ERROR'
-            }
+            raise
     
+    @cached()
     def get_budget_history(self, budget_name: str, max_results: int = 30) -> List[Dict]:
         """
         获取预算历史数据
@@ -182,8 +204,9 @@ class BudgetsClient:
             
         except Exception as e:
             self.logger.error(f"获取预算历史数据失败: {str(e)}")
-            return []
+            raise
     
+    @cached()
     def get_budget_notifications(self, budget_name: str) -> List[Dict]:
         """
         获取预算通知设置
@@ -217,7 +240,7 @@ class BudgetsClient:
             
         except Exception as e:
             self.logger.error(f"获取预算通知设置失败: {str(e)}")
-            return []
+            raise
     
     def _format_budget_info(self, budget: Dict) -> Dict:
         """
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+客户端响应缓存
+带TTL和LRU淘汰的线程安全缓存，以及用于客户端方法的缓存装饰器
+"""
+
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """带过期时间的LRU缓存"""
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 300):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大缓存条目数，超出时淘汰最久未使用的条目
+            ttl: 默认过期时间(秒)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._method_stats: Dict[str, Dict[str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, method: str = '') -> Tuple[bool, Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            method: 方法名，用于分方法统计命中率
+
+        Returns:
+            (是否命中, 缓存值)
+        """
+        with self._lock:
+            stats = self._method_stats.setdefault(method, {'hits': 0, 'misses': 0})
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    stats['hits'] += 1
+                    return True, value
+                del self._data[key]
+
+            self.misses += 1
+            stats['misses'] += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间(秒)，为None时使用默认值
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'default_ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'by_method': {name: dict(counts) for name, counts in self._method_stats.items()}
+            }
+
+
+def make_key(func_name: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> Tuple[str, str]:
+    """
+    生成规范化的缓存键
+
+    位置参数和关键字参数绑定到函数签名并补齐默认值，
+    因此 f(7) 与 f(days=7) 以及省略默认参数的调用得到相同的键。
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop('self', None)
+    return func_name, json.dumps(arguments, sort_keys=True, default=str)
+
+
+def _is_error_result(value: Any) -> bool:
+    """判断是否为降级返回的错误结果(不应缓存)"""
+    return isinstance(value, dict) and 'error' in value
+
+
+def cached(ttl: Optional[int] = None) -> Callable:
+    """
+    客户端方法缓存装饰器
+
+    使用实例上的 `cache` 属性(TTLCache)缓存方法返回值。
+    缓存未命中时，如果实例上有 `flight` 属性(SingleFlight)，
+    相同键的并发调用会合并为一次AWS调用。
+    返回值在缓存期间被多个请求共享，调用方不应修改。
+
+    Args:
+        ttl: 该方法的过期时间(秒)，为None时使用缓存默认值
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache: Optional[TTLCache] = getattr(self, 'cache', None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+
+            key = make_key(func.__name__, signature, (self,) + args, kwargs)
+            hit, value = cache.get(key, func.__name__)
+            if hit:
+                return value
+
+            def load():
+                # 在释放等待方之前写入缓存，避免紧随其后的调用再次穿透
+                result = func(self, *args, **kwargs)
+                if not _is_error_result(result):
+                    cache.set(key, result, ttl)
+                return result
+
+            flight = getattr(self, 'flight', None)
+            if flight is None:
+                return load()
+            return flight.do(key, load)
+
+        return wrapper
+
+    return decorator
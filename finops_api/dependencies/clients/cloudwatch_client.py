@@ -5,27 +5,57 @@ AWS CloudWatch API 客户端
 """
 
 import boto3
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import logging
+import threading
+
+from config import Config
+from .cache import TTLCache, cached
+from .singleflight import SingleFlight
+from .metric_data import MetricDataEngine
+from .series_cache import SeriesCache
+from .metric_matrix import MetricMatrix
+from .downsample import METHODS as DOWNSAMPLE_METHODS, downsample_indices
+
+# 时间序列数据点格式: rows 每个数据点一个对象，columnar 并列数组
+SERIES_FORMATS = ('rows', 'columnar')
 
 class CloudWatchClient:
-    def __init__(self, region_name: str = 'us-east-1'):
+    def __init__(self, region_name: str = 'us-east-1',
+                 bucket_regions: Optional[Callable[[], Dict[str, str]]] = None):
         """
         初始化CloudWatch客户端
         
         Args:
             region_name: AWS区域名称
+            bucket_regions: 获取所有存储桶所在区域 {存储桶名称: 区域} 的函数，
+                为None时S3存储指标只查询客户端所在区域
         """
         self.client = boto3.client('cloudwatch', region_name=region_name)
+        self.bucket_regions = bucket_regions
         self.ec2_client = boto3.client('ec2', region_name=region_name)
         self.rds_client = boto3.client('rds', region_name=region_name)
         self.lambda_client = boto3.client('lambda', region_name=region_name)
         self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(maxsize=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self.flight = SingleFlight()
+        self.metric_data = MetricDataEngine(self.client, max_workers=Config.METRICS_BATCH_CONCURRENCY)
+        self.series_cache = SeriesCache(
+            max_points=Config.METRICS_SERIES_CACHE_POINTS,
+            max_age=Config.MAX_HOURS * 3600
+        )
+        # 其他区域的批量查询引擎，按区域复用
+        self._regional_metric_data: Dict[str, MetricDataEngine] = {}
+        self._regional_lock = threading.Lock()
     
+    @cached(ttl=Config.METRICS_CACHE_TTL)
     def get_ec2_metrics(self, instance_id: Optional[str] = None, 
                        metric_name: str = 'CPUUtilization', 
-                       hours: int = 24) -> Dict:
+                       hours: int = 24, max_points: Optional[int] = None,
+                       downsample: str = 'lttb', format: str = 'rows') -> Dict:
         """
         获取EC2实例指标
         
@@ -33,61 +63,149 @@ class CloudWatchClient:
             instance_id: EC2实例ID，如果为None则获取所有实例
             metric_name: 指标名称
             hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
             
         Returns:
             EC2指标数据
         """
         try:
+            return self._fetch_ec2_metrics(instance_id, [metric_name], hours, max_points, downsample, format)['metrics'][metric_name]
+            
+        except Exception as e:
+            self.logger.error(f"获取EC2指标失败: {str(e)}")
+            raise
+    
+    @cached(ttl=Config.METRICS_CACHE_TTL)
+    def get_ec2_multi_metrics(self, instance_id: Optional[str] = None,
+                              metric_names: Optional[List[str]] = None,
+                              hours: int = 24, max_points: Optional[int] = None,
+                              downsample: str = 'lttb', format: str = 'rows') -> Dict:
+        """
+        一次批量查询获取EC2实例的多个指标
+        
+        Args:
+            instance_id: EC2实例ID，如果为None则获取所有实例
+            metric_names: 指标名称列表，为None时获取所有支持的指标
+            hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
+            
+        Returns:
+            按指标名称组织的EC2指标数据，每个指标的结构与 get_ec2_metrics 相同
+        """
+        try:
+            return self._fetch_ec2_metrics(
+                instance_id, metric_names or Config.get_supported_metrics('ec2'), hours, max_points, downsample, format
+            )
+            
+        except Exception as e:
+            self.logger.error(f"获取EC2指标失败: {str(e)}")
+            raise
+    
+    def _fetch_ec2_metrics(self, instance_id: Optional[str], metric_names: List[str], hours: int,
+                           max_points: Optional[int] = None, downsample: str = 'lttb',
+                           format: str = 'rows') -> Dict:
+        """批量获取EC2实例的一个或多个指标"""
+        self._check_series_options(downsample, format)
+        
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+        period = self._choose_period(start_time, end_time)
+        
+        if instance_id:
+            instance_ids = [instance_id]
+        else:
+            instance_ids = self._list_running_instances()
+        
+        series = self._fetch_series(
+            'AWS/EC2',
+            [[{'Name': 'InstanceId', 'Value': current_id}] for current_id in instance_ids],
+            metric_names,
+            lambda metric_name: ('Average', 'Maximum'),
+            period,
+            start_time,
+            end_time
+        )
+        
+        return self._multi_metrics_response(metric_names, start_time, end_time, {
+            metric_name: {
+                'metric_name': metric_name,
+                'time_range': {
+                    'start': start_time.isoformat(),
+                    'end': end_time.isoformat()
+                },
+                'period': period,
+                'instances': [
+                    {
+                        'instance_id': current_id,
+                        'metric_name': metric_name,
+                        'datapoints': self._average_maximum_datapoints(
+                            metric_name, resource_series[metric_name], max_points, downsample, format
+                        )
+                    }
+                    for current_id, resource_series in zip(instance_ids, series)
+                ]
+            }
+            for metric_name in metric_names
+        })
+    
+    @cached(ttl=Config.METRICS_CACHE_TTL)
+    def get_ec2_fleet_summary(self, metric_name: str = 'CPUUtilization', hours: int = 24,
+                              percentiles: Optional[List[float]] = None, top: int = 20, bins: int = 10,
+                              tags: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        获取EC2实例群的指标汇总
+        
+        批量获取所有运行中实例的每小时平均值，组成 时间 × 实例 矩阵后计算
+        每个实例和整个实例群的百分位数、最繁忙的实例以及实例平均值的分布。
+        
+        Args:
+            metric_name: 指标名称
+            hours: 获取过去多少小时的数据
+            percentiles: 百分位数列表，默认 [50, 90, 95, 99]
+            top: 返回平均值最高的前N个实例
+            bins: 实例平均值直方图的分桶数
+            tags: 只统计带有这些标签的实例 {标签键: 标签值}
+            
+        Returns:
+            实例群指标汇总
+        """
+        try:
+            percentiles = percentiles or [50, 90, 95, 99]
+            if any(not 0 <= percentile <= 100 for percentile in percentiles):
+                raise ValueError("百分位数必须在0到100之间")
+            
             end_time = datetime.utcnow()
             start_time = end_time - timedelta(hours=hours)
+            period = self._choose_period(start_time, end_time)
             
-            if instance_id:
-                instances = [{'InstanceId': instance_id}]
-            else:
-                # 获取所有运行中的实例
-                response = self.ec2_client.describe_instances(
-                    Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]
-                )
-                instances = []
-                for reservation in response['Reservations']:
-                    for instance in reservation['Instances']:
-                        instances.append({'InstanceId': instance['InstanceId']})
-            
-            metrics_data = []
-            
-            for instance in instances:
-                instance_id = instance['InstanceId']
-                
-                response = self.client.get_metric_statistics(
-                    Namespace='AWS/EC2',
-                    MetricName=metric_name,
-                    Dimensions=[
-                        {
-                            'Name': 'InstanceId',
-                            'Value': instance_id
-                        }
-                    ],
-                    StartTime=start_time,
-                    EndTime=end_time,
-                    Period=3600,  # 1小时间隔
-                    Statistics=['Average', 'Maximum']
-                )
-                
-                datapoints = sorted(response['Datapoints'], key=lambda x: x['Timestamp'])
-                
-                metrics_data.append({
-                    'instance_id': instance_id,
-                    'metric_name': metric_name,
-                    'datapoints': [
-                        {
-                            'timestamp': dp['Timestamp'].isoformat(),
-                            'average': dp['Average'],
-                            'maximum': dp['Maximum'],
-                            'unit': dp['Unit']
-                        }
-                        for dp in datapoints
-                    ]
-                })
+            instance_ids = self._list_running_instances(tags)
+            series = self._fetch_series(
+                'AWS/EC2',
+                [[{'Name': 'InstanceId', 'Value': instance_id}] for instance_id in instance_ids],
+                [metric_name],
+                lambda name: ('Average',),
+                period,
+                start_time,
+                end_time
+            )
+            matrix = MetricMatrix.from_series(
+                instance_ids,
+                [resource_series[metric_name]['Average'] for resource_series in series],
+                self._epoch(start_time),
+                self._epoch(end_time),
+                period
+            )
+            
+            stats = matrix.resource_stats(percentiles)
+            order = np.argsort(-stats['average'], kind='stable')[:top]
+            stat_names = ['average', 'maximum', 'minimum'] + [MetricMatrix.percentile_name(p) for p in percentiles]
+            columns = {name: stats[name][order].tolist() for name in stat_names + ['datapoints']}
+            
+            values = matrix.values[~np.isnan(matrix.values)]
             
             return {
                 'metric_name': metric_name,
@@ -95,16 +213,106 @@ class CloudWatchClient:
                     'start': start_time.isoformat(),
                     'end': end_time.isoformat()
                 },
-                'instances': metrics_data
+                'period': period,
+                'tags': tags or {},
+                'instance_count': len(instance_ids),
+                'instances_with_data': int(stats['index'].size),
+                'fleet': {
+                    'average': float(values.mean()) if values.size else None,
+                    'maximum': float(values.max()) if values.size else None,
+                    'minimum': float(values.min()) if values.size else None,
+                    **matrix.fleet_percentiles(percentiles)
+                },
+                'top_instances': [
+                    {
+                        'instance_id': instance_ids[stats['index'][position]],
+                        **{name: columns[name][rank] for name in stat_names + ['datapoints']}
+                    }
+                    for rank, position in enumerate(order.tolist())
+                ],
+                'average_histogram': MetricMatrix.histogram(stats['average'], bins)
             }
             
         except Exception as e:
-            self.logger.error(f"获取EC2指标失败: {str(e)}")
+            self.logger.error(f"获取EC2实例群指标汇总失败: {str(e)}")
             raise
     
+    def _list_running_instances(self, tags: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        分页获取所有运行中的EC2实例ID
+        
+        Args:
+            tags: 只返回带有这些标签的实例 {标签键: 标签值}
+        """
+        paginator = self.ec2_client.get_paginator('describe_instances')
+        filters = [{'Name': 'instance-state-name', 'Values': ['running']}]
+        filters.extend({'Name': f'tag:{key}', 'Values': [value]} for key, value in (tags or {}).items())
+        instance_ids = []
+        for page in paginator.paginate(Filters=filters):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    instance_ids.append(instance['InstanceId'])
+        return instance_ids
+
+    def get_resource_utilization(self, namespace: str, dimension_name: str, resource_ids: List[str],
+                                 metrics: Dict[str, str], hours: int = 168,
+                                 region: Optional[str] = None) -> List[Dict]:
+        """
+        批量获取一组资源的指标汇总值
+        
+        所有资源的所有指标通过 GetMetricData 批量获取，调用次数取决于查询批次数而不是资源数。
+        
+        Args:
+            namespace: 指标命名空间，如 AWS/EC2
+            dimension_name: 资源ID对应的维度名称，如 InstanceId
+            resource_ids: 资源ID列表，必须位于同一区域
+            metrics: 指标名称到统计方式的映射，如 {'CPUUtilization': 'Average'}
+            hours: 统计过去多少小时的数据
+            region: 资源所在区域，默认为客户端所在区域
+        
+        Returns:
+            与资源一一对应的 {指标名称: {'average', 'maximum', 'total', 'datapoints'}}，
+            没有数据点时 average/maximum 为None、total 为0
+        """
+        try:
+            end_time = datetime.utcnow()
+            start_time = end_time - timedelta(hours=hours)
+            period = self._choose_period(start_time, end_time)
+            
+            series = self._fetch_series(
+                namespace,
+                [[{'Name': dimension_name, 'Value': resource_id}] for resource_id in resource_ids],
+                list(metrics),
+                lambda metric_name: (metrics[metric_name],),
+                period,
+                start_time,
+                end_time,
+                region
+            )
+            
+            utilization = []
+            for resource_series in series:
+                resource_stats = {}
+                for metric_name, stat in metrics.items():
+                    values = np.asarray(resource_series[metric_name][stat][1], dtype=np.float64)
+                    resource_stats[metric_name] = {
+                        'average': float(values.mean()) if values.size else None,
+                        'maximum': float(values.max()) if values.size else None,
+                        'total': float(values.sum()),
+                        'datapoints': int(values.size)
+                    }
+                utilization.append(resource_stats)
+            return utilization
+        
+        except Exception as e:
+            self.logger.error(f"获取资源指标汇总失败: {str(e)}")
+            raise
+
+    @cached(ttl=Config.METRICS_CACHE_TTL)
     def get_rds_metrics(self, db_instance_identifier: str, 
                        metric_name: str = 'CPUUtilization', 
-                       hours: int = 24) -> Dict:
+                       hours: int = 24, max_points: Optional[int] = None,
+                       downsample: str = 'lttb', format: str = 'rows') -> Dict:
         """
         获取RDS实例指标
         
@@ -112,56 +320,89 @@ class CloudWatchClient:
             db_instance_identifier: RDS实例标识符
             metric_name: 指标名称
             hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
             
         Returns:
             RDS指标数据
         """
         try:
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
+            return self._fetch_rds_metrics(db_instance_identifier, [metric_name], hours, max_points, downsample, format)['metrics'][metric_name]
             
-            response = self.client.get_metric_statistics(
-                Namespace='AWS/RDS',
-                MetricName=metric_name,
-                Dimensions=[
-                    {
-                        'Name': 'DBInstanceIdentifier',
-                        'Value': db_instance_identifier
-                    }
-                ],
-                StartTime=start_time,
-                EndTime=end_time,
-                Period=3600,  # 1小时间隔
-                Statistics=['Average', 'Maximum']
-            )
+        except Exception as e:
+            self.logger.error(f"获取RDS指标失败: {str(e)}")
+            raise
+    
+    @cached(ttl=Config.METRICS_CACHE_TTL)
+    def get_rds_multi_metrics(self, db_instance_identifier: str,
+                              metric_names: Optional[List[str]] = None,
+                              hours: int = 24, max_points: Optional[int] = None,
+                              downsample: str = 'lttb', format: str = 'rows') -> Dict:
+        """
+        一次批量查询获取RDS实例的多个指标
+        
+        Args:
+            db_instance_identifier: RDS实例标识符
+            metric_names: 指标名称列表，为None时获取所有支持的指标
+            hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
             
-            datapoints = sorted(response['Datapoints'], key=lambda x: x['Timestamp'])
+        Returns:
+            按指标名称组织的RDS指标数据，每个指标的结构与 get_rds_metrics 相同
+        """
+        try:
+            return self._fetch_rds_metrics(
+                db_instance_identifier, metric_names or Config.get_supported_metrics('rds'), hours, max_points, downsample, format
+            )
             
-            return {
+        except Exception as e:
+            self.logger.error(f"获取RDS指标失败: {str(e)}")
+            raise
+    
+    def _fetch_rds_metrics(self, db_instance_identifier: str, metric_names: List[str], hours: int,
+                           max_points: Optional[int] = None, downsample: str = 'lttb',
+                           format: str = 'rows') -> Dict:
+        """批量获取RDS实例的一个或多个指标"""
+        self._check_series_options(downsample, format)
+        
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+        period = self._choose_period(start_time, end_time)
+        
+        series = self._fetch_series(
+            'AWS/RDS',
+            [[{'Name': 'DBInstanceIdentifier', 'Value': db_instance_identifier}]],
+            metric_names,
+            lambda metric_name: ('Average', 'Maximum'),
+            period,
+            start_time,
+            end_time
+        )[0]
+        
+        return self._multi_metrics_response(metric_names, start_time, end_time, {
+            metric_name: {
                 'db_instance_identifier': db_instance_identifier,
                 'metric_name': metric_name,
                 'time_range': {
                     'start': start_time.isoformat(),
                     'end': end_time.isoformat()
                 },
-                'datapoints': [
-                    {
-                        'timestamp': dp['Timestamp'].isoformat(),
-                        'average': dp['Average'],
-                        'maximum': dp['Maximum'],
-                        'unit': dp['Unit']
-                    }
-                    for dp in datapoints
-                ]
+                'period': period,
+                'datapoints': self._average_maximum_datapoints(
+                    metric_name, series[metric_name], max_points, downsample, format
+                )
             }
-            
-        except Exception as e:
-            self.logger.error(f"获取RDS指标失败: {str(e)}")
-            raise
+            for metric_name in metric_names
+        })
     
+    @cached(ttl=Config.METRICS_CACHE_TTL)
     def get_lambda_metrics(self, function_name: str, 
                           metric_name: str = 'Invocations', 
-                          hours: int = 24) -> Dict:
+                          hours: int = 24, max_points: Optional[int] = None,
+                          downsample: str = 'lttb', format: str = 'rows') -> Dict:
         """
         获取Lambda函数指标
         
@@ -169,52 +410,325 @@ class CloudWatchClient:
             function_name: Lambda函数名称
             metric_name: 指标名称
             hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
             
         Returns:
             Lambda指标数据
         """
         try:
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
+            return self._fetch_lambda_metrics(function_name, [metric_name], hours, max_points, downsample, format)['metrics'][metric_name]
             
-            response = self.client.get_metric_statistics(
-                Namespace='AWS/Lambda',
-                MetricName=metric_name,
-                Dimensions=[
-                    {
-                        'Name': 'FunctionName',
-                        'Value': function_name
-                    }
-                ],
-                StartTime=start_time,
-                EndTime=end_time,
-                Period=3600,  # 1小时间隔
-                Statistics=['Sum', 'Average'] if metric_name == 'Invocations' else ['Average', 'Maximum']
-            )
+        except Exception as e:
+            self.logger.error(f"获取Lambda指标失败: {str(e)}")
+            raise
+    
+    @cached(ttl=Config.METRICS_CACHE_TTL)
+    def get_lambda_multi_metrics(self, function_name: str,
+                                 metric_names: Optional[List[str]] = None,
+                                 hours: int = 24, max_points: Optional[int] = None,
+                                 downsample: str = 'lttb', format: str = 'rows') -> Dict:
+        """
+        一次批量查询获取Lambda函数的多个指标
+        
+        Args:
+            function_name: Lambda函数名称
+            metric_names: 指标名称列表，为None时获取所有支持的指标
+            hours: 获取过去多少小时的数据
+            max_points: 每个序列最多返回的数据点数，超出时在服务端降采样，为None时不降采样
+            downsample: 降采样方法 (lttb, minmax)
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
             
-            datapoints = sorted(response['Datapoints'], key=lambda x: x['Timestamp'])
+        Returns:
+            按指标名称组织的Lambda指标数据，每个指标的结构与 get_lambda_metrics 相同
+        """
+        try:
+            return self._fetch_lambda_metrics(
+                function_name, metric_names or Config.get_supported_metrics('lambda'), hours, max_points, downsample, format
+            )
             
-            return {
+        except Exception as e:
+            self.logger.error(f"获取Lambda指标失败: {str(e)}")
+            raise
+    
+    def _fetch_lambda_metrics(self, function_name: str, metric_names: List[str], hours: int,
+                              max_points: Optional[int] = None, downsample: str = 'lttb',
+                              format: str = 'rows') -> Dict:
+        """批量获取Lambda函数的一个或多个指标"""
+        self._check_series_options(downsample, format)
+        
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+        period = self._choose_period(start_time, end_time)
+        
+        # 调用次数取总和，其余指标取平均值
+        value_stat = lambda metric_name: 'Sum' if metric_name == 'Invocations' else 'Average'
+        series = self._fetch_series(
+            'AWS/Lambda',
+            [[{'Name': 'FunctionName', 'Value': function_name}]],
+            metric_names,
+            lambda metric_name: (value_stat(metric_name),),
+            period,
+            start_time,
+            end_time
+        )[0]
+        
+        datapoints = {
+            metric_name: self._value_datapoints(
+                metric_name, series[metric_name][value_stat(metric_name)], max_points, downsample, format
+            )
+            for metric_name in metric_names
+        }
+        
+        return self._multi_metrics_response(metric_names, start_time, end_time, {
+            metric_name: {
                 'function_name': function_name,
                 'metric_name': metric_name,
                 'time_range': {
                     'start': start_time.isoformat(),
                     'end': end_time.isoformat()
                 },
-                'datapoints': [
-                    {
-                        'timestamp': dp['Timestamp'].isoformat(),
-                        'value': dp.get('Sum', dp.get('Average', 0)),
-                        'unit': dp['Unit']
-                    }
-                    for dp in datapoints
-                ]
+                'period': period,
+                'datapoints': datapoints[metric_name]
             }
-            
+            for metric_name in metric_names
+        })
+    
+    def get_settled_datapoints(self, namespace: str, metric_name: str, dimensions: List[Dict],
+                               stat: str, period: int, since: int) -> Dict:
+        """
+        获取一个序列在 since 之后已稳定的数据点
+
+        经过时间序列缓存，连续调用时只获取上次之后的部分。最近几个间隔内的数据点仍可能变化，不返回。
+
+        Args:
+            namespace: 指标命名空间
+            metric_name: 指标名称
+            dimensions: 指标维度 [{'Name': ..., 'Value': ...}]
+            stat: 统计方式
+            period: 数据点间隔(秒)
+            since: 开始时间(秒级时间戳，包含)
+
+        Returns:
+            {'timestamps': [秒级时间戳], 'values': [...], 'settled_until': 已稳定的截止时间(秒)}
+        """
+        try:
+            end_time = datetime.utcnow()
+            end = self._epoch(end_time)
+            settled_until = end - end % period - self.series_cache.settle_periods * period
+
+            timestamps, values = self._fetch_series(
+                namespace, [dimensions], [metric_name], lambda name: (stat,), period,
+                datetime.fromtimestamp(since, timezone.utc), end_time
+            )[0][metric_name][stat]
+            keep = timestamps < settled_until
+            return {
+                'timestamps': timestamps[keep].tolist(),
+                'values': values[keep].tolist(),
+                'settled_until': max(settled_until, since)
+            }
+
         except Exception as e:
-            self.logger.error(f"获取Lambda指标失败: {str(e)}")
+            self.logger.error(f"获取已稳定数据点失败: {str(e)}")
             raise
+
+    def _fetch_series(self, namespace: str, dimension_sets: List[List[Dict]], metric_names: List[str],
+                      stats: Callable[[str], Tuple[str, ...]], period: int,
+                      start_time: datetime, end_time: datetime,
+                      region: Optional[str] = None) -> List[Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]]]:
+        """
+        用一次批量查询获取多个资源的多个指标
+        
+        数据点经过时间序列缓存，已缓存的序列只获取尚未稳定的最近部分。
+        
+        Args:
+            namespace: 指标命名空间
+            dimension_sets: 每个资源的指标维度
+            metric_names: 指标名称列表
+            stats: 指标名称到统计方式的映射
+            period: 数据点间隔(秒)
+            start_time: 开始时间
+            end_time: 结束时间
+            region: 资源所在区域，默认为客户端所在区域
+            
+        Returns:
+            每个资源一项 {指标名称: {统计方式: (时间戳数组(秒), 数值数组)}}
+        """
+        start = self._epoch(start_time)
+        end = self._epoch(end_time)
+        end_time = datetime.fromtimestamp(end, timezone.utc)
+        if region == self.client.meta.region_name:
+            region = None
+        metric_data = self._metric_data_for(region) if region else self.metric_data
+        
+        # 按开始获取时间分组: 已缓存的序列只获取最后一个稳定时间点之后的数据
+        requests = []
+        groups: Dict[int, List[int]] = {}
+        for resource, dimensions in enumerate(dimension_sets):
+            for metric_name in metric_names:
+                for stat in stats(metric_name):
+                    key = SeriesCache.key(namespace, metric_name, dimensions, period, stat, region)
+                    fetch_start = self.series_cache.fetch_start(key, start, period)
+                    groups.setdefault(fetch_start, []).append(len(requests))
+                    requests.append((resource, metric_name, stat, key, MetricDataEngine.query(namespace, metric_name, dimensions, stat, period)))
+        
+        for fetch_start, indexes in groups.items():
+            results = metric_data.fetch(
+                [requests[i][4] for i in indexes],
+                datetime.fromtimestamp(fetch_start, timezone.utc),
+                end_time
+            )
+            for i, result in zip(indexes, results):
+                self.series_cache.merge(requests[i][3], fetch_start, end, period, result['timestamps'], result['values'])
+        
+        series = [{metric_name: {} for metric_name in metric_names} for _ in dimension_sets]
+        evicted = []
+        for i, (resource, metric_name, stat, key, _) in enumerate(requests):
+            cached_series = self.series_cache.read(key, start, end, period)
+            if cached_series is None:
+                evicted.append(i)
+            else:
+                series[resource][metric_name][stat] = cached_series
+        
+        # 单次请求的数据量超过缓存容量时，被淘汰的序列直接重新获取
+        if evicted:
+            results = metric_data.fetch(
+                [requests[i][4] for i in evicted],
+                datetime.fromtimestamp(start - start % period, timezone.utc),
+                end_time
+            )
+            for i, result in zip(evicted, results):
+                resource, metric_name, stat = requests[i][:3]
+                series[resource][metric_name][stat] = self._result_arrays(result)
+        return series
+    
+    @staticmethod
+    def _choose_period(start_time: datetime, end_time: datetime) -> int:
+        """
+        按时间窗口和数据保留期选择数据点间隔，不小于 METRICS_DEFAULT_PERIOD
+        
+        默认的 METRICS_DEFAULT_PERIOD(3600秒)不小于455天内各保留期的最小间隔，此时保留期不影响结果；
+        将其调低(如60秒)后，较早的窗口才会按保留期使用300秒或3600秒的间隔。
+        """
+        return MetricDataEngine.choose_period(
+            start_time, end_time,
+            minimum=Config.METRICS_DEFAULT_PERIOD,
+            max_points=Config.METRICS_MAX_SERIES_POINTS
+        )
+    
+    @staticmethod
+    def _epoch(value: datetime) -> int:
+        """将时间转换为秒级时间戳，不带时区的时间按UTC处理"""
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    
+    @classmethod
+    def _result_arrays(cls, result: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """GetMetricData 结果转换为 (时间戳数组(秒), 数值数组)"""
+        return (
+            np.array([cls._epoch(timestamp) for timestamp in result['timestamps']], dtype=np.int64),
+            np.asarray(result['values'], dtype=np.float64)
+        )
+    
+    @staticmethod
+    def _check_series_options(downsample: str, format: str):
+        """校验降采样方法和数据点格式"""
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"不支持的降采样方法: {downsample}")
+        if format not in SERIES_FORMATS:
+            raise ValueError(f"不支持的数据点格式: {format}")
+    
+    @staticmethod
+    def _reduce_points(timestamps: np.ndarray, values: np.ndarray, max_points: Optional[int],
+                       method: str) -> Tuple[np.ndarray, np.ndarray]:
+        """数据点超过 max_points 时降采样，为None时原样返回"""
+        if max_points is None or len(timestamps) <= max_points:
+            return timestamps, values
+        keep = downsample_indices(timestamps.astype(np.float64), values, max_points, method)
+        return timestamps[keep], values[keep]
     
+    @staticmethod
+    def _align(timestamps: np.ndarray, other_timestamps: np.ndarray, other_values: np.ndarray,
+               fallback: np.ndarray) -> np.ndarray:
+        """取另一序列在相同时间点上的数值，另一序列缺失的时间点使用 fallback 中对应的值"""
+        if not len(other_timestamps):
+            return fallback
+        index = np.minimum(np.searchsorted(other_timestamps, timestamps), len(other_timestamps) - 1)
+        return np.where(other_timestamps[index] == timestamps, other_values[index], fallback)
+    
+    @staticmethod
+    def _isoformat(timestamps: np.ndarray) -> List[str]:
+        """秒级时间戳数组转换为ISO格式的UTC时间"""
+        return [datetime.fromtimestamp(timestamp, timezone.utc).isoformat() for timestamp in timestamps.tolist()]
+    
+    @classmethod
+    def _average_maximum_datapoints(cls, metric_name: str, stats: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                                    max_points: Optional[int] = None, method: str = 'lttb',
+                                    format: str = 'rows') -> Union[List[Dict], Dict]:
+        """
+        合并 Average 和 Maximum 两个序列，按 Average 序列选取降采样保留的时间点
+        
+        rows 格式为每个数据点一个对象；columnar 格式为 {'unit', 'timestamps'(秒), 'average', 'maximum'}
+        并列数组，直接由序列数组生成。
+        """
+        timestamps, averages = cls._reduce_points(*stats['Average'], max_points, method)
+        maximums = cls._align(timestamps, *stats['Maximum'], averages)
+        unit = Config.METRIC_UNITS.get(metric_name, 'None')
+        if format == 'columnar':
+            return {
+                'unit': unit,
+                'timestamps': timestamps.tolist(),
+                'average': averages.tolist(),
+                'maximum': maximums.tolist()
+            }
+        return [
+            {
+                'timestamp': timestamp,
+                'average': average,
+                'maximum': maximum,
+                'unit': unit
+            }
+            for timestamp, average, maximum in zip(cls._isoformat(timestamps), averages.tolist(), maximums.tolist())
+        ]
+    
+    @classmethod
+    def _value_datapoints(cls, metric_name: str, series: Tuple[np.ndarray, np.ndarray],
+                          max_points: Optional[int] = None, method: str = 'lttb',
+                          format: str = 'rows') -> Union[List[Dict], Dict]:
+        """单个统计方式的序列转换为数据点，columnar 格式为 {'unit', 'timestamps'(秒), 'values'}"""
+        timestamps, values = cls._reduce_points(*series, max_points, method)
+        unit = Config.METRIC_UNITS.get(metric_name, 'None')
+        if format == 'columnar':
+            return {
+                'unit': unit,
+                'timestamps': timestamps.tolist(),
+                'values': values.tolist()
+            }
+        return [
+            {
+                'timestamp': timestamp,
+                'value': value,
+                'unit': unit
+            }
+            for timestamp, value in zip(cls._isoformat(timestamps), values.tolist())
+        ]
+    
+    @staticmethod
+    def _multi_metrics_response(metric_names: List[str], start_time: datetime, end_time: datetime,
+                                metrics: Dict[str, Dict]) -> Dict:
+        """组装多指标响应"""
+        return {
+            'metric_names': list(metric_names),
+            'time_range': {
+                'start': start_time.isoformat(),
+                'end': end_time.isoformat()
+            },
+            'metrics': metrics
+        }
+    
+    @cached(ttl=Config.METRICS_CACHE_TTL)
     def get_s3_metrics(self, bucket_name: str, 
                       metric_name: str = 'BucketSizeBytes', 
                       days: int = 7) -> Dict:
@@ -274,7 +788,208 @@ class CloudWatchClient:
         except Exception as e:
             self.logger.error(f"获取S3指标失败: {str(e)}")
             raise
+
+    @cached(ttl=Config.S3_METRICS_CACHE_TTL)
+    def get_s3_bucket_metrics(self, days: int = 7, bucket_name: Optional[str] = None,
+                              format: str = 'rows') -> Dict:
+        """
+        批量获取所有S3存储桶的存储量和对象数
+        
+        S3存储指标位于存储桶所在区域的CloudWatch，存储桶先按区域分组，每个区域通过 ListMetrics
+        找出实际存在的 (存储桶, 存储类型) 组合，再用 GetMetricData 批量获取 BucketSizeBytes(按存储类型)
+        和 NumberOfObjects。S3存储指标每天只生成一次，结果缓存一天。
+        
+        Args:
+            days: 获取过去多少天的数据
+            bucket_name: 只获取指定存储桶，为None时获取所有存储桶
+            format: 数据点格式，rows 为每个数据点一个对象，columnar 为并列数组
+        
+        Returns:
+            按存储量降序排列的存储桶指标
+        """
+        try:
+            if format not in SERIES_FORMATS:
+                raise ValueError(f"不支持的数据点格式: {format}")
+            
+            end_time = datetime.utcnow()
+            start_time = end_time - timedelta(days=days)
+            period = 86400
+            
+            regions = self.bucket_regions() if self.bucket_regions else None
+            if regions is None:
+                region = self.client.meta.region_name
+                by_region = {region: [bucket_name] if bucket_name else None}
+            elif bucket_name:
+                if bucket_name not in regions:
+                    raise ValueError(f"存储桶 {bucket_name} 不存在或无法获取所在区域")
+                by_region = {regions[bucket_name]: [bucket_name]}
+            else:
+                by_region = {}
+                for name, region in regions.items():
+                    by_region.setdefault(region, []).append(name)
+            
+            metrics, failed_regions = self.fetch_s3_storage_metrics(by_region, start_time, end_time)
+            
+            buckets: Dict[str, Dict] = {}
+            for region, name, metric_name, storage_type, result in metrics:
+                bucket = buckets.setdefault(name, {
+                    'bucket_name': name,
+                    'region': region,
+                    'size_bytes': 0.0,
+                    'number_of_objects': None,
+                    'storage_types': {},
+                    'datapoints': {metric: {} for metric in Config.S3_METRICS}
+                })
+                bucket['datapoints'][metric_name][storage_type] = self._value_datapoints(
+                    metric_name, self._result_arrays(result), format=format
+                )
+                if not result['values']:
+                    continue
+                # 汇总值取最新一天的数据点
+                if metric_name == 'BucketSizeBytes':
+                    bucket['storage_types'][storage_type] = result['values'][-1]
+                    bucket['size_bytes'] += result['values'][-1]
+                else:
+                    bucket['number_of_objects'] = result['values'][-1]
+            
+            bucket_list = sorted(buckets.values(), key=lambda bucket: bucket['size_bytes'], reverse=True)
+            
+            result = {
+                'time_range': {
+                    'start': start_time.isoformat(),
+                    'end': end_time.isoformat()
+                },
+                'period': period,
+                'regions': sorted(by_region),
+                'failed_regions': failed_regions,
+                'total_buckets': len(bucket_list),
+                'total_size_bytes': sum(bucket['size_bytes'] for bucket in bucket_list),
+                'total_objects': sum(bucket['number_of_objects'] or 0 for bucket in bucket_list),
+                'buckets': bucket_list
+            }
+            # 部分区域获取失败时标记错误，避免不完整的结果被缓存一天
+            if failed_regions:
+                result['error'] = f"获取S3存储指标失败的区域: {', '.join(failed_regions)}"
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"批量获取S3指标失败: {str(e)}")
+            raise
     
+    def fetch_s3_storage_metrics(self, buckets: Dict[str, Optional[List[str]]], start_time: datetime, end_time: datetime,
+                                 listed: Optional[Dict[str, Dict[str, List[Tuple[str, List[Dict]]]]]] = None
+                                 ) -> Tuple[List[Tuple[str, str, str, str, Dict]], Dict[str, str]]:
+        """
+        按区域批量获取S3存储桶的每日存储指标
+        
+        每个区域列出一次存储指标，再在该区域的CloudWatch上通过 GetMetricData 批量获取，
+        调用次数与区域数而不是存储桶数相关。各区域并发查询，单个区域失败不影响其他区域。
+        
+        Args:
+            buckets: {区域: [存储桶名称]}，存储桶列表为None时获取该区域的所有存储桶
+            start_time: 开始时间
+            end_time: 结束时间
+            listed: 调用方持有的已列出指标 {区域: {存储桶名称: [(指标名称, 维度列表)]}}，
+                多次调用时每个区域只列出一次
+        
+        Returns:
+            ([(区域, 存储桶名称, 指标名称, 存储类型, GetMetricData结果)], {失败的区域: 错误信息})
+        """
+        if listed is None:
+            listed = {}
+        
+        def fetch(region: str, names: Optional[List[str]]) -> List[Tuple[str, str, str, str, Dict]]:
+            metric_data = self._metric_data_for(region)
+            if region not in listed:
+                # 只查询一个存储桶时按存储桶过滤，无需列出区域内的所有指标
+                only = names[0] if names is not None and len(names) == 1 else None
+                region_metrics = self._list_s3_metrics(metric_data.client, only)
+                if only is None:
+                    listed[region] = region_metrics
+            else:
+                region_metrics = listed[region]
+            
+            metrics = [
+                (name, metric_name, dimensions)
+                for name in (names if names is not None else region_metrics)
+                for metric_name, dimensions in region_metrics.get(name, [])
+            ]
+            results = metric_data.fetch(
+                [
+                    MetricDataEngine.query('AWS/S3', metric_name, dimensions, 'Average', 86400)
+                    for _, metric_name, dimensions in metrics
+                ],
+                start_time,
+                end_time
+            )
+            return [
+                (region, name, metric_name, self._dimension_value(dimensions, 'StorageType'), result)
+                for (name, metric_name, dimensions), result in zip(metrics, results)
+            ]
+        
+        collected = []
+        failed_regions = {}
+        if not buckets:
+            return collected, failed_regions
+        with ThreadPoolExecutor(max_workers=min(len(buckets), Config.METRICS_BATCH_CONCURRENCY)) as pool:
+            futures = [(region, pool.submit(fetch, region, names)) for region, names in sorted(buckets.items())]
+            for region, future in futures:
+                try:
+                    collected.extend(future.result())
+                except Exception as e:
+                    self.logger.warning(f"获取 {region} 区域S3存储指标失败: {str(e)}")
+                    failed_regions[region] = str(e)
+        return collected, failed_regions
+    
+    @staticmethod
+    def _list_s3_metrics(client, bucket_name: Optional[str] = None) -> Dict[str, List[Tuple[str, List[Dict]]]]:
+        """
+        分页列出区域内存在的S3存储指标
+        
+        Args:
+            client: 该区域的CloudWatch客户端
+            bucket_name: 只列出指定存储桶的指标
+        
+        Returns:
+            {存储桶名称: [(指标名称, 维度列表)]}
+        """
+        paginator = client.get_paginator('list_metrics')
+        dimensions = [{'Name': 'BucketName', 'Value': bucket_name}] if bucket_name else []
+        metrics: Dict[str, List[Tuple[str, List[Dict]]]] = {}
+        for metric_name in Config.S3_METRICS:
+            for page in paginator.paginate(Namespace='AWS/S3', MetricName=metric_name, Dimensions=dimensions):
+                for metric in page['Metrics']:
+                    # 只保留存储指标(BucketName + StorageType)，忽略请求指标等其他维度组合
+                    if {dimension['Name'] for dimension in metric['Dimensions']} == {'BucketName', 'StorageType'}:
+                        name = CloudWatchClient._dimension_value(metric['Dimensions'], 'BucketName')
+                        metrics.setdefault(name, []).append((metric_name, metric['Dimensions']))
+        return metrics
+    
+    @staticmethod
+    def _dimension_value(dimensions: List[Dict], name: str) -> Optional[str]:
+        """获取维度列表中指定维度的值"""
+        return next((dimension['Value'] for dimension in dimensions if dimension['Name'] == name), None)
+    
+    def _metric_data_for(self, region: str) -> MetricDataEngine:
+        """
+        获取指定区域的批量查询引擎，客户端所在区域使用默认引擎
+        
+        Args:
+            region: 区域名称
+        """
+        if region == self.client.meta.region_name:
+            return self.metric_data
+        with self._regional_lock:
+            metric_data = self._regional_metric_data.get(region)
+            if metric_data is None:
+                metric_data = MetricDataEngine(
+                    boto3.client('cloudwatch', region_name=region),
+                    max_workers=Config.METRICS_BATCH_CONCURRENCY
+                )
+                self._regional_metric_data[region] = metric_data
+            return metric_data
+
+    @cached(ttl=Config.METRICS_CACHE_TTL)
     def get_custom_metrics(self, namespace: str, metric_name: str, 
                           dimensions: List[Dict], hours: int = 24) -> Dict:
         """
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+列式成本数据
+以 时间段 × 分组键 的稠密float64矩阵保存成本，所有汇总计算都在数组上向量化完成，
+只在输出时才转换为JSON结构
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class CostCube:
+    """时间段 × 分组键 的成本矩阵"""
+
+    def __init__(self, periods: List[Tuple[str, str]], keys: List[str],
+                 cost: np.ndarray, usage: np.ndarray, present: np.ndarray):
+        """
+        初始化成本矩阵
+
+        Args:
+            periods: 时间段列表 [(开始日期, 结束日期)]，按时间升序
+            keys: 分组键列表(列)，按首次出现顺序
+            cost: BlendedCost矩阵，形状 (时间段数, 分组键数)
+            usage: UsageQuantity矩阵，形状同上
+            present: 该时间段是否返回了该分组(区分"没有数据"和"成本为0")
+        """
+        self.periods = periods
+        self.keys = keys
+        self.cost = cost
+        self.usage = usage
+        self.present = present
+
+    @classmethod
+    def from_periods(cls, periods: Iterable[Tuple[str, str, Dict]]) -> 'CostCube':
+        """
+        由 (开始, 结束, {分组键: (BlendedCost, UsageQuantity)}) 记录构建
+
+        Args:
+            periods: 时间段记录迭代器
+        """
+        period_list = []
+        key_index: Dict[str, int] = {}
+        rows, cols, costs, usages = [], [], [], []
+
+        for row, (start, end, groups) in enumerate(periods):
+            period_list.append((start, end))
+            for key, (cost, usage) in groups.items():
+                col = key_index.setdefault(key, len(key_index))
+                rows.append(row)
+                cols.append(col)
+                costs.append(cost)
+                usages.append(usage)
+
+        return cls._build(period_list, list(key_index), rows, cols, costs, usages)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, float, float]],
+                  periods: List[Tuple[str, str]]) -> 'CostCube':
+        """
+        由按日的 (日期, 分组键, BlendedCost, UsageQuantity) 行构建
+
+        Args:
+            rows: 数据行迭代器
+            periods: 按日划分的时间段，行的日期必须是某个时间段的开始日期
+        """
+        period_index = {start: i for i, (start, _) in enumerate(periods)}
+        key_index: Dict[str, int] = {}
+        row_idx, cols, costs, usages = [], [], [], []
+
+        for day, key, cost, usage in rows:
+            row_idx.append(period_index[day])
+            cols.append(key_index.setdefault(key, len(key_index)))
+            costs.append(cost)
+            usages.append(usage)
+
+        return cls._build(list(periods), list(key_index), row_idx, cols, costs, usages)
+
+    @classmethod
+    def concat(cls, cubes: List['CostCube']) -> 'CostCube':
+        """
+        按时间顺序拼接多个互不重叠的成本矩阵
+
+        Args:
+            cubes: 按时间升序排列的成本矩阵，分组键可以不同
+
+        Returns:
+            合并后的成本矩阵，分组键按首次出现顺序排列
+        """
+        key_index: Dict[str, int] = {}
+        for cube in cubes:
+            for key in cube.keys:
+                key_index.setdefault(key, len(key_index))
+
+        periods = [period for cube in cubes for period in cube.periods]
+        shape = (len(periods), len(key_index))
+        cost = np.zeros(shape, dtype=np.float64)
+        usage = np.zeros(shape, dtype=np.float64)
+        present = np.zeros(shape, dtype=bool)
+
+        row = 0
+        for cube in cubes:
+            rows = slice(row, row + len(cube.periods))
+            cols = np.array([key_index[key] for key in cube.keys], dtype=np.intp)
+            cost[rows, cols] = cube.cost
+            usage[rows, cols] = cube.usage
+            present[rows, cols] = cube.present
+            row += len(cube.periods)
+
+        return cls(periods, list(key_index), cost, usage, present)
+
+    @classmethod
+    def _build(cls, periods, keys, rows, cols, costs, usages) -> 'CostCube':
+        shape = (len(periods), len(keys))
+        cost = np.zeros(shape, dtype=np.float64)
+        usage = np.zeros(shape, dtype=np.float64)
+        present = np.zeros(shape, dtype=bool)
+
+        if rows:
+            rows = np.asarray(rows, dtype=np.intp)
+            cols = np.asarray(cols, dtype=np.intp)
+            np.add.at(cost, (rows, cols), np.asarray(costs, dtype=np.float64))
+            np.add.at(usage, (rows, cols), np.asarray(usages, dtype=np.float64))
+            present[rows, cols] = True
+
+        return cls(periods, keys, cost, usage, present)
+
+    @property
+    def period_starts(self) -> np.ndarray:
+        """时间段开始日期数组 (datetime64[D])"""
+        return np.array([start for start, _ in self.periods], dtype='datetime64[D]')
+
+    def rollup(self, periods: List[Tuple[str, str]]) -> 'CostCube':
+        """
+        汇总到更粗的时间段(如按日汇总为按月)
+
+        Args:
+            periods: 目标时间段，每个源时间段必须完整落在某个目标时间段内
+
+        Returns:
+            新的成本矩阵
+        """
+        shape = (len(periods), len(self.keys))
+        cost = np.zeros(shape, dtype=np.float64)
+        usage = np.zeros(shape, dtype=np.float64)
+        present = np.zeros(shape, dtype=bool)
+
+        if self.periods and periods:
+            target_starts = np.array([start for start, _ in periods], dtype='datetime64[D]')
+            target = np.searchsorted(target_starts, self.period_starts, side='right') - 1
+            np.add.at(cost, target, self.cost)
+            np.add.at(usage, target, self.usage)
+            np.logical_or.at(present, target, self.present)
+
+        return CostCube(list(periods), list(self.keys), cost, usage, present)
+
+    def slice(self, start: str, end: str) -> 'CostCube':
+        """
+        截取 [start, end) 范围内的时间段
+
+        窗口内没有数据的分组键会被去掉，其余分组键按在窗口内首次出现的顺序排列，
+        与直接查询该窗口得到的结果一致。
+
+        Args:
+            start: 开始日期(包含)
+            end: 结束日期(不包含)
+        """
+        starts = self.period_starts
+        lo = int(np.searchsorted(starts, np.datetime64(start)))
+        hi = int(np.searchsorted(starts, np.datetime64(end)))
+        if hi <= lo:
+            empty = np.zeros((0, 0), dtype=np.float64)
+            return CostCube([], [], empty, empty.copy(), np.zeros((0, 0), dtype=bool))
+
+        present = self.present[lo:hi]
+        columns = np.flatnonzero(present.any(axis=0))
+        first_seen = present[:, columns].argmax(axis=0)
+        columns = columns[np.lexsort((columns, first_seen))]
+
+        return CostCube(
+            self.periods[lo:hi],
+            [self.keys[i] for i in columns.tolist()],
+            self.cost[lo:hi][:, columns],
+            self.usage[lo:hi][:, columns],
+            present[:, columns]
+        )
+
+    def period_totals(self) -> np.ndarray:
+        """每个时间段的总成本"""
+        return self.cost.sum(axis=1)
+
+    def key_totals(self) -> np.ndarray:
+        """每个分组键的总成本"""
+        return self.cost.sum(axis=0)
+
+    def total(self) -> float:
+        """总成本"""
+        return float(self.cost.sum())
+
+    def average_per_period(self) -> float:
+        """平均每个时间段的成本"""
+        return float(self.period_totals().mean()) if self.periods else 0.0
+
+    def top_keys(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        按总成本降序排列的分组键下标
+
+        Args:
+            n: 只返回前n个，为None时返回全部
+        """
+        order = np.argsort(-self.key_totals(), kind='stable')
+        return order if n is None else order[:n]
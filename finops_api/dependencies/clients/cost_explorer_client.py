@@ -6,10 +6,20 @@ AWS Cost Explorer API 客户端
 
 import boto3
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+from config import Config
+from .cache import TTLCache, cached
+from .singleflight import SingleFlight
+from .cost_store import CostStore, contiguous_ranges
+from .cost_cube import CostCube
+from .interval_cache import IntervalCache
+from .rate_limiter import RateLimiter
+
 class CostExplorerClient:
     def __init__(self, region_name: str = 'us-east-1'):
         """
@@ -20,114 +30,196 @@ class CostExplorerClient:
         """
         self.client = boto3.client('ce', region_name=region_name)
         self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(maxsize=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self.flight = SingleFlight()
+        self.cubes = IntervalCache(
+            maxsize=Config.COST_CUBE_CACHE_SIZE,
+            ttl=Config.CACHE_TTL,
+            settle_days=Config.COST_SETTLE_DAYS,
+            max_segments=Config.COST_CUBE_CACHE_SEGMENTS
+        )
+        self.store = CostStore(Config.COST_STORE_PATH) if Config.COST_STORE_PATH else None
+        self._sync_lock = threading.Lock()
+        self.rate_limiter = RateLimiter(Config.CE_REQUESTS_PER_SECOND)
     
-    def get_daily_costs(self, days: int = 30, granularity: str = 'DAILY') -> Dict:
+    @cached()
+    def get_daily_costs(self, days: int = 30, granularity: str = 'DAILY',
+                        start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
         """
         获取每日成本数据
         
         Args:
             days: 获取过去多少天的数据
             granularity: 数据粒度 (DAILY, MONTHLY)
+            start_date: 开始日期(包含)，指定后忽略days
+            end_date: 结束日期(不包含)，默认为今天
             
         Returns:
             成本数据字典
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days)
-            
-            response = self.client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date.strftime('%Y-%m-%d'),
-                    'End': end_date.strftime('%Y-%m-%d')
-                },
-                Granularity=granularity,
-                Metrics=['BlendedCost', 'UsageQuantity'],
-                GroupBy=[
-                    {
-                        'Type': 'DIMENSION',
-                        'Key': 'SERVICE'
-                    }
-                ]
-            )
-            
-            return self._format_cost_response(response)
+            start_date, end_date = self._date_range(days, start_date, end_date)
+            return self._format_cost_response(self._load_cube('SERVICE', start_date, end_date, granularity))
             
         except Exception as e:
             self.logger.error(f"获取每日成本数据失败: {str(e)}")
             raise
     
-    def get_cost_by_service(self, days: int = 30) -> Dict:
+    def iter_daily_costs(self, days: int = 30, granularity: str = 'DAILY',
+                         start_date: Optional[date] = None, end_date: Optional[date] = None) -> Iterator[Dict]:
+        """
+        逐个时间段生成成本数据，用于流式响应
+        
+        Args:
+            days: 获取过去多少天的数据
+            granularity: 数据粒度 (DAILY, MONTHLY)
+            start_date: 开始日期(包含)，指定后忽略days
+            end_date: 结束日期(不包含)，默认为今天
+            
+        Returns:
+            每个时间段一条记录的迭代器
+        """
+        start_date, end_date = self._date_range(days, start_date, end_date)
+        periods = self._iter_periods('SERVICE', start_date, end_date, granularity)
+        return (self._format_period(start, groups) for start, _, groups in periods)
+    
+    @cached()
+    def get_cost_by_service(self, days: int = 30, top: Optional[int] = None,
+                            start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
         """
         获取按服务分组的成本数据
         
         Args:
             days: 获取过去多少天的数据
+            top: 只返回成本最高的前N个服务，为None时返回全部
+            start_date: 开始日期(包含)，指定后忽略days
+            end_date: 结束日期(不包含)，默认为今天
             
         Returns:
             按服务分组的成本数据
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days)
-            
-            response = self.client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date.strftime('%Y-%m-%d'),
-                    'End': end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['BlendedCost'],
-                GroupBy=[
-                    {
-                        'Type': 'DIMENSION',
-                        'Key': 'SERVICE'
-                    }
-                ]
-            )
-            
-            return self._format_service_costs(response)
+            start_date, end_date = self._date_range(days, start_date, end_date)
+            cube = self._load_cube('SERVICE', start_date, end_date, 'MONTHLY')
+            return self._format_service_costs(cube, top)
             
         except Exception as e:
             self.logger.error(f"获取服务成本数据失败: {str(e)}")
             raise
     
-    def get_cost_by_tags(self, tag_key: str, days: int = 30) -> Dict:
+    @cached()
+    def get_cost_by_tags(self, tag_key: str, days: int = 30,
+                         start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
         """
         获取按标签分组的成本数据
         
         Args:
             tag_key: 标签键名
             days: 获取过去多少天的数据
+            start_date: 开始日期(包含)，指定后忽略days
+            end_date: 结束日期(不包含)，默认为今天
             
         Returns:
             按标签分组的成本数据
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days)
+            start_date, end_date = self._date_range(days, start_date, end_date)
+            cube = self._load_cube(f'TAG:{tag_key}', start_date, end_date, 'MONTHLY')
+            return self._format_tag_costs(cube, tag_key)
             
-            response = self.client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date.strftime('%Y-%m-%d'),
-                    'End': end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['BlendedCost'],
-                GroupBy=[
-                    {
-                        'Type': 'TAG',
-                        'Key': tag_key
-                    }
-                ]
-            )
+        except Exception as e:
+            self.logger.error(f"获取标签成本数据失败: {str(e)}")
+            raise
+    
+    @cached()
+    def query_costs(self, group_by: List[str], filters: Optional[Dict[str, List[str]]] = None,
+                    days: int = 30, granularity: str = 'MONTHLY',
+                    start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+        """
+        按任意多个维度/标签分组查询成本
+        
+        Cost Explorer每次最多按两个键分组。超过两个键时，先按前面的键查询出实际存在的取值组合，
+        再对每个组合加过滤条件按剩余的键分组查询，逐层展开直到每次查询不超过两个分组键。
+        同一层的查询并发执行，所有请求都经过限流器。
+        
+        Args:
+            group_by: 分组键列表，取值为 Config.COST_DIMENSIONS 中的维度或 TAG:<标签键>
+            filters: 过滤条件 {维度或TAG:<标签键>: [取值]}
+            days: 获取过去多少天的数据
+            granularity: 数据粒度 (DAILY, MONTHLY)
+            start_date: 开始日期(包含)，指定后忽略days
+            end_date: 结束日期(不包含)，默认为今天
+            
+        Returns:
+            透视表形式的成本数据
+        """
+        try:
+            if not group_by:
+                raise ValueError("至少需要一个分组键")
+            for key in list(group_by) + list(filters or {}):
+                if not key.startswith('TAG:') and key not in Config.COST_DIMENSIONS:
+                    raise ValueError(f"不支持的维度: {key}")
+            if len(set(group_by)) != len(group_by):
+                raise ValueError("分组键不能重复")
+            if granularity not in ('DAILY', 'MONTHLY'):
+                raise ValueError(f"不支持的数据粒度: {granularity}")
+            
+            start_date, end_date = self._date_range(days, start_date, end_date)
+            base_filters = [self._filter_expression(key, values) for key, values in (filters or {}).items()]
+            
+            rows = []
+            calls = 0
+            # 待查询任务: (已确定的分组取值, 过滤条件, 剩余分组键)
+            pending = [((), base_filters, list(group_by))]
             
-            return self._format_tag_costs(response, tag_key)
+            with ThreadPoolExecutor(max_workers=Config.COST_QUERY_CONCURRENCY) as pool:
+                while pending:
+                    futures = [
+                        (task, pool.submit(self._query_split, task[1], task[2], start_date, end_date, granularity))
+                        for task in pending
+                    ]
+                    pending = []
+                    
+                    for (fixed, task_filters, remaining), future in futures:
+                        head, results, pages = future.result()
+                        calls += pages
+                        
+                        if len(head) == len(remaining):
+                            rows.extend(
+                                [period, *fixed, *values, cost, usage]
+                                for period, values, cost, usage in results
+                            )
+                            continue
+                        
+                        # 对实际存在的取值组合继续展开剩余的分组键
+                        for combo in sorted({values for _, values, _, _ in results}):
+                            pending.append((
+                                fixed + combo,
+                                task_filters + [self._filter_expression(key, [value]) for key, value in zip(head, combo)],
+                                remaining[len(head):]
+                            ))
+            
+            rows.sort(key=lambda row: row[:-2])
+            
+            return {
+                'group_by': list(group_by),
+                'filters': filters or {},
+                'granularity': granularity,
+                'time_period': {
+                    'start': start_date.isoformat(),
+                    'end': end_date.isoformat()
+                },
+                'columns': ['period', *group_by, 'cost', 'usage_quantity'],
+                'rows': rows,
+                'total_cost': sum(row[-2] for row in rows),
+                'api_calls': calls
+            }
             
         except Exception as e:
-            self.logger.error(f"获取标签成本数据失败: {str(e)}")
+            self.logger.error(f"多维度成本查询失败: {str(e)}")
             raise
     
+    @cached()
     def get_cost_forecast(self, days: int = 30) -> Dict:
         """
         获取成本预测数据
@@ -142,6 +234,7 @@ class CostExplorerClient:
             start_date = datetime.now().date()
             end_date = start_date + timedelta(days=days)
             
+            self.rate_limiter.acquire()
             response = self.client.get_cost_forecast(
                 TimePeriod={
                     'Start': start_date.strftime('%Y-%m-%d'),
@@ -157,83 +250,356 @@ class CostExplorerClient:
             self.logger.error(f"获取成本预测数据失败: {str(e)}")
             raise
     
-    def _format_cost_response(self, response: Dict) -> Dict:
-        """格式化成本响应数据"""
-        formatted_data = {
-            'time_period': {
-                'start': response.get('ResultsByTime', [{}])[0].get('TimePeriod', {}).get('Start'),
-                'end': response.get('ResultsByTime', [{}])[-1].get('TimePeriod', {}).get('End') if response.get('ResultsByTime') else None
-            },
-            'daily_costs': [],
-            'total_cost': 0.0
-        }
+    def iter_cost_and_usage(self, **params) -> Iterator[Dict]:
+        """
+        分页查询 get_cost_and_usage
         
-        for result in response.get('ResultsByTime', []):
-            daily_data = {
-                'date': result.get('TimePeriod', {}).get('Start'),
-                'services': [],
-                'total': 0.0
-            }
+        按 NextPageToken 逐页请求，每收到一页就生成一页，避免大结果集被截断。
+        
+        Args:
+            **params: get_cost_and_usage 请求参数
             
-            for group in result.get('Groups', []):
-                service_name = group.get('Keys', ['Unknown'])[0]
-                cost = float(group.get('Metrics', {}).get('BlendedCost', {}).get('Amount', 0))
-                
-                daily_data['services'].append({
-                    'service': service_name,
-                    'cost': cost
-                })
-                daily_data['total'] += cost
+        Returns:
+            响应页迭代器
+        """
+        while True:
+            self.rate_limiter.acquire()
+            response = self.client.get_cost_and_usage(**params)
+            yield response
             
-            formatted_data['daily_costs'].append(daily_data)
-            formatted_data['total_cost'] += daily_data['total']
+            next_token = response.get('NextPageToken')
+            if not next_token:
+                break
+            params = {**params, 'NextPageToken': next_token}
+    
+    def sync_costs(self, dimension: str, start_date: date, end_date: date) -> int:
+        """
+        增量同步成本仓库
         
-        return formatted_data
+        只查询仓库中缺失的日期以及尚未结算的最近几天，已结算的历史数据不再重复查询。
+        
+        Args:
+            dimension: 分组维度，如 SERVICE 或 TAG:<标签键>
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+            
+        Returns:
+            本次同步的天数
+        """
+        with self._sync_lock:
+            stale = self.store.stale_dates(
+                dimension, start_date, end_date,
+                settle_days=Config.COST_SETTLE_DAYS,
+                resync_after=Config.COST_RESYNC_INTERVAL
+            )
+            
+            for range_start, range_end in contiguous_ranges(stale):
+                rows = [
+                    (day, key, cost, usage)
+                    for day, _, groups in self._iter_ce_periods(dimension, range_start, range_end, 'DAILY')
+                    for key, (cost, usage) in groups.items()
+                ]
+                self.store.replace_days(dimension, range_start, range_end, rows)
+                self.logger.info(f"同步成本数据 {dimension} {range_start} ~ {range_end}: {len(rows)} 行")
+            
+            return len(stale)
     
-    def _format_service_costs(self, response: Dict) -> Dict:
-        """格式化服务成本数据"""
-        service_costs = {}
-        total_cost = 0.0
+    def _iter_periods(self, dimension: str, start_date: date, end_date: date, granularity: str = 'DAILY',
+                      metrics: Optional[List[str]] = None) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        获取日期区间内按维度分组的成本
         
-        for result in response.get('ResultsByTime', []):
-            for group in result.get('Groups', []):
-                service_name = group.get('Keys', ['Unknown'])[0]
-                cost = float(group.get('Metrics', {}).get('BlendedCost', {}).get('Amount', 0))
-                
-                if service_name not in service_costs:
-                    service_costs[service_name] = 0.0
+        启用成本仓库时先增量同步再从仓库读取，否则直接分页查询Cost Explorer。
+        同步在调用时立即执行，返回的迭代器只负责读取。
+        
+        Args:
+            dimension: 分组维度，如 SERVICE 或 TAG:<标签键>
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+            granularity: 数据粒度 (DAILY, MONTHLY)
+            metrics: 直接查询时请求的指标
+            
+        Returns:
+            (时间段开始, 时间段结束, {分组键: (BlendedCost, UsageQuantity)}) 迭代器
+        """
+        if granularity not in ('DAILY', 'MONTHLY'):
+            raise ValueError(f"不支持的数据粒度: {granularity}")
+        
+        if self.store is not None:
+            self.sync_costs(dimension, start_date, end_date)
+            return self._iter_store_periods(dimension, start_date, end_date, granularity)
+        return self._iter_ce_periods(dimension, start_date, end_date, granularity, metrics)
+    
+    def _load_cube(self, dimension: str, start_date: date, end_date: date, granularity: str = 'DAILY') -> CostCube:
+        """
+        获取日期区间内按维度分组的成本矩阵
+        
+        各种视图(按日、按月、按服务汇总)都由同一份按日数据在本地汇总得到，
+        因此同一窗口的不同视图只需获取一次数据。
+        
+        Args:
+            dimension: 分组维度，如 SERVICE 或 TAG:<标签键>
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+            granularity: 数据粒度 (DAILY, MONTHLY)
+        """
+        if granularity not in ('DAILY', 'MONTHLY'):
+            raise ValueError(f"不支持的数据粒度: {granularity}")
+        
+        cube = self._plan_daily_cube(dimension, start_date, end_date)
+        if granularity == 'MONTHLY':
+            cube = cube.rollup(self._split_periods(start_date, end_date, 'MONTHLY'))
+        return cube
+    
+    def _plan_daily_cube(self, dimension: str, start_date: date, end_date: date) -> CostCube:
+        """
+        查询规划: 确定按日成本矩阵的数据来源
+        
+        按日数据按日期区间缓存，只获取缓存中缺失的子区间，其余部分直接拼接。
+        例如先请求30天再请求90天，第二次只获取多出的60天。
+        缺失的子区间在启用成本仓库时增量同步后从仓库读取，否则按日粒度查询Cost Explorer；
+        并发的相同子区间获取会被合并。
+        """
+        pieces, missing = self.cubes.lookup(dimension, start_date, end_date)
+        
+        for range_start, range_end in missing:
+            cube = self.flight.do(
+                ('cube', dimension, range_start.isoformat(), range_end.isoformat()),
+                lambda range_start=range_start, range_end=range_end: self._fetch_daily_cube(dimension, range_start, range_end)
+            )
+            pieces.append((range_start, cube))
+        
+        pieces.sort(key=lambda piece: piece[0])
+        return CostCube.concat([cube for _, cube in pieces]).slice(start_date.isoformat(), end_date.isoformat())
+    
+    def _fetch_daily_cube(self, dimension: str, start_date: date, end_date: date) -> CostCube:
+        """获取一个日期区间的按日成本矩阵并写入区间缓存"""
+        if self.store is not None:
+            self.sync_costs(dimension, start_date, end_date)
+            cube = CostCube.from_rows(
+                self.store.iter_rows(dimension, start_date, end_date),
+                self._split_periods(start_date, end_date, 'DAILY')
+            )
+        else:
+            cube = CostCube.from_periods(
+                self._iter_ce_periods(dimension, start_date, end_date, 'DAILY')
+            )
+        
+        self.cubes.put(dimension, start_date, end_date, cube)
+        return cube
+    
+    def _iter_ce_periods(self, dimension: str, start_date: date, end_date: date,
+                         granularity: str, metrics: Optional[List[str]] = None) -> Iterator[Tuple[str, str, Dict]]:
+        """分页查询Cost Explorer，合并被拆分到相邻页中的同一时间段"""
+        current = None
+        pages = self.iter_cost_and_usage(
+            TimePeriod={
+                'Start': start_date.strftime('%Y-%m-%d'),
+                'End': end_date.strftime('%Y-%m-%d')
+            },
+            Granularity=granularity,
+            Metrics=metrics or ['BlendedCost', 'UsageQuantity'],
+            GroupBy=[self._group_by(dimension)]
+        )
+        
+        for page in pages:
+            for result in page.get('ResultsByTime', []):
+                period = result.get('TimePeriod', {})
+                if current is not None and current[0] != period.get('Start'):
+                    yield current
+                    current = None
+                if current is None:
+                    current = (period.get('Start'), period.get('End'), {})
                 
-                service_costs[service_name] += cost
-                total_cost += cost
+                groups = current[2]
+                for group in result.get('Groups', []):
+                    key = group.get('Keys', ['Unknown'])[0]
+                    group_metrics = group.get('Metrics', {})
+                    cost = float(group_metrics.get('BlendedCost', {}).get('Amount', 0))
+                    usage = float(group_metrics.get('UsageQuantity', {}).get('Amount', 0))
+                    previous_cost, previous_usage = groups.get(key, (0.0, 0.0))
+                    groups[key] = (previous_cost + cost, previous_usage + usage)
         
-        # 按成本排序
-        sorted_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)
+        if current is not None:
+            yield current
+    
+    def _iter_store_periods(self, dimension: str, start_date: date, end_date: date,
+                            granularity: str) -> Iterator[Tuple[str, str, Dict]]:
+        """从成本仓库按粒度读取，空缺的时间段也会生成(分组为空)"""
+        rows = self.store.iter_rows(dimension, start_date, end_date)
+        row = next(rows, None)
         
+        for period_start, period_end in self._split_periods(start_date, end_date, granularity):
+            groups = {}
+            while row is not None and row[0] < period_end:
+                _, key, cost, usage = row
+                previous_cost, previous_usage = groups.get(key, (0.0, 0.0))
+                groups[key] = (previous_cost + cost, previous_usage + usage)
+                row = next(rows, None)
+            yield period_start, period_end, groups
+    
+    @staticmethod
+    def _date_range(days: int, start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> Tuple[date, date]:
+        """
+        确定查询的日期区间 [开始, 结束)
+        
+        指定开始日期时按绝对日期查询，缓存键不随日期变化；否则为截至今天的过去days天。
+        区间不能包含未来的日期，开始日期不能早于 Config.MAX_DAYS 天之前。
+        """
+        today = datetime.now().date()
+        end_date = end_date or today
+        start_date = start_date or end_date - timedelta(days=days)
+        if start_date >= end_date:
+            raise ValueError(f"开始日期 {start_date} 必须早于结束日期 {end_date}")
+        if end_date > today + timedelta(days=1):
+            raise ValueError(f"结束日期 {end_date} 不能晚于明天")
+        earliest = today - timedelta(days=Config.MAX_DAYS)
+        if start_date < earliest:
+            raise ValueError(f"开始日期 {start_date} 不能早于 {earliest} (最多查询过去{Config.MAX_DAYS}天)")
+        return start_date, end_date
+    
+    @staticmethod
+    def _split_periods(start_date: date, end_date: date, granularity: str) -> List[Tuple[str, str]]:
+        """按粒度划分时间段，与Cost Explorer的划分方式一致"""
+        periods = []
+        current = start_date
+        while current < end_date:
+            if granularity == 'DAILY':
+                next_start = current + timedelta(days=1)
+            else:
+                next_start = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+            period_end = min(next_start, end_date)
+            periods.append((current.isoformat(), period_end.isoformat()))
+            current = period_end
+        return periods
+    
+    @staticmethod
+    def _group_by(dimension: str) -> Dict:
+        """将仓库维度名转换为 GroupBy 参数"""
+        if dimension.startswith('TAG:'):
+            return {'Type': 'TAG', 'Key': dimension[len('TAG:'):]}
+        return {'Type': 'DIMENSION', 'Key': dimension}
+    
+    def _query_split(self, filters: List[Dict], remaining: List[str], start_date: date,
+                     end_date: date, granularity: str) -> Tuple[List[str], List[Tuple], int]:
+        """
+        执行多维度查询中的一次(分页)查询
+        
+        剩余分组键不超过两个时直接按它们分组得到最终结果；否则只按前面的键分组，
+        用于找出需要继续展开的取值组合，此时用按月粒度以减少返回的数据量。
+        
+        Returns:
+            (本次分组的键, [(时间段开始, 分组取值, BlendedCost, UsageQuantity)], 请求页数)
+        """
+        if len(remaining) <= 2:
+            head = remaining
+        else:
+            head = remaining[:min(2, len(remaining) - 2)]
+            granularity = 'MONTHLY'
+        
+        params = {
+            'TimePeriod': {
+                'Start': start_date.strftime('%Y-%m-%d'),
+                'End': end_date.strftime('%Y-%m-%d')
+            },
+            'Granularity': granularity,
+            'Metrics': ['BlendedCost', 'UsageQuantity'],
+            'GroupBy': [self._group_by(key) for key in head]
+        }
+        if len(filters) == 1:
+            params['Filter'] = filters[0]
+        elif filters:
+            params['Filter'] = {'And': filters}
+        
+        results = []
+        pages = 0
+        for page in self.iter_cost_and_usage(**params):
+            pages += 1
+            for result in page.get('ResultsByTime', []):
+                period_start = result.get('TimePeriod', {}).get('Start')
+                for group in result.get('Groups', []):
+                    values = tuple(
+                        # 标签分组键的格式为 "<标签键>$<标签值>"
+                        value.split('$', 1)[1] if key.startswith('TAG:') and '$' in value else value
+                        for key, value in zip(head, group.get('Keys', []))
+                    )
+                    group_metrics = group.get('Metrics', {})
+                    results.append((
+                        period_start,
+                        values,
+                        float(group_metrics.get('BlendedCost', {}).get('Amount', 0)),
+                        float(group_metrics.get('UsageQuantity', {}).get('Amount', 0))
+                    ))
+        
+        return head, results, pages
+    
+    @staticmethod
+    def _filter_expression(key: str, values: List[str]) -> Dict:
+        """构建单个维度或标签的过滤表达式，空标签值表示未打该标签"""
+        if key.startswith('TAG:'):
+            tag_key = key[len('TAG:'):]
+            if values == ['']:
+                return {'Tags': {'Key': tag_key, 'MatchOptions': ['ABSENT']}}
+            return {'Tags': {'Key': tag_key, 'Values': values}}
+        return {'Dimensions': {'Key': key, 'Values': values}}
+    
+    def _format_period(self, period_start: str, groups: Dict) -> Dict:
+        """格式化单个时间段的成本数据"""
         return {
-            'services': [{'name': name, 'cost': cost} for name, cost in sorted_services],
-            'total_cost': total_cost
+            'date': period_start,
+            'services': [{'service': key, 'cost': cost} for key, (cost, _) in groups.items()],
+            'total': sum(cost for cost, _ in groups.values())
         }
     
-    def _format_tag_costs(self, response: Dict, tag_key: str) -> Dict:
-        """格式化标签成本数据"""
-        tag_costs = {}
-        total_cost = 0.0
+    def _format_cost_response(self, cube: CostCube) -> Dict:
+        """格式化成本响应数据"""
+        totals = cube.period_totals().tolist()
+        costs = cube.cost.tolist()
+        present = cube.present.tolist()
         
-        for result in response.get('ResultsByTime', []):
-            for group in result.get('Groups', []):
-                tag_value = group.get('Keys', ['Untagged'])[0]
-                cost = float(group.get('Metrics', {}).get('BlendedCost', {}).get('Amount', 0))
-                
-                if tag_value not in tag_costs:
-                    tag_costs[tag_value] = 0.0
-                
-                tag_costs[tag_value] += cost
-                total_cost += cost
+        return {
+            'time_period': {
+                'start': cube.periods[0][0] if cube.periods else None,
+                'end': cube.periods[-1][1] if cube.periods else None
+            },
+            'daily_costs': [
+                {
+                    'date': period_start,
+                    'services': [
+                        {'service': key, 'cost': cost}
+                        for key, cost, has_data in zip(cube.keys, costs[i], present[i])
+                        if has_data
+                    ],
+                    'total': totals[i]
+                }
+                for i, (period_start, _) in enumerate(cube.periods)
+            ],
+            'total_cost': cube.total()
+        }
+    
+    def _format_service_costs(self, cube: CostCube, top: Optional[int] = None) -> Dict:
+        """格式化服务成本数据"""
+        totals = cube.key_totals()
+        order = cube.top_keys(top)
         
+        return {
+            'services': [
+                {'name': cube.keys[i], 'cost': cost}
+                for i, cost in zip(order.tolist(), totals[order].tolist())
+            ],
+            'total_cost': cube.total()
+        }
+    
+    def _format_tag_costs(self, cube: CostCube, tag_key: str) -> Dict:
+        """格式化标签成本数据"""
         return {
             'tag_key': tag_key,
-            'tag_costs': [{'tag_value': value, 'cost': cost} for value, cost in tag_costs.items()],
-            'total_cost': total_cost
+            'tag_costs': [
+                {'tag_value': value, 'cost': cost}
+                for value, cost in zip(cube.keys, cube.key_totals().tolist())
+            ],
+            'total_cost': cube.total()
         }
     
     def _format_forecast_response(self, response: Dict) -> Dict:
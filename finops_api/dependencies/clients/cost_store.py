@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+本地成本数据仓库
+基于SQLite保存按维度分组的每日成本，已结算的日期无需再次查询Cost Explorer
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Tuple
+import logging
+
+
+class CostStore:
+    """按 (维度, 日期, 分组键) 存储的每日成本仓库"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS daily_costs (
+        dimension TEXT NOT NULL,
+        date TEXT NOT NULL,
+        key TEXT NOT NULL,
+        blended_cost REAL NOT NULL,
+        usage_quantity REAL NOT NULL,
+        PRIMARY KEY (dimension, date, key)
+    );
+    CREATE TABLE IF NOT EXISTS synced_days (
+        dimension TEXT NOT NULL,
+        date TEXT NOT NULL,
+        synced_at TEXT NOT NULL,
+        PRIMARY KEY (dimension, date)
+    );
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化成本仓库
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作使用独立连接，便于在线程池中并发读取"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stale_dates(self, dimension: str, start_date: date, end_date: date,
+                    settle_days: int, resync_after: int) -> List[date]:
+        """
+        获取需要(重新)同步的日期
+
+        从未同步过的日期需要同步；最近 settle_days 天内的数据尚未结算，
+        上次同步超过 resync_after 秒后需要重新同步。
+
+        Args:
+            dimension: 分组维度
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+            settle_days: 未结算天数
+            resync_after: 未结算日期的重新同步间隔(秒)
+
+        Returns:
+            需要同步的日期列表(升序)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, synced_at FROM synced_days WHERE dimension = ? AND date >= ? AND date < ?",
+                (dimension, start_date.isoformat(), end_date.isoformat())
+            ).fetchall()
+        synced = {row[0]: datetime.fromisoformat(row[1]) for row in rows}
+
+        now = datetime.now()
+        settled_before = now.date() - timedelta(days=settle_days)
+        stale = []
+        current = start_date
+        while current < end_date:
+            synced_at = synced.get(current.isoformat())
+            if synced_at is None:
+                stale.append(current)
+            elif current >= settled_before and (now - synced_at).total_seconds() > resync_after:
+                stale.append(current)
+            current += timedelta(days=1)
+        return stale
+
+    def replace_days(self, dimension: str, start_date: date, end_date: date,
+                     rows: Iterable[Tuple[str, str, float, float]]):
+        """
+        覆盖写入一个日期区间的数据
+
+        区间内原有的数据先删除再写入，保证某天消失的分组不会残留。
+
+        Args:
+            dimension: 分组维度
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+            rows: (日期, 分组键, BlendedCost, UsageQuantity) 行
+        """
+        start, end = start_date.isoformat(), end_date.isoformat()
+        synced_at = datetime.now().isoformat()
+        days = []
+        current = start_date
+        while current < end_date:
+            days.append((dimension, current.isoformat(), synced_at))
+            current += timedelta(days=1)
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "DELETE FROM daily_costs WHERE dimension = ? AND date >= ? AND date < ?",
+                (dimension, start, end)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_costs VALUES (?, ?, ?, ?, ?)",
+                ((dimension, day, key, cost, usage) for day, key, cost, usage in rows)
+            )
+            conn.executemany("INSERT OR REPLACE INTO synced_days VALUES (?, ?, ?)", days)
+
+    def iter_rows(self, dimension: str, start_date: date, end_date: date) -> Iterator[Tuple[str, str, float, float]]:
+        """
+        逐行读取一个日期区间的数据
+
+        Args:
+            dimension: 分组维度
+            start_date: 开始日期(包含)
+            end_date: 结束日期(不包含)
+
+        Returns:
+            按日期排序的 (日期, 分组键, BlendedCost, UsageQuantity) 行迭代器
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT date, key, blended_cost, usage_quantity FROM daily_costs "
+                "WHERE dimension = ? AND date >= ? AND date < ? ORDER BY date, key",
+                (dimension, start_date.isoformat(), end_date.isoformat())
+            )
+            yield from cursor
+
+    def stats(self) -> Dict:
+        """获取仓库统计信息"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT dimension, COUNT(*), MIN(date), MAX(date) FROM synced_days GROUP BY dimension"
+            ).fetchall()
+        return {
+            dimension: {'synced_days': count, 'first_date': first, 'last_date': last}
+            for dimension, count, first, last in rows
+        }
+
+
+def contiguous_ranges(dates: List[date]) -> List[Tuple[date, date]]:
+    """
+    将升序日期列表合并为连续区间
+
+    Returns:
+        [(开始日期, 结束日期(不包含))]
+    """
+    ranges = []
+    for day in dates:
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+    return ranges
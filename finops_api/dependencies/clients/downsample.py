@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+时间序列降采样
+在服务端将长时间窗口的数据点压缩到固定数量，保持曲线形状的同时限制响应大小
+"""
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'lttb') -> np.ndarray:
+    """
+    选出降采样后保留的数据点下标
+
+    Args:
+        x: 时间(数值，升序)
+        y: 数值
+        max_points: 最多保留的数据点数
+        method: lttb (Largest-Triangle-Three-Buckets) 或 minmax (每个分桶保留最小值和最大值)
+
+    Returns:
+        保留的数据点下标(升序)
+    """
+    if method not in METHODS:
+        raise ValueError(f"不支持的降采样方法: {method}")
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    if method == 'lttb':
+        return lttb(x, y, max_points)
+    return minmax(y, max_points)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+
+    首尾两点固定保留，中间的点均分为 threshold-2 个分桶，每个分桶保留与
+    上一个保留点、下一个分桶均值构成三角形面积最大的点。各分桶均值一次性计算，
+    桶内面积按数组计算。
+
+    Args:
+        x: 时间(数值，升序)
+        y: 数值
+        threshold: 保留的数据点数，至少为3
+
+    Returns:
+        保留的数据点下标
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # 第i个分桶的第三个顶点为下一个分桶的均值，最后一个分桶为末尾的点
+    next_x = np.append(mean_x[1:], x[n - 1])
+    next_y = np.append(mean_y[1:], y[n - 1])
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        area = np.abs(
+            (x[previous] - next_x[bucket]) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y[bucket] - y[previous])
+        )
+        previous = lo + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    最小值/最大值分桶降采样
+
+    数据点均分为 max_points/2 个分桶，每个分桶保留最小值和最大值两个点，
+    保证峰值不会被平滑掉。
+
+    Args:
+        y: 数值
+        max_points: 最多保留的数据点数，至少为2
+
+    Returns:
+        保留的数据点下标
+    """
+    n = len(y)
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(rows, size)
+    offsets = np.arange(rows) * size
+    lows = offsets + np.nanargmin(padded, axis=1)
+    highs = offsets + np.nanargmax(padded, axis=1)
+    return np.unique(np.concatenate([lows, highs]))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+AWS客户端异步执行层
+boto3是同步库，直接在async路由中调用会阻塞事件循环。
+这里为每个AWS服务维护一个有界线程池，把同步调用放到线程池中执行。
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import logging
+
+
+class ServiceExecutor:
+    """按AWS服务划分的有界线程池集合"""
+
+    def __init__(self, max_workers: int = 8):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 每个服务线程池的最大线程数
+        """
+        self.max_workers = max_workers
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get_pool(self, service: str) -> ThreadPoolExecutor:
+        """获取(必要时创建)指定服务的线程池"""
+        with self._lock:
+            pool = self._pools.get(service)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"aws-{service}"
+                )
+                self._pools[service] = pool
+            return pool
+
+    async def run(self, service: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        在服务线程池中执行同步函数并等待结果
+
+        Args:
+            service: 服务名称，决定使用哪个线程池
+            func: 同步函数
+            *args, **kwargs: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get_pool(service),
+            functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = False):
+        """关闭所有线程池"""
+        with self._lock:
+            pools = list(self._pools.items())
+            self._pools.clear()
+
+        for service, pool in pools:
+            self.logger.info(f"关闭 {service} 线程池")
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class AsyncClient:
+    """
+    同步客户端的异步代理
+
+    对被代理客户端的公共方法调用会返回协程，在对应服务的线程池中执行，
+    因此路由中可以直接 `await client.get_daily_costs(...)`。
+    """
+
+    def __init__(self, client: Any, service: str, executor: ServiceExecutor):
+        """
+        初始化异步代理
+
+        Args:
+            client: 同步客户端实例
+            service: 服务名称
+            executor: 服务执行器
+        """
+        self.client = client
+        self.service = service
+        self.executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.executor.run(self.service, attr, *args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+闲置资源检测
+将资源清单与CloudWatch指标关联：资源按区域分组后分批批量获取指标(指标位于资源所在区域)，
+每处理完一批即输出其中低于阈值的资源，AWS调用次数随批次数而不是资源数增长
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from config import Config
+from .cloudwatch_client import CloudWatchClient
+from .metric_data import MetricDataEngine
+from .resource_inventory_client import ResourceInventoryClient
+
+RESOURCE_TYPES = ('ec2', 'rds', 'lambda')
+
+
+class IdleResourceDetector:
+    """基于资源清单和监控指标的闲置资源检测"""
+
+    def __init__(self, inventory: ResourceInventoryClient, cloudwatch: CloudWatchClient):
+        """
+        初始化闲置资源检测
+
+        Args:
+            inventory: 资源清单客户端
+            cloudwatch: CloudWatch客户端
+        """
+        self.inventory = inventory
+        self.cloudwatch = cloudwatch
+        self.logger = logging.getLogger(__name__)
+
+    def iter_idle_resources(self, resource_types: Optional[List[str]] = None,
+                            hours: int = Config.IDLE_LOOKBACK_HOURS,
+                            cpu_percent: float = Config.IDLE_CPU_PERCENT,
+                            network_mb_per_day: float = Config.IDLE_NETWORK_MB_PER_DAY,
+                            rds_connections: float = Config.IDLE_RDS_CONNECTIONS,
+                            lambda_invocations: float = Config.IDLE_LAMBDA_INVOCATIONS) -> Iterator[Dict]:
+        """
+        逐个生成闲置资源，用于流式响应
+
+        判定规则:
+            ec2: 运行中，平均CPU使用率低于 cpu_percent 且日均网络流量低于 network_mb_per_day
+            rds: 可用状态，最大连接数低于 rds_connections
+            lambda: 调用次数合计低于 lambda_invocations (没有数据点视为未被调用)
+        没有指标数据的EC2和RDS实例无法判定，不会输出。
+
+        Args:
+            resource_types: 检测的资源类型，默认全部 (ec2, rds, lambda)
+            hours: 统计过去多少小时的指标
+            cpu_percent: EC2平均CPU使用率阈值(%)
+            network_mb_per_day: EC2日均网络流量(入+出)阈值(MB)
+            rds_connections: RDS最大连接数阈值
+            lambda_invocations: Lambda调用次数阈值
+
+        Returns:
+            每个闲置资源一条记录的迭代器
+        """
+        resource_types = resource_types or list(RESOURCE_TYPES)
+        unsupported = [resource_type for resource_type in resource_types if resource_type not in RESOURCE_TYPES]
+        if unsupported:
+            raise ValueError(f"不支持的资源类型: {', '.join(unsupported)}")
+
+        days = hours / 24
+        rules = {
+            'ec2': lambda stats: self._ec2_reasons(stats, cpu_percent, network_mb_per_day, days),
+            'rds': lambda stats: self._rds_reasons(stats, rds_connections),
+            'lambda': lambda stats: self._lambda_reasons(stats, lambda_invocations)
+        }
+        return self._iter_idle(resource_types, hours, rules)
+
+    def _iter_idle(self, resource_types: List[str], hours: int,
+                   rules: Dict[str, Callable[[Dict], Optional[List[str]]]]) -> Iterator[Dict]:
+        """按资源类型、区域、批次依次获取指标并输出闲置资源"""
+        try:
+            for resource_type in resource_types:
+                namespace, dimension_name, metrics, resources = self._resources(resource_type)
+                batch_size = max(1, MetricDataEngine.MAX_QUERIES_PER_CALL // len(metrics))
+
+                by_region: Dict[str, List[Tuple[str, Dict]]] = {}
+                for region, resource_id, details in resources:
+                    by_region.setdefault(region, []).append((resource_id, details))
+
+                for region, region_resources in sorted(by_region.items()):
+                    for offset in range(0, len(region_resources), batch_size):
+                        batch = region_resources[offset:offset + batch_size]
+                        utilization = self.cloudwatch.get_resource_utilization(
+                            namespace, dimension_name, [resource_id for resource_id, _ in batch], metrics, hours,
+                            region=region
+                        )
+                        for (resource_id, details), stats in zip(batch, utilization):
+                            reasons = rules[resource_type](stats)
+                            if reasons:
+                                yield {
+                                    'resource_type': resource_type,
+                                    'resource_id': resource_id,
+                                    'region': region,
+                                    'details': details,
+                                    'metrics': stats,
+                                    'reasons': reasons
+                                }
+
+        except Exception as e:
+            self.logger.error(f"检测闲置资源失败: {str(e)}")
+            raise
+
+    def _resources(self, resource_type: str):
+        """
+        获取待检测的资源(清单中所有区域的资源)
+
+        Returns:
+            (指标命名空间, 维度名称, {指标名称: 统计方式}, [(区域, 资源ID, 资源信息)])
+        """
+        if resource_type == 'ec2':
+            instances = self.inventory.get_ec2_inventory()['instances']
+            return 'AWS/EC2', 'InstanceId', {
+                'CPUUtilization': 'Average',
+                'NetworkIn': 'Sum',
+                'NetworkOut': 'Sum'
+            }, [
+                (instance['region'], instance['instance_id'], {
+                    'instance_type': instance['instance_type'],
+                    'availability_zone': instance['availability_zone'],
+                    'launch_time': instance['launch_time'],
+                    'tags': instance['tags']
+                })
+                for instance in instances if instance['state'] == 'running'
+            ]
+
+        if resource_type == 'rds':
+            instances = self.inventory.get_rds_inventory()['instances']
+            return 'AWS/RDS', 'DBInstanceIdentifier', {
+                'DatabaseConnections': 'Maximum',
+                'CPUUtilization': 'Average'
+            }, [
+                (instance['region'], instance['db_instance_identifier'], {
+                    'db_instance_class': instance['db_instance_class'],
+                    'engine': instance['engine'],
+                    'multi_az': instance['multi_az'],
+                    'allocated_storage': instance['allocated_storage']
+                })
+                for instance in instances if instance['db_instance_status'] == 'available'
+            ]
+
+        functions = self.inventory.get_lambda_inventory()['functions']
+        return 'AWS/Lambda', 'FunctionName', {
+            'Invocations': 'Sum'
+        }, [
+            (function['region'], function['function_name'], {
+                'runtime': function['runtime'],
+                'memory_size': function['memory_size'],
+                'last_modified': function['last_modified']
+            })
+            for function in functions
+        ]
+
+    @staticmethod
+    def _ec2_reasons(stats: Dict, cpu_percent: float, network_mb_per_day: float, days: float) -> Optional[List[str]]:
+        """EC2实例的闲置原因，不闲置或无法判定时返回None"""
+        cpu = stats['CPUUtilization']['average']
+        if cpu is None or cpu >= cpu_percent:
+            return None
+        network_mb = (stats['NetworkIn']['total'] + stats['NetworkOut']['total']) / (1024 * 1024) / days
+        if network_mb >= network_mb_per_day:
+            return None
+        return [
+            f"平均CPU使用率 {cpu:.2f}% 低于 {cpu_percent:g}%",
+            f"日均网络流量 {network_mb:.2f}MB 低于 {network_mb_per_day:g}MB"
+        ]
+
+    @staticmethod
+    def _rds_reasons(stats: Dict, rds_connections: float) -> Optional[List[str]]:
+        """RDS实例的闲置原因，不闲置或无法判定时返回None"""
+        connections = stats['DatabaseConnections']['maximum']
+        if connections is None or connections >= rds_connections:
+            return None
+        return [f"最大连接数 {connections:g} 低于 {rds_connections:g}"]
+
+    @staticmethod
+    def _lambda_reasons(stats: Dict, lambda_invocations: float) -> Optional[List[str]]:
+        """Lambda函数的闲置原因，不闲置时返回None"""
+        invocations = stats['Invocations']['total']
+        if invocations >= lambda_invocations:
+            return None
+        return [f"调用次数 {invocations:g} 低于 {lambda_invocations:g}"]
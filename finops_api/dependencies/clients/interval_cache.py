@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+按日期区间缓存的成本矩阵
+同一维度的按日数据按区间分段缓存，查询任意日期范围时只需获取未缓存的子区间，
+其余部分直接从缓存拼接
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .cost_cube import CostCube
+
+
+class _Segment:
+    """一段连续日期的按日成本矩阵"""
+
+    __slots__ = ('start', 'end', 'cube', 'expires_at', 'used_at')
+
+    def __init__(self, start: date, end: date, cube: CostCube, expires_at: Optional[float],
+                 used_at: Optional[float] = None):
+        self.start = start
+        self.end = end
+        self.cube = cube
+        self.expires_at = expires_at
+        self.used_at = time.monotonic() if used_at is None else used_at
+
+    def trim(self, start: date, end: date) -> Optional['_Segment']:
+        """截取与 [start, end) 的交集，没有交集时返回None"""
+        start, end = max(self.start, start), min(self.end, end)
+        if start >= end:
+            return None
+        if (start, end) == (self.start, self.end):
+            return self
+        return _Segment(start, end, self.cube.slice(start.isoformat(), end.isoformat()), self.expires_at, self.used_at)
+
+
+class IntervalCache:
+    """按 (键, 日期区间) 分段缓存按日成本矩阵"""
+
+    def __init__(self, maxsize: int = 64, ttl: int = 300, settle_days: int = 3, max_segments: int = 512):
+        """
+        初始化区间缓存
+
+        已结算日期的数据不会再变化，缓存后不过期(只受LRU淘汰)；
+        最近 settle_days 天的数据在 ttl 秒后过期。
+
+        Args:
+            maxsize: 最多缓存的键(维度)数，超出时淘汰最久未使用的键
+            ttl: 未结算日期的过期时间(秒)
+            settle_days: 未结算天数
+            max_segments: 所有键最多缓存的区间数，超出时淘汰最久未使用的区间
+        """
+        self.maxsize = maxsize
+        self.max_segments = max_segments
+        self.ttl = ttl
+        self.settle_days = settle_days
+        self._data: "OrderedDict[Hashable, List[_Segment]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.cached_days_served = 0
+        self.fetched_days = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable, start: date, end: date) -> Tuple[List[Tuple[date, CostCube]], List[Tuple[date, date]]]:
+        """
+        查询日期区间的缓存情况
+
+        Args:
+            key: 缓存键(维度)
+            start: 开始日期(包含)
+            end: 结束日期(不包含)
+
+        Returns:
+            (已缓存的部分 [(开始日期, 成本矩阵)], 缺失的子区间 [(开始日期, 结束日期)])
+        """
+        with self._lock:
+            segments = self._valid_segments(key)
+            if segments is not None:
+                self._data.move_to_end(key)
+
+            pieces = []
+            missing = []
+            current = start
+            now = time.monotonic()
+            for segment in segments or []:
+                part = segment.trim(start, end)
+                if part is None:
+                    continue
+                segment.used_at = now
+                if part.start > current:
+                    missing.append((current, part.start))
+                pieces.append((part.start, part.cube))
+                current = part.end
+            if current < end:
+                missing.append((current, end))
+
+            cached_days = sum(len(cube.periods) for _, cube in pieces)
+            self.cached_days_served += cached_days
+            if not missing:
+                self.hits += 1
+            elif pieces:
+                self.partial_hits += 1
+            else:
+                self.misses += 1
+            return pieces, missing
+
+    def put(self, key: Hashable, start: date, end: date, cube: CostCube):
+        """
+        写入一个日期区间的按日成本矩阵
+
+        与已缓存区间重叠的部分以新数据为准。
+
+        Args:
+            key: 缓存键(维度)
+            start: 开始日期(包含)
+            end: 结束日期(不包含)
+            cube: 覆盖 [start, end) 的按日成本矩阵
+        """
+        settled_before = date.today() - timedelta(days=self.settle_days)
+        expires_at = time.monotonic() + self.ttl
+        new_segments = [
+            segment for segment in (
+                _Segment(start, end, cube, None).trim(start, settled_before),
+                _Segment(start, end, cube, expires_at).trim(settled_before, end)
+            )
+            if segment is not None
+        ]
+
+        with self._lock:
+            self.fetched_days += (end - start).days
+            segments = []
+            for segment in self._valid_segments(key) or []:
+                # 保留旧区间中与新区间不重叠的部分
+                segments.extend(
+                    part for part in (segment.trim(segment.start, start), segment.trim(end, segment.end))
+                    if part is not None
+                )
+            segments.extend(new_segments)
+            self._data[key] = self._merge(sorted(segments, key=lambda segment: segment.start))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                _, segments = self._data.popitem(last=False)
+                self.evictions += len(segments)
+            self._evict_segments()
+
+    def _valid_segments(self, key: Hashable) -> Optional[List[_Segment]]:
+        """获取未过期的区间，同时清理已过期的区间"""
+        segments = self._data.get(key)
+        if segments is None:
+            return None
+        now = time.monotonic()
+        valid = [segment for segment in segments if segment.expires_at is None or segment.expires_at > now]
+        if len(valid) != len(segments):
+            self._data[key] = valid
+        return valid
+
+    def _evict_segments(self):
+        """区间总数超出上限时淘汰最久未使用的区间，区间全部被淘汰的键一并删除"""
+        excess = sum(len(segments) for segments in self._data.values()) - self.max_segments
+        if excess <= 0:
+            return
+        oldest = sorted(
+            ((key, segment) for key, segments in self._data.items() for segment in segments),
+            key=lambda item: item[1].used_at
+        )[:excess]
+        evicted = {id(segment) for _, segment in oldest}
+        for key in {key for key, _ in oldest}:
+            remaining = [segment for segment in self._data[key] if id(segment) not in evicted]
+            if remaining:
+                self._data[key] = remaining
+            else:
+                del self._data[key]
+        self.evictions += excess
+
+    @staticmethod
+    def _merge(segments: List[_Segment]) -> List[_Segment]:
+        """合并相邻的已结算区间，避免区间碎片化"""
+        merged: List[_Segment] = []
+        for segment in segments:
+            previous = merged[-1] if merged else None
+            if (previous is not None and previous.end == segment.start
+                    and previous.expires_at is None and segment.expires_at is None):
+                merged[-1] = _Segment(previous.start, segment.end,
+                                      CostCube.concat([previous.cube, segment.cube]), None,
+                                      max(previous.used_at, segment.used_at))
+            else:
+                merged.append(segment)
+        return merged
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'keys': len(self._data),
+                'maxsize': self.maxsize,
+                'segments': sum(len(segments) for segments in self._data.values()),
+                'max_segments': self.max_segments,
+                'cached_days': sum(
+                    (segment.end - segment.start).days
+                    for segments in self._data.values() for segment in segments
+                ),
+                'hits': self.hits,
+                'partial_hits': self.partial_hits,
+                'misses': self.misses,
+                'cached_days_served': self.cached_days_served,
+                'fetched_days': self.fetched_days,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+资源清单索引
+基于资源清单客户端的结果在内存中建立倒排索引(字段值 -> 位图)，过滤条件通过位运算组合，
+分面统计只需对位图计数，查询时无需逐条遍历资源
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .resource_inventory_client import ResourceInventoryClient
+
+# 各资源类型的资源ID字段和索引字段 {索引字段: 记录字段}
+INDEXED_TYPES = {
+    'ec2': ('instance_id', {
+        'state': 'state',
+        'instance_type': 'instance_type',
+        'availability_zone': 'availability_zone'
+    }),
+    'rds': ('db_instance_identifier', {
+        'state': 'db_instance_status',
+        'instance_type': 'db_instance_class',
+        'availability_zone': 'availability_zone',
+        'engine': 'engine'
+    }),
+    'lambda': ('function_name', {
+        'runtime': 'runtime'
+    })
+}
+
+# 可过滤和分面的字段，另外支持 tag:<标签键>
+INDEXED_FIELDS = ('resource_type', 'region', 'state', 'instance_type', 'availability_zone', 'engine', 'runtime')
+DEFAULT_FACETS = ['resource_type', 'region', 'state', 'instance_type']
+
+# 匹配的资源较多且字段的取值都保存为位图时，分面统计对位图计数，否则对匹配资源的取值编码计数
+SMALL_RESULT = 2048
+# 每个分面最多返回的取值数(按资源数降序)
+FACET_LIMIT = 50
+
+
+class _Field:
+    """一个字段的索引: 取值编码数组和每个取值的资源集合"""
+
+    def __init__(self, size: int, labels: List[str], codes: List[int]):
+        self.labels = labels
+        # 第i个资源的取值编码，-1表示没有该字段
+        self.codes = np.array(codes, dtype=np.int32)
+        present = np.flatnonzero(self.codes >= 0)
+        self.counts = np.bincount(self.codes[present], minlength=len(labels))
+
+        # 资源较多的取值保存为整数位图，少量资源的取值(如 tag:Name)保存为位置数组，
+        # 避免为每个取值分配完整的位图
+        order = present[np.argsort(self.codes[present], kind='stable')]
+        bounds = np.concatenate(([0], np.cumsum(self.counts)))
+        dense = max(1, size // 64)
+        self.postings: Dict[str, Union[int, np.ndarray]] = {}
+        for code, label in enumerate(labels):
+            positions = order[bounds[code]:bounds[code + 1]]
+            self.postings[label] = _bitmap(size, positions) if len(positions) >= dense else positions
+        self.present = _bitmap(size, present)
+        self.dense = all(isinstance(posting, int) for posting in self.postings.values())
+
+
+class _Snapshot:
+    """一次构建的索引，构建后只读"""
+
+    def __init__(self, sources: Tuple, documents: List[Tuple[str, str, Dict]], fields: Dict[str, _Field]):
+        self.sources = sources
+        self.documents = documents
+        self.fields = fields
+        self.size = len(documents)
+        self.all = (1 << self.size) - 1
+        self.built_at = datetime.now().isoformat()
+
+    def document(self, position: int) -> Dict:
+        """第i个资源的记录，添加 resource_type 和 resource_id"""
+        resource_type, id_field, resource = self.documents[position]
+        return {'resource_type': resource_type, 'resource_id': resource[id_field], **resource}
+
+
+class _Result:
+    """一次查询匹配的资源位图，按需展开为布尔数组和位置数组"""
+
+    def __init__(self, snapshot: _Snapshot, bitmap: int):
+        self.snapshot = snapshot
+        self.bitmap = bitmap
+        self.total = bitmap.bit_count()
+        self._mask: Optional[np.ndarray] = None
+        self._positions: Optional[np.ndarray] = None
+
+    def mask(self) -> np.ndarray:
+        """第i个元素表示第i个资源是否匹配"""
+        if self._mask is None:
+            data = np.frombuffer(self.bitmap.to_bytes((self.snapshot.size + 7) // 8, 'little'), dtype=np.uint8)
+            self._mask = np.unpackbits(data, count=self.snapshot.size, bitorder='little').view(bool)
+        return self._mask
+
+    def positions(self) -> np.ndarray:
+        """匹配的资源位置，升序"""
+        if self._positions is None:
+            self._positions = np.flatnonzero(self.mask())
+        return self._positions
+
+
+def _bitmap(size: int, positions) -> int:
+    """由资源位置生成位图(第i位为1表示包含第i个资源)"""
+    bits = np.zeros(size, dtype=bool)
+    bits[positions] = True
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+class InventoryIndex:
+    """资源清单的内存倒排索引"""
+
+    def __init__(self, inventory: ResourceInventoryClient):
+        """
+        初始化资源清单索引
+
+        Args:
+            inventory: 资源清单客户端
+        """
+        self.inventory = inventory
+        self.logger = logging.getLogger(__name__)
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def search(self, filters: Optional[Dict[str, List[str]]] = None,
+               excludes: Optional[Dict[str, List[str]]] = None,
+               facets: Optional[List[str]] = None, limit: int = 100, offset: int = 0) -> Dict:
+        """
+        按过滤条件查询资源并统计分面
+
+        同一字段的多个值为或，不同字段之间为与；值为 * 表示该字段有任意值(如 tag:env=*)。
+        每个分面最多返回资源数最多的 FACET_LIMIT 个取值。
+
+        Args:
+            filters: 必须匹配的条件 {字段: [值]}
+            excludes: 必须不匹配的条件 {字段: [值]}
+            facets: 统计分面的字段，默认 resource_type、region、state、instance_type
+            limit: 返回的最大资源数
+            offset: 跳过的资源数
+
+        Returns:
+            匹配的资源数、当前页的资源及各分面的 {值: 资源数}
+        """
+        filters = filters or {}
+        excludes = excludes or {}
+        facets = facets or DEFAULT_FACETS
+        unsupported = [
+            field for field in list(filters) + list(excludes) + facets
+            if field not in INDEXED_FIELDS and not field.startswith('tag:')
+        ]
+        if unsupported:
+            raise ValueError(
+                f"不支持的字段: {', '.join(unsupported)}，可用字段: {', '.join(INDEXED_FIELDS)} 或 tag:<标签键>"
+            )
+
+        try:
+            snapshot = self._refresh()
+            started = time.perf_counter()
+
+            result = snapshot.all
+            for field, values in filters.items():
+                result &= self._match(snapshot, field, values)
+            for field, values in excludes.items():
+                result &= ~self._match(snapshot, field, values)
+            query = _Result(snapshot, result)
+            resources = []
+            if query.total and limit:
+                resources = [snapshot.document(position) for position in query.positions()[offset:offset + limit]]
+
+            return {
+                'total': query.total,
+                'offset': offset,
+                'limit': limit,
+                'resources': resources,
+                'facets': {field: self._facet(query, field) for field in facets},
+                'indexed_resources': snapshot.size,
+                'indexed_at': snapshot.built_at,
+                'took_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
+
+        except Exception as e:
+            self.logger.error(f"查询资源清单索引失败: {str(e)}")
+            raise
+
+    def _refresh(self) -> _Snapshot:
+        """清单缓存更新后重新构建索引，未变化时复用当前索引"""
+        sources = (
+            self.inventory.get_ec2_inventory(),
+            self.inventory.get_rds_inventory(),
+            self.inventory.get_lambda_inventory()
+        )
+        snapshot = self._snapshot
+        if snapshot is not None and all(new is old for new, old in zip(sources, snapshot.sources)):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or not all(new is old for new, old in zip(sources, snapshot.sources)):
+                snapshot = self._build(sources)
+                self._snapshot = snapshot
+            return snapshot
+
+    def _build(self, sources: Tuple) -> _Snapshot:
+        """构建索引: 逐个资源为各字段的取值编码，再按编码分组得到每个取值的资源集合"""
+        started = time.perf_counter()
+        records = zip(('ec2', 'rds', 'lambda'), (
+            sources[0]['instances'],
+            sources[1]['instances'],
+            sources[2]['functions']
+        ))
+        size = len(sources[0]['instances']) + len(sources[1]['instances']) + len(sources[2]['functions'])
+
+        documents: List[Tuple[str, str, Dict]] = []
+        labels: Dict[str, Dict[str, int]] = {}
+        codes: Dict[str, List[int]] = {}
+
+        def encode(field: str, value: str, position: int):
+            field_labels = labels.get(field)
+            if field_labels is None:
+                field_labels = labels[field] = {}
+                codes[field] = [-1] * size
+            code = field_labels.get(value)
+            if code is None:
+                code = field_labels[value] = len(field_labels)
+            codes[field][position] = code
+
+        for resource_type, resources in records:
+            id_field, fields = INDEXED_TYPES[resource_type]
+            for resource in resources:
+                position = len(documents)
+                documents.append((resource_type, id_field, resource))
+                encode('resource_type', resource_type, position)
+                encode('region', resource['region'], position)
+                for field, record_field in fields.items():
+                    value = resource.get(record_field)
+                    if value is not None:
+                        encode(field, value, position)
+                for key, value in resource.get('tags', {}).items():
+                    encode(f'tag:{key}', value, position)
+
+        indexed = {field: _Field(size, list(labels[field]), codes[field]) for field in labels}
+        self.builds += 1
+        self.logger.info(f"资源清单索引构建完成: {size} 个资源，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        return _Snapshot(sources, documents, indexed)
+
+    @staticmethod
+    def _match(snapshot: _Snapshot, field: str, values: List[str]) -> int:
+        """字段取任一给定值的资源位图"""
+        index = snapshot.fields.get(field)
+        if index is None:
+            return 0
+        if '*' in values:
+            return index.present
+        bitmap = 0
+        sparse = []
+        for value in values:
+            posting = index.postings.get(value)
+            if isinstance(posting, int):
+                bitmap |= posting
+            elif posting is not None:
+                sparse.append(posting)
+        if sparse:
+            bitmap |= _bitmap(snapshot.size, np.concatenate(sparse))
+        return bitmap
+
+    @staticmethod
+    def _facet(query: _Result, field: str) -> Dict[str, int]:
+        """统计匹配的资源在字段各取值上的数量，按数量降序"""
+        index = query.snapshot.fields.get(field)
+        if index is None or not query.total:
+            return {}
+        if query.total == query.snapshot.size:
+            counts = index.counts
+        elif index.dense and query.total > SMALL_RESULT:
+            counts = np.array([(posting & query.bitmap).bit_count() for posting in index.postings.values()])
+        else:
+            matched = index.codes[query.positions()]
+            counts = np.bincount(matched[matched >= 0], minlength=len(index.labels))
+
+        top = np.flatnonzero(counts)
+        if len(top) > FACET_LIMIT:
+            top = top[np.argpartition(-counts[top], FACET_LIMIT)[:FACET_LIMIT]]
+        top = top[np.argsort(-counts[top], kind='stable')]
+        return {index.labels[code]: int(counts[code]) for code in top}
+
+    def stats(self) -> Dict:
+        """获取索引统计信息"""
+        snapshot = self._snapshot
+        return {
+            'resources': snapshot.size if snapshot else 0,
+            'fields': len(snapshot.fields) if snapshot else 0,
+            'built_at': snapshot.built_at if snapshot else None,
+            'builds': self.builds
+        }
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+本地资源清单仓库
+基于SQLite保存不会变化的资源属性(如存储桶所在区域)，重启后无需再次查询；
+并保存带版本号的资源清单快照，每次获取的清单与上一版本比较，只记录新增、删除和修改的资源
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+
+class InventoryStore:
+    """资源清单仓库"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bucket_regions (
+        bucket TEXT NOT NULL,
+        creation_date TEXT NOT NULL,
+        region TEXT NOT NULL,
+        resolved_at TEXT NOT NULL,
+        PRIMARY KEY (bucket)
+    );
+    CREATE TABLE IF NOT EXISTS inventory_resources (
+        resource_type TEXT NOT NULL,
+        region TEXT NOT NULL,
+        resource_id TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (resource_type, region, resource_id)
+    );
+    CREATE TABLE IF NOT EXISTS inventory_versions (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        resource_type TEXT NOT NULL,
+        collected_at TEXT NOT NULL,
+        added INTEGER NOT NULL,
+        removed INTEGER NOT NULL,
+        modified INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS inventory_changes (
+        version INTEGER NOT NULL,
+        resource_type TEXT NOT NULL,
+        region TEXT NOT NULL,
+        resource_id TEXT NOT NULL,
+        change TEXT NOT NULL,
+        data TEXT NOT NULL,
+        changed_fields TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_inventory_changes_version ON inventory_changes (version);
+    CREATE TABLE IF NOT EXISTS inventory_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    # 单条SQL中 IN (...) 的最大参数个数
+    QUERY_CHUNK = 500
+
+    def __init__(self, path: str, changes_retention_days: int = 7):
+        """
+        初始化资源清单仓库
+
+        Args:
+            path: SQLite数据库文件路径
+            changes_retention_days: 变更记录的保留天数
+        """
+        self.path = path
+        self.changes_retention_days = changes_retention_days
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.region_hits = 0
+        self.region_misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作使用独立连接，便于在线程池中并发读取"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def bucket_regions(self, buckets: List[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        查询已知的存储桶区域
+
+        存储桶删除后同名重建可能位于其他区域，因此创建时间不一致的记录视为未知。
+
+        Args:
+            buckets: [(存储桶名称, 创建时间)]
+
+        Returns:
+            {存储桶名称: 区域}，只包含已知的存储桶
+        """
+        creation_dates = dict(buckets)
+        names = list(creation_dates)
+        regions = {}
+        with self._connect() as conn:
+            for offset in range(0, len(names), self.QUERY_CHUNK):
+                chunk = names[offset:offset + self.QUERY_CHUNK]
+                rows = conn.execute(
+                    f"SELECT bucket, creation_date, region FROM bucket_regions "
+                    f"WHERE bucket IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                regions.update(
+                    (bucket, region) for bucket, creation_date, region in rows
+                    if creation_date == creation_dates[bucket]
+                )
+
+        with self._lock:
+            self.region_hits += len(regions)
+            self.region_misses += len(names) - len(regions)
+        return regions
+
+    def save_bucket_regions(self, rows: Iterable[Tuple[str, str, str]]):
+        """
+        保存存储桶区域
+
+        Args:
+            rows: (存储桶名称, 创建时间, 区域) 行
+        """
+        resolved_at = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bucket_regions VALUES (?, ?, ?, ?)",
+                ((bucket, creation_date, region, resolved_at) for bucket, creation_date, region in rows)
+            )
+
+    def save_snapshot(self, resource_type: str, resources: List[Dict], id_field: str,
+                      skip_regions: Iterable[str] = ()) -> Optional[int]:
+        """
+        保存一次获取的资源清单，与上一版本比较并记录变更
+
+        Args:
+            resource_type: 资源类型 (ec2, rds, lambda)
+            resources: 完整的资源列表，每条记录包含 region
+            id_field: 资源ID字段名
+            skip_regions: 本次获取失败的区域，其中的资源保持上一版本，不视为删除
+
+        Returns:
+            有变更时返回新版本号，否则返回None
+        """
+        skip_regions = set(skip_regions)
+        current = {}
+        for resource in resources:
+            data = json.dumps(resource, sort_keys=True, default=str)
+            current[(resource['region'], str(resource[id_field]))] = (
+                hashlib.sha1(data.encode('utf-8')).hexdigest(), data
+            )
+
+        with self._lock, self._connect() as conn:
+            previous = {
+                (region, resource_id): (digest, data)
+                for region, resource_id, digest, data in conn.execute(
+                    "SELECT region, resource_id, digest, data FROM inventory_resources WHERE resource_type = ?",
+                    (resource_type,)
+                )
+            }
+
+            changes = []
+            for key, (digest, data) in current.items():
+                if key not in previous:
+                    changes.append((key, 'added', data, None))
+                elif previous[key][0] != digest:
+                    changes.append((key, 'modified', data, self._changed_fields(previous[key][1], data)))
+            for key, (_, data) in previous.items():
+                if key not in current and key[0] not in skip_regions:
+                    changes.append((key, 'removed', data, None))
+            if not changes:
+                return None
+
+            counts = {change: sum(1 for _, kind, _, _ in changes if kind == change) for change in ('added', 'removed', 'modified')}
+            version = conn.execute(
+                "INSERT INTO inventory_versions (resource_type, collected_at, added, removed, modified) VALUES (?, ?, ?, ?, ?)",
+                (resource_type, datetime.now().isoformat(), counts['added'], counts['removed'], counts['modified'])
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO inventory_changes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (version, resource_type, region, resource_id, change, data,
+                     json.dumps(changed_fields) if changed_fields is not None else None)
+                    for (region, resource_id), change, data, changed_fields in changes
+                )
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO inventory_resources VALUES (?, ?, ?, ?, ?)",
+                (
+                    (resource_type, region, resource_id, *current[(region, resource_id)])
+                    for (region, resource_id), change, _, _ in changes if change != 'removed'
+                )
+            )
+            conn.executemany(
+                "DELETE FROM inventory_resources WHERE resource_type = ? AND region = ? AND resource_id = ?",
+                (
+                    (resource_type, region, resource_id)
+                    for (region, resource_id), change, _, _ in changes if change == 'removed'
+                )
+            )
+            self._prune(conn)
+
+        self.logger.info(f"{resource_type} 清单版本 {version}: 新增 {counts['added']}，删除 {counts['removed']}，修改 {counts['modified']}")
+        return version
+
+    def _prune(self, conn: sqlite3.Connection):
+        """删除超过保留期的变更记录，并记录已删除的最大版本号"""
+        cutoff = (datetime.now() - timedelta(days=self.changes_retention_days)).isoformat()
+        pruned = conn.execute(
+            "SELECT MAX(version) FROM inventory_versions WHERE collected_at < ?", (cutoff,)
+        ).fetchone()[0]
+        if pruned is None:
+            return
+        conn.execute("DELETE FROM inventory_changes WHERE version <= ?", (pruned,))
+        conn.execute("DELETE FROM inventory_versions WHERE version <= ?", (pruned,))
+        conn.execute(
+            "INSERT INTO inventory_meta VALUES ('pruned_through', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), excluded.value)",
+            (pruned,)
+        )
+
+    @staticmethod
+    def _changed_fields(old_data: str, new_data: str) -> List[str]:
+        """两个版本之间取值不同的字段"""
+        old, new = json.loads(old_data), json.loads(new_data)
+        return sorted(field for field in set(old) | set(new) if old.get(field) != new.get(field))
+
+    def changes_since(self, since: Optional[int], resource_types: List[str]) -> Dict:
+        """
+        获取指定版本之后的变更
+
+        同一资源的多次变更合并为一条: 新增后修改仍为新增，新增后删除不返回，
+        修改后删除为删除，删除后重新出现为修改。
+
+        Args:
+            since: 上次返回的版本号，为None时只返回当前版本号
+            resource_types: 资源类型
+
+        Returns:
+            {'token': 当前版本号, 'reset': 是否需要重新获取完整清单, 'changes': [...]}
+        """
+        with self._connect() as conn:
+            token = conn.execute("SELECT COALESCE(MAX(version), 0) FROM inventory_versions").fetchone()[0]
+            row = conn.execute("SELECT value FROM inventory_meta WHERE key = 'pruned_through'").fetchone()
+            pruned_through = int(row[0]) if row else 0
+            token = max(token, pruned_through)
+
+            if since is None:
+                return {'token': token, 'reset': False, 'changes': []}
+            if since > token:
+                raise ValueError(f"无效的版本号: {since}，当前版本号为 {token}")
+            # 变更记录已超过保留期，无法计算差异
+            if since < pruned_through:
+                return {'token': token, 'reset': True, 'changes': []}
+
+            rows = conn.execute(
+                f"SELECT version, resource_type, region, resource_id, change, data, changed_fields "
+                f"FROM inventory_changes WHERE version > ? AND version <= ? "
+                f"AND resource_type IN ({','.join('?' * len(resource_types))}) ORDER BY version",
+                (since, token, *resource_types)
+            ).fetchall()
+
+        merged: Dict[Tuple[str, str, str], Dict] = {}
+        for version, resource_type, region, resource_id, change, data, changed_fields in rows:
+            key = (resource_type, region, resource_id)
+            fields = set(json.loads(changed_fields)) if changed_fields else None
+            first = merged.get(key)
+            if first is None:
+                pass
+            elif first['change'] == 'added':
+                if change == 'removed':
+                    del merged[key]
+                    continue
+                change, fields = 'added', None
+            elif first['change'] == 'removed':
+                change, fields = 'modified', None
+            elif change == 'modified':
+                fields = None if first['changed_fields'] is None or fields is None else fields | set(first['changed_fields'])
+
+            merged[key] = {
+                'version': version,
+                'resource_type': resource_type,
+                'region': region,
+                'resource_id': resource_id,
+                'change': change,
+                'changed_fields': sorted(fields) if fields is not None else None,
+                'data': json.loads(data)
+            }
+
+        return {'token': token, 'reset': False, 'changes': list(merged.values())}
+
+    def stats(self) -> Dict:
+        """获取仓库统计信息"""
+        with self._connect() as conn:
+            buckets = conn.execute("SELECT COUNT(*) FROM bucket_regions").fetchone()[0]
+            resources = conn.execute("SELECT COUNT(*) FROM inventory_resources").fetchone()[0]
+            version = conn.execute("SELECT MAX(version) FROM inventory_versions").fetchone()[0]
+        return {
+            'bucket_regions': buckets,
+            'inventory_resources': resources,
+            'inventory_version': version,
+            'region_hits': self.region_hits,
+            'region_misses': self.region_misses
+        }
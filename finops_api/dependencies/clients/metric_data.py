@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+CloudWatch GetMetricData 批量查询
+将大量指标查询打包为每次最多500个查询的批次，按 NextToken 分页，多个批次并发执行
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import logging
+
+
+class MetricDataEngine:
+    """基于 GetMetricData 的批量指标查询"""
+
+    # 单次 GetMetricData 调用最多包含的查询数和返回的数据点数
+    MAX_QUERIES_PER_CALL = 500
+    MAX_DATAPOINTS_PER_CALL = 100800
+
+    # CloudWatch 数据保留期: (该保留期内可用的最小间隔(秒), 保留时长)
+    RETENTION_TIERS = [
+        (60, timedelta(days=15)),
+        (300, timedelta(days=63)),
+        (3600, timedelta(days=455))
+    ]
+
+    # 判断保留期时允许的误差，窗口开始时间在请求处理前计算，会略早于保留期边界
+    RETENTION_GRACE = timedelta(hours=1)
+
+    # 自动选择时的候选间隔(秒)
+    PERIODS = [60, 300, 900, 3600, 21600, 86400]
+
+    def __init__(self, client, max_workers: int = 4):
+        """
+        初始化批量查询引擎
+
+        Args:
+            client: boto3 CloudWatch客户端
+            max_workers: 并发执行的批次数
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def query(namespace: str, metric_name: str, dimensions: List[Dict],
+              stat: str, period: int) -> Dict:
+        """
+        构建单个指标查询
+
+        Args:
+            namespace: 指标命名空间
+            metric_name: 指标名称
+            dimensions: 指标维度 [{'Name': ..., 'Value': ...}]
+            stat: 统计方式 (Average, Maximum, Sum 等)
+            period: 数据点间隔(秒)
+
+        Returns:
+            不含Id的 MetricDataQuery
+        """
+        return {
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': namespace,
+                    'MetricName': metric_name,
+                    'Dimensions': dimensions
+                },
+                'Period': period,
+                'Stat': stat
+            },
+            'ReturnData': True
+        }
+
+    def fetch(self, queries: List[Dict], start_time: datetime, end_time: datetime) -> List[Dict]:
+        """
+        批量执行指标查询
+
+        查询按每批最多500个分批；一个批次的数据点总数超过单次调用上限时，
+        再按时间切分为多个区间。所有 (批次, 时间区间) 并发获取，最后按时间顺序合并。
+
+        Args:
+            queries: 由 query() 构建的查询列表
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            与查询一一对应的结果 [{'timestamps': [...], 'values': [...], 'status': ...}]，按时间升序
+        """
+        results = [{'timestamps': [], 'values': [], 'status': 'Complete'} for _ in queries]
+        if not queries:
+            return results
+
+        jobs = []
+        for offset in range(0, len(queries), self.MAX_QUERIES_PER_CALL):
+            indexes = list(range(offset, min(offset + self.MAX_QUERIES_PER_CALL, len(queries))))
+            period = min(queries[i]['MetricStat']['Period'] for i in indexes)
+            for chunk_start, chunk_end in self._time_chunks(start_time, end_time, period, len(indexes)):
+                jobs.append((indexes, chunk_start, chunk_end))
+
+        def run(indexes: List[int], chunk_start: datetime, chunk_end: datetime) -> Dict[int, Dict]:
+            batch = [{**queries[i], 'Id': f'q{i}'} for i in indexes]
+            collected: Dict[int, Dict] = {}
+            for result in self._iter_results(batch, chunk_start, chunk_end):
+                target = collected.setdefault(int(result['Id'][1:]), {'timestamps': [], 'values': [], 'status': 'Complete'})
+                target['timestamps'].extend(result.get('Timestamps', []))
+                target['values'].extend(result.get('Values', []))
+                # 分页时前面的页为 PartialData，以最后一页的状态为准
+                target['status'] = result.get('StatusCode', 'Complete')
+            return collected
+
+        if len(jobs) == 1:
+            outputs = [run(*jobs[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(jobs), self.max_workers)) as pool:
+                outputs = [future.result() for future in [pool.submit(run, *job) for job in jobs]]
+
+        # jobs按批次、时间顺序生成，依次合并
+        for collected in outputs:
+            for index, chunk in collected.items():
+                target = results[index]
+                target['timestamps'].extend(chunk['timestamps'])
+                target['values'].extend(chunk['values'])
+                if chunk['status'] != 'Complete':
+                    target['status'] = chunk['status']
+
+        for result in results:
+            if result['timestamps']:
+                points = sorted(zip(result['timestamps'], result['values']), key=lambda point: point[0])
+                result['timestamps'] = [timestamp for timestamp, _ in points]
+                result['values'] = [value for _, value in points]
+        return results
+
+    def _time_chunks(self, start_time: datetime, end_time: datetime, period: int,
+                     query_count: int) -> List[Tuple[datetime, datetime]]:
+        """
+        按单次调用的数据点上限切分时间区间
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            period: 批次中最小的数据点间隔(秒)
+            query_count: 批次中的查询数
+
+        Returns:
+            [(区间开始, 区间结束)]，区间边界按间隔对齐
+        """
+        points_per_query = max(1, self.MAX_DATAPOINTS_PER_CALL // query_count)
+        span = timedelta(seconds=points_per_query * period)
+        if end_time - start_time <= span:
+            return [(start_time, end_time)]
+
+        chunks = []
+        chunk_start = start_time
+        while chunk_start < end_time:
+            chunk_end = min(chunk_start + span, end_time)
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+        return chunks
+
+    @classmethod
+    def choose_period(cls, start_time: datetime, end_time: datetime, minimum: int, max_points: int) -> int:
+        """
+        根据时间窗口和CloudWatch数据保留期选择数据点间隔
+
+        间隔不小于 minimum，不小于开始时间所在保留期的最小间隔，
+        并且每个序列的数据点数不超过 max_points。
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            minimum: 最小间隔(秒)
+            max_points: 每个序列的最大数据点数
+
+        Returns:
+            数据点间隔(秒)
+        """
+        now = datetime.now(timezone.utc) if start_time.tzinfo else datetime.utcnow()
+        age = now - start_time - cls.RETENTION_GRACE
+        for period, retention in cls.RETENTION_TIERS:
+            if age <= retention:
+                break
+        else:
+            raise ValueError(f"开始时间 {start_time.isoformat()} 超出CloudWatch数据保留期(455天)")
+
+        period = max(period, minimum)
+        window = (end_time - start_time).total_seconds()
+        for candidate in cls.PERIODS:
+            if candidate >= period and window / candidate <= max_points:
+                return candidate
+        return max(period, cls.PERIODS[-1])
+
+    def _iter_results(self, batch: List[Dict], start_time: datetime, end_time: datetime):
+        """按 NextToken 分页执行一个批次，逐个生成 MetricDataResults"""
+        params = {
+            'MetricDataQueries': batch,
+            'StartTime': start_time,
+            'EndTime': end_time,
+            'ScanBy': 'TimestampAscending'
+        }
+        next_token: Optional[str] = None
+        while True:
+            if next_token:
+                params['NextToken'] = next_token
+            response = self.client.get_metric_data(**params)
+
+            for message in response.get('Messages', []):
+                self.logger.warning(f"GetMetricData: {message.get('Code')} {message.get('Value')}")
+            yield from response.get('MetricDataResults', [])
+
+            next_token = response.get('NextToken')
+            if not next_token:
+                break
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+列式指标数据
+以 时间 × 资源 的float64矩阵保存一组资源的同一指标，缺失的数据点为NaN，
+百分位数、排名和直方图都在矩阵上向量化计算
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class MetricMatrix:
+    """时间 × 资源 的指标矩阵"""
+
+    def __init__(self, resource_ids: List[str], values: np.ndarray):
+        """
+        初始化指标矩阵
+
+        Args:
+            resource_ids: 资源ID列表(列)
+            values: 指标矩阵，形状 (时间点数, 资源数)，缺失为NaN
+        """
+        self.resource_ids = resource_ids
+        self.values = values
+
+    @classmethod
+    def from_series(cls, resource_ids: List[str], series: Sequence[Tuple[np.ndarray, np.ndarray]],
+                    start: int, end: int, period: int) -> 'MetricMatrix':
+        """
+        由每个资源的 (时间戳数组(秒), 数值数组) 构建
+
+        Args:
+            resource_ids: 资源ID列表
+            series: 与资源一一对应的时间序列
+            start: 开始时间(秒)，按间隔向下对齐
+            end: 结束时间(秒)
+            period: 数据点间隔(秒)
+        """
+        start = start - start % period
+        rows = max(0, -(-(end - start) // period))
+        values = np.full((rows, len(resource_ids)), np.nan, dtype=np.float64)
+
+        for col, (timestamps, points) in enumerate(series):
+            if not len(timestamps):
+                continue
+            index = (np.asarray(timestamps, dtype=np.int64) - start) // period
+            valid = (index >= 0) & (index < rows)
+            values[index[valid], col] = np.asarray(points, dtype=np.float64)[valid]
+
+        return cls(resource_ids, values)
+
+    def has_data(self) -> np.ndarray:
+        """每个资源是否有数据点"""
+        return ~np.isnan(self.values).all(axis=0)
+
+    def resource_stats(self, percentiles: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        每个资源的统计值，只计算有数据的资源
+
+        Args:
+            percentiles: 百分位数列表，如 [50, 95]
+
+        Returns:
+            {'index', 'average', 'maximum', 'minimum', 'datapoints', 'p<N>'...}，数组与 index 对应
+        """
+        index = np.flatnonzero(self.has_data())
+        values = self.values[:, index]
+        stats = {
+            'index': index,
+            'average': np.nanmean(values, axis=0) if index.size else np.empty(0),
+            'maximum': np.nanmax(values, axis=0) if index.size else np.empty(0),
+            'minimum': np.nanmin(values, axis=0) if index.size else np.empty(0),
+            'datapoints': (~np.isnan(values)).sum(axis=0)
+        }
+        if percentiles and index.size:
+            for percentile, row in zip(percentiles, np.nanpercentile(values, percentiles, axis=0)):
+                stats[self.percentile_name(percentile)] = row
+        else:
+            for percentile in percentiles:
+                stats[self.percentile_name(percentile)] = np.empty(0)
+        return stats
+
+    def fleet_percentiles(self, percentiles: Sequence[float]) -> Dict[str, float]:
+        """所有资源所有数据点的百分位数"""
+        values = self.values[~np.isnan(self.values)]
+        if not values.size:
+            return {self.percentile_name(percentile): None for percentile in percentiles}
+        return {
+            self.percentile_name(percentile): float(value)
+            for percentile, value in zip(percentiles, np.percentile(values, percentiles))
+        }
+
+    @staticmethod
+    def histogram(values: np.ndarray, bins: int) -> Dict:
+        """
+        数值分布直方图
+
+        Args:
+            values: 数值数组
+            bins: 分桶数
+        """
+        if not values.size:
+            return {'edges': [], 'counts': []}
+        counts, edges = np.histogram(values, bins=bins)
+        return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+    @staticmethod
+    def percentile_name(percentile: float) -> str:
+        """百分位数字段名，如 95 -> p95, 99.9 -> p99.9"""
+        return f"p{percentile:g}"
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+指标实时推送
+每个序列只有一个后台轮询任务，订阅同一序列的所有连接共享它。轮询只获取上次之后
+新稳定的数据点并推送给所有订阅者，AWS调用量随序列数而不是连接数增长
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Hashable, List, Optional, Set
+import logging
+
+from .executor import AsyncClient
+from .series_cache import SeriesCache
+
+
+class _Tail:
+    """一个序列的共享轮询状态"""
+
+    def __init__(self, namespace: str, metric_name: str, dimensions: List[Dict], stat: str, period: int):
+        self.namespace = namespace
+        self.metric_name = metric_name
+        self.dimensions = dimensions
+        self.stat = stat
+        self.period = period
+        self.timestamps: List[int] = []
+        self.values: List[float] = []
+        self.settled_until: Optional[int] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    def describe(self) -> Dict:
+        """序列描述，随快照发送给订阅者"""
+        return {
+            'namespace': self.namespace,
+            'metric_name': self.metric_name,
+            'dimensions': {dimension['Name']: dimension['Value'] for dimension in self.dimensions},
+            'stat': self.stat,
+            'period': self.period
+        }
+
+
+class MetricTailHub:
+    """按序列共享轮询任务的指标推送中心"""
+
+    # 已稳定的截止时间只在间隔边界前进，轮询安排在边界之后稍晚一点，避免与服务器时钟偏差
+    POLL_DELAY = 5
+
+    def __init__(self, client: AsyncClient, poll_interval: int = 60, backlog_hours: int = 3,
+                 keepalive: int = 15, max_series: int = 100, queue_size: int = 32):
+        """
+        初始化推送中心
+
+        Args:
+            client: CloudWatch客户端的异步代理
+            poll_interval: 轮询失败后的最长重试间隔(秒)，成功时在下一个间隔边界之后再轮询
+            backlog_hours: 新订阅者收到的快照包含过去多少小时的数据点
+            keepalive: 没有新数据时发送保活注释的间隔(秒)
+            max_series: 同时轮询的序列数上限，已在轮询的序列不受限制
+            queue_size: 每个订阅者最多积压的事件数，超出时改为发送最新快照
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.backlog_hours = backlog_hours
+        self.keepalive = keepalive
+        self.max_series = max_series
+        self.queue_size = queue_size
+        self.logger = logging.getLogger(__name__)
+        self._tails: Dict[Hashable, _Tail] = {}
+        self.polls = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    def accepts(self, namespace: str, metric_name: str, dimensions: List[Dict],
+                stat: str = 'Average', period: int = 300) -> bool:
+        """
+        是否可以订阅一个序列: 已在轮询的序列总是可以订阅，新序列受 max_series 限制
+
+        Args:
+            namespace: 指标命名空间
+            metric_name: 指标名称
+            dimensions: 指标维度 [{'Name': ..., 'Value': ...}]
+            stat: 统计方式
+            period: 数据点间隔(秒)
+        """
+        key = SeriesCache.key(namespace, metric_name, dimensions, period, stat)
+        if key in self._tails or len(self._tails) < self.max_series:
+            return True
+        self.rejected += 1
+        return False
+
+    async def subscribe(self, namespace: str, metric_name: str, dimensions: List[Dict],
+                        stat: str = 'Average', period: int = 300) -> AsyncIterator[Optional[Dict]]:
+        """
+        订阅一个序列
+
+        先生成一个 snapshot 事件(最近 backlog_hours 小时的数据点)，之后每当有新稳定的数据点时
+        生成 datapoints 事件；长时间没有事件时生成None(保活)。连接关闭时自动退订，
+        最后一个订阅者退订后停止该序列的轮询。新序列超出 max_series 时只生成一个 error 事件。
+
+        Args:
+            namespace: 指标命名空间
+            metric_name: 指标名称
+            dimensions: 指标维度 [{'Name': ..., 'Value': ...}]
+            stat: 统计方式
+            period: 数据点间隔(秒)
+
+        Returns:
+            事件 {'event', 'id', 'data'} 的异步迭代器
+        """
+        key = SeriesCache.key(namespace, metric_name, dimensions, period, stat)
+        tail = self._tails.get(key)
+        if tail is None:
+            # 检查订阅请求之后其他连接可能已经占满了序列数
+            if len(self._tails) >= self.max_series:
+                self.rejected += 1
+                yield {'event': 'error', 'data': {'message': f"实时推送的序列数已达到上限 {self.max_series}"}}
+                return
+            tail = _Tail(namespace, metric_name, dimensions, stat, period)
+            self._tails[key] = tail
+            tail.task = asyncio.create_task(self._poll(tail))
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        tail.subscribers.add(queue)
+        if tail.settled_until is not None:
+            queue.put_nowait(self._snapshot(tail))
+
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            tail.subscribers.discard(queue)
+            if not tail.subscribers and self._tails.get(key) is tail:
+                del self._tails[key]
+                tail.task.cancel()
+
+    async def _poll(self, tail: _Tail):
+        """
+        序列的轮询任务: 首次获取快照，之后只获取上次稳定时间点之后的数据点
+
+        新数据点只会在间隔边界之后变为已稳定，因此每个间隔只轮询一次；失败时按 poll_interval 重试。
+        """
+        backlog = self.backlog_hours * 3600
+        while True:
+            failed = False
+            try:
+                since = tail.settled_until
+                if since is None:
+                    since = int(time.time()) - backlog
+                result = await self.client.get_settled_datapoints(
+                    tail.namespace, tail.metric_name, tail.dimensions, tail.stat, tail.period, since
+                )
+                self.polls += 1
+
+                first = tail.settled_until is None
+                tail.timestamps.extend(result['timestamps'])
+                tail.values.extend(result['values'])
+                tail.settled_until = result['settled_until']
+                # 只保留快照需要的数据点
+                oldest = tail.settled_until - backlog
+                drop = next((i for i, timestamp in enumerate(tail.timestamps) if timestamp >= oldest), len(tail.timestamps))
+                del tail.timestamps[:drop], tail.values[:drop]
+
+                if first:
+                    self._broadcast(tail, self._snapshot(tail))
+                elif result['timestamps']:
+                    self._broadcast(tail, {
+                        'event': 'datapoints',
+                        'id': tail.settled_until,
+                        'data': {
+                            'timestamps': result['timestamps'],
+                            'values': result['values'],
+                            'settled_until': tail.settled_until
+                        }
+                    })
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"轮询指标 {tail.metric_name} 失败: {str(e)}")
+                self._broadcast(tail, {'event': 'error', 'data': {'message': str(e)}})
+                failed = True
+
+            delay = self._until_next_boundary(tail.period)
+            await asyncio.sleep(min(delay, self.poll_interval) if failed else delay)
+
+    @classmethod
+    def _until_next_boundary(cls, period: int) -> float:
+        """距离下一个间隔边界(加 POLL_DELAY)的秒数"""
+        return period - time.time() % period + cls.POLL_DELAY
+
+    @staticmethod
+    def _snapshot(tail: _Tail) -> Dict:
+        """当前缓存的数据点组成的快照事件"""
+        return {
+            'event': 'snapshot',
+            'id': tail.settled_until,
+            'data': {
+                **tail.describe(),
+                'timestamps': list(tail.timestamps),
+                'values': list(tail.values),
+                'settled_until': tail.settled_until
+            }
+        }
+
+    def _broadcast(self, tail: _Tail, event: Dict):
+        """推送事件给序列的所有订阅者"""
+        for queue in tail.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 订阅者消费过慢: 丢弃积压的事件，改为发送包含最新数据点的快照
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot(tail))
+                self.resyncs += 1
+
+    def close(self):
+        """停止所有轮询任务"""
+        for tail in self._tails.values():
+            if tail.task is not None:
+                tail.task.cancel()
+        self._tails.clear()
+
+    def stats(self) -> Dict:
+        """获取推送统计信息"""
+        return {
+            'series': len(self._tails),
+            'max_series': self.max_series,
+            'subscribers': sum(len(tail.subscribers) for tail in self._tails.values()),
+            'polls': self.polls,
+            'resyncs': self.resyncs,
+            'rejected': self.rejected
+        }
@@ -8,6 +8,10 @@ import boto3
 from typing import Dict, List, Optional
 import logging
 
+from config import Config
+from .cache import TTLCache, cached
+from .singleflight import SingleFlight
+
 class OptimizationClient:
     def __init__(self, region_name: str = 'us-east-1'):
         """
@@ -20,7 +24,10 @@ class OptimizationClient:
         self.compute_optimizer_client = boto3.client('compute-optimizer', region_name=region_name)
         self.ce_client = boto3.client('ce', region_name=region_name)
         self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(maxsize=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self.flight = SingleFlight()
     
+    @cached(ttl=Config.RECOMMENDATIONS_CACHE_TTL)
     def get_trusted_advisor_checks(self) -> Dict:
         """获取Trusted Advisor检查结果"""
         try:
@@ -68,6 +75,7 @@ class OptimizationClient:
                 'error': 'Trusted Advisor需要Business或Enterprise支持计划'
             }
     
+    @cached(ttl=Config.RECOMMENDATIONS_CACHE_TTL)
     def get_compute_optimizer_recommendations(self) -> Dict:
         """获取Compute Optimizer建议"""
         try:
@@ -129,6 +137,7 @@ class OptimizationClient:
                 'error': str(e)
             }
     
+    @cached(ttl=Config.RECOMMENDATIONS_CACHE_TTL)
     def get_reserved_instance_recommendations(self) -> Dict:
         """获取预留实例建议"""
         try:
@@ -170,6 +179,7 @@ class OptimizationClient:
                 'error': str(e)
             }
     
+    @cached(ttl=Config.RECOMMENDATIONS_CACHE_TTL)
     def get_savings_plans_recommendations(self) -> Dict:
         """获取节省计划建议"""
         try:
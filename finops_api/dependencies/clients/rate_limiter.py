@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+AWS API 请求限流
+令牌桶限流器，用于在并发请求时遵守AWS API的TPS限制
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒允许的请求数
+            burst: 令牌桶容量(允许的瞬时并发请求数)，默认等于rate
+        """
+        self.rate = rate
+        self.capacity = max(1.0, float(burst if burst is not None else rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            self.waited += wait
+            time.sleep(wait)
@@ -5,63 +5,179 @@ AWS资源清单客户端
 """
 
 import boto3
-from typing import Dict, List, Optional
+from botocore.config import Config as BotoConfig
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import logging
+import queue
+import threading
+
+from config import Config
+from .cache import TTLCache, cached
+from .cloudwatch_client import CloudWatchClient
+from .inventory_store import InventoryStore
+from .singleflight import SingleFlight
+
+# S3存储桶可选的附加信息
+S3_BUCKET_DETAILS = ('size', 'encryption', 'lifecycle')
+
+# 保存快照的资源类型及其资源ID字段
+SNAPSHOT_TYPES = {
+    'ec2': 'instance_id',
+    'rds': 'db_instance_identifier',
+    'lambda': 'function_name'
+}
 
 class ResourceInventoryClient:
-    def __init__(self, region_name: str = 'us-east-1'):
+    def __init__(self, region_name: str = 'us-east-1', cloudwatch: Optional[CloudWatchClient] = None):
         """
         初始化资源清单客户端
         
         Args:
             region_name: AWS区域名称
+            cloudwatch: 获取存储桶存储量的CloudWatch客户端，为None时创建新的客户端
         """
         self.ec2_client = boto3.client('ec2', region_name=region_name)
-        self.rds_client = boto3.client('rds', region_name=region_name)
         self.s3_client = boto3.client('s3')
-        self.lambda_client = boto3.client('lambda', region_name=region_name)
+        self.cloudwatch = cloudwatch or CloudWatchClient(region_name)
         self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(maxsize=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self.flight = SingleFlight()
+        self.store = InventoryStore(
+            Config.INVENTORY_STORE_PATH, Config.INVENTORY_CHANGES_RETENTION_DAYS
+        ) if Config.INVENTORY_STORE_PATH else None
+        
+        # 存储桶信息补充使用的客户端: 连接池与并发数一致，单次调用超时
+        self._enrich_config = BotoConfig(
+            connect_timeout=Config.S3_ENRICH_TIMEOUT,
+            read_timeout=Config.S3_ENRICH_TIMEOUT,
+            retries={'max_attempts': 2},
+            max_pool_connections=Config.S3_ENRICH_CONCURRENCY
+        )
+        # 多区域清单使用的客户端及全局并发上限
+        self._fanout_config = BotoConfig(retries={'max_attempts': 5, 'mode': 'adaptive'})
+        self._region_pool = ThreadPoolExecutor(max_workers=Config.INVENTORY_CONCURRENCY)
+        self._regional_clients: Dict[Tuple[str, str], object] = {}
+        self._regional_lock = threading.Lock()
     
-    def get_ec2_inventory(self) -> Dict:
-        """获取EC2实例清单"""
+    @cached(ttl=Config.INVENTORY_REGIONS_CACHE_TTL)
+    def get_regions(self) -> List[str]:
+        """
+        获取清单覆盖的区域
+        
+        未配置 INVENTORY_REGIONS 时通过 DescribeRegions 获取账户已启用的区域。
+        
+        Returns:
+            区域名称列表
+        """
         try:
-            response = self.ec2_client.describe_instances()
+            if Config.INVENTORY_REGIONS:
+                return list(Config.INVENTORY_REGIONS)
             
-            instances = []
-            for reservation in response['Reservations']:
-                for instance in reservation['Instances']:
-                    instance_info = {
-                        'instance_id': instance['InstanceId'],
-                        'instance_type': instance['InstanceType'],
-                        'state': instance['State']['Name'],
-                        'launch_time': instance['LaunchTime'].isoformat(),
-                        'availability_zone': instance['Placement']['AvailabilityZone'],
-                        'vpc_id': instance.get('VpcId'),
-                        'subnet_id': instance.get('SubnetId'),
-                        'private_ip': instance.get('PrivateIpAddress'),
-                        'public_ip': instance.get('PublicIpAddress'),
-                        'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
-                    }
-                    instances.append(instance_info)
+            response = self.ec2_client.describe_regions()
+            return sorted(region['RegionName'] for region in response['Regions'])
+            
+        except Exception as e:
+            self.logger.error(f"获取区域列表失败: {str(e)}")
+            raise
+    
+    @cached(ttl=Config.INVENTORY_CACHE_TTL)
+    def get_ec2_inventory(self) -> Dict:
+        """获取所有区域的EC2实例清单"""
+        try:
+            failed_regions: Dict[str, str] = {}
+            instances = self._collect_regions(self.iter_ec2_inventory(failed_regions))
+            self._save_snapshot('ec2', instances, failed_regions)
             
             return {
                 'total_instances': len(instances),
                 'instances': instances,
-                'summary': self._get_ec2_summary(instances)
+                'summary': self._get_ec2_summary(instances),
+                'regions': self.get_regions(),
+                'failed_regions': failed_regions
             }
             
         except Exception as e:
             self.logger.error(f"获取EC2清单失败: {str(e)}")
             raise
     
+    def iter_ec2_inventory(self, failed_regions: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        并发获取所有区域的EC2实例，逐个生成实例信息，用于流式响应
+        
+        Args:
+            failed_regions: 传入时记录获取失败的区域 {区域: 错误信息}
+        
+        Returns:
+            实例信息的迭代器，每条记录包含 region
+        """
+        return self._iter_regions('ec2', self._ec2_pages, failed_regions)
+    
+    @staticmethod
+    def _ec2_pages(client) -> Iterator[List[Dict]]:
+        """按页获取一个区域的EC2实例"""
+        paginator = client.get_paginator('describe_instances')
+        for page in paginator.paginate(PaginationConfig={'PageSize': 1000}):
+            yield [
+                {
+                    'instance_id': instance['InstanceId'],
+                    'instance_type': instance['InstanceType'],
+                    'state': instance['State']['Name'],
+                    'launch_time': instance['LaunchTime'].isoformat(),
+                    'availability_zone': instance['Placement']['AvailabilityZone'],
+                    'vpc_id': instance.get('VpcId'),
+                    'subnet_id': instance.get('SubnetId'),
+                    'private_ip': instance.get('PrivateIpAddress'),
+                    'public_ip': instance.get('PublicIpAddress'),
+                    'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                }
+                for reservation in page['Reservations']
+                for instance in reservation['Instances']
+            ]
+    
+    @cached(ttl=Config.INVENTORY_CACHE_TTL)
     def get_rds_inventory(self) -> Dict:
-        """获取RDS实例清单"""
+        """获取所有区域的RDS实例清单"""
         try:
-            response = self.rds_client.describe_db_instances()
+            failed_regions: Dict[str, str] = {}
+            instances = self._collect_regions(self.iter_rds_inventory(failed_regions))
+            self._save_snapshot('rds', instances, failed_regions)
+            
+            return {
+                'total_instances': len(instances),
+                'instances': instances,
+                'summary': self._get_rds_summary(instances),
+                'regions': self.get_regions(),
+                'failed_regions': failed_regions
+            }
             
+        except Exception as e:
+            self.logger.error(f"获取RDS清单失败: {str(e)}")
+            raise
+    
+    def iter_rds_inventory(self, failed_regions: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        并发获取所有区域的RDS实例，逐个生成实例信息，用于流式响应
+        
+        Args:
+            failed_regions: 传入时记录获取失败的区域 {区域: 错误信息}
+        
+        Returns:
+            实例信息的迭代器，每条记录包含 region
+        """
+        return self._iter_regions('rds', self._rds_pages, failed_regions)
+    
+    @staticmethod
+    def _rds_pages(client) -> Iterator[List[Dict]]:
+        """按页获取一个区域的RDS实例"""
+        paginator = client.get_paginator('describe_db_instances')
+        for page in paginator.paginate():
             instances = []
-            for db_instance in response['DBInstances']:
-                instance_info = {
+            for db_instance in page['DBInstances']:
+                # 创建中的实例还没有 InstanceCreateTime
+                create_time = db_instance.get('InstanceCreateTime')
+                instances.append({
                     'db_instance_identifier': db_instance['DBInstanceIdentifier'],
                     'db_instance_class': db_instance['DBInstanceClass'],
                     'engine': db_instance['Engine'],
@@ -73,70 +189,261 @@ class ResourceInventoryClient:
                     'availability_zone': db_instance.get('AvailabilityZone'),
                     'vpc_security_groups': [sg['VpcSecurityGroupId'] for sg in db_instance.get('VpcSecurityGroups', [])],
                     'backup_retention_period': db_instance['BackupRetentionPeriod'],
-                    'instance_create_time': db_instance['InstanceCreateTime'].isoformat()
-                }
-                instances.append(instance_info)
+                    'instance_create_time': create_time.isoformat() if create_time else None
+                })
+            yield instances
+    
+    @cached(ttl=Config.INVENTORY_CACHE_TTL)
+    def get_s3_inventory(self, details: Optional[List[str]] = None) -> Dict:
+        """
+        获取S3存储桶清单
+        
+        Args:
+            details: 附加信息 (size, encryption, lifecycle)，默认只包含区域
+        
+        Returns:
+            存储桶清单
+        """
+        try:
+            buckets = list(self.iter_s3_inventory(details))
             
             return {
-                'total_instances': len(instances),
-                'instances': instances,
-                'summary': self._get_rds_summary(instances)
+                'total_buckets': len(buckets),
+                'buckets': buckets
             }
             
         except Exception as e:
-            self.logger.error(f"获取RDS清单失败: {str(e)}")
+            self.logger.error(f"获取S3清单失败: {str(e)}")
             raise
     
-    def get_s3_inventory(self) -> Dict:
-        """获取S3存储桶清单"""
+    @cached(ttl=Config.INVENTORY_CACHE_TTL)
+    def get_bucket_regions(self) -> Dict[str, str]:
+        """
+        获取所有存储桶所在的区域
+        
+        区域优先从本地仓库读取，只有新的存储桶才调用 get_bucket_location。
+        
+        Returns:
+            {存储桶名称: 区域}，不包含无法获取区域的存储桶
+        """
         try:
-            response = self.s3_client.list_buckets()
+            return {
+                bucket['bucket_name']: bucket['region']
+                for bucket in self._iter_s3_buckets([]) if bucket['region'] != 'unknown'
+            }
             
-            buckets = []
-            for bucket in response['Buckets']:
-                bucket_name = bucket['Name']
-                
-                # 获取存储桶详细信息
-                try:
-                    location = self.s3_client.get_bucket_location(Bucket=bucket_name)
-                    region = location['LocationConstraint'] or 'us-east-1'
-                    
-                    # 获取存储桶大小（简化版本）
-                    bucket_info = {
-                        'bucket_name': bucket_name,
+        except Exception as e:
+            self.logger.error(f"获取存储桶区域失败: {str(e)}")
+            raise
+    
+    def iter_s3_inventory(self, details: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        按页获取S3存储桶，逐个生成存储桶信息，用于流式响应
+        
+        每页存储桶的区域先从本地仓库查询，未知的存储桶并发调用 get_bucket_location 并保存结果；
+        附加信息同样在有界线程池中并发获取，单个存储桶获取失败时该项为None。
+        
+        Args:
+            details: 附加信息 (size, encryption, lifecycle)，默认只包含区域
+        
+        Returns:
+            存储桶信息的迭代器
+        """
+        details = details or []
+        unsupported = [detail for detail in details if detail not in S3_BUCKET_DETAILS]
+        if unsupported:
+            raise ValueError(f"不支持的存储桶信息: {', '.join(unsupported)}")
+        return self._iter_s3_buckets(details)
+    
+    def _iter_s3_buckets(self, details: List[str]) -> Iterator[Dict]:
+        """按页获取存储桶并补充信息"""
+        paginator = self.s3_client.get_paginator('list_buckets')
+        # 每个区域的S3存储指标只列出一次
+        size_metrics: Dict[str, Dict[str, List[Tuple[str, List[Dict]]]]] = {}
+        with ThreadPoolExecutor(max_workers=Config.S3_ENRICH_CONCURRENCY) as pool:
+            for page in paginator.paginate(PaginationConfig={'PageSize': 1000}):
+                buckets = [
+                    {
+                        'bucket_name': bucket['Name'],
                         'creation_date': bucket['CreationDate'].isoformat(),
-                        'region': region
+                        'region': None
                     }
-                    buckets.append(bucket_info)
-                    
-                except Exception as e:
-                    self.logger.warning(f"获取存储桶 {bucket_name} 详细信息失败: {str(e)}")
-                    buckets.append({
-                        'bucket_name': bucket_name,
-                        'creation_date': bucket['CreationDate'].isoformat(),
-                        'region': 'unknown'
-                    })
+                    for bucket in page['Buckets']
+                ]
+                self._resolve_bucket_regions(buckets, pool)
+                
+                if 'size' in details:
+                    self._add_bucket_sizes(buckets, size_metrics)
+                if 'encryption' in details or 'lifecycle' in details:
+                    list(pool.map(lambda bucket: self._add_bucket_settings(bucket, details), buckets))
+                
+                yield from buckets
+    
+    def _resolve_bucket_regions(self, buckets: List[Dict], pool: ThreadPoolExecutor):
+        """查询本地仓库，并发获取未知存储桶的区域"""
+        known = self.store.bucket_regions(
+            [(bucket['bucket_name'], bucket['creation_date']) for bucket in buckets]
+        ) if self.store else {}
+        
+        missing = []
+        for bucket in buckets:
+            region = known.get(bucket['bucket_name'])
+            if region:
+                bucket['region'] = region
+            else:
+                missing.append(bucket)
+        if not missing:
+            return
+        
+        client = self._regional_client('s3', 'us-east-1')
+        
+        def locate(bucket: Dict) -> Optional[str]:
+            try:
+                location = client.get_bucket_location(Bucket=bucket['bucket_name'])
+                return location['LocationConstraint'] or 'us-east-1'
+            except Exception as e:
+                self.logger.warning(f"获取存储桶 {bucket['bucket_name']} 区域失败: {str(e)}")
+                return None
+        
+        resolved = []
+        for bucket, region in zip(missing, pool.map(locate, missing)):
+            bucket['region'] = region or 'unknown'
+            if region:
+                resolved.append((bucket['bucket_name'], bucket['creation_date'], region))
+        if self.store and resolved:
+            self.store.save_bucket_regions(resolved)
+    
+    def _add_bucket_settings(self, bucket: Dict, details: List[str]):
+        """获取存储桶的加密和生命周期配置"""
+        if bucket['region'] == 'unknown':
+            client = self._regional_client('s3', 'us-east-1')
+        else:
+            client = self._regional_client('s3', bucket['region'])
+        
+        if 'encryption' in details:
+            try:
+                rules = client.get_bucket_encryption(Bucket=bucket['bucket_name'])['ServerSideEncryptionConfiguration']['Rules']
+                bucket['encryption'] = [
+                    rule['ApplyServerSideEncryptionByDefault']['SSEAlgorithm']
+                    for rule in rules if 'ApplyServerSideEncryptionByDefault' in rule
+                ]
+            except client.exceptions.ClientError as e:
+                if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
+                    bucket['encryption'] = []
+                else:
+                    self.logger.warning(f"获取存储桶 {bucket['bucket_name']} 加密配置失败: {str(e)}")
+                    bucket['encryption'] = None
+            except Exception as e:
+                self.logger.warning(f"获取存储桶 {bucket['bucket_name']} 加密配置失败: {str(e)}")
+                bucket['encryption'] = None
+        
+        if 'lifecycle' in details:
+            try:
+                rules = client.get_bucket_lifecycle_configuration(Bucket=bucket['bucket_name'])['Rules']
+                bucket['lifecycle_rules'] = sum(1 for rule in rules if rule.get('Status') == 'Enabled')
+            except client.exceptions.ClientError as e:
+                if e.response['Error']['Code'] == 'NoSuchLifecycleConfiguration':
+                    bucket['lifecycle_rules'] = 0
+                else:
+                    self.logger.warning(f"获取存储桶 {bucket['bucket_name']} 生命周期配置失败: {str(e)}")
+                    bucket['lifecycle_rules'] = None
+            except Exception as e:
+                self.logger.warning(f"获取存储桶 {bucket['bucket_name']} 生命周期配置失败: {str(e)}")
+                bucket['lifecycle_rules'] = None
+    
+    def _add_bucket_sizes(self, buckets: List[Dict], size_metrics: Dict[str, Dict[str, List[Tuple[str, List[Dict]]]]]):
+        """
+        按区域批量获取存储桶的存储量和对象数(最近一天的数据点)
+        
+        通过 CloudWatchClient.fetch_s3_storage_metrics 在各存储桶所在区域批量获取，
+        调用次数与存储桶数无关，获取失败的区域中存储桶的对应字段为None。
+        
+        Args:
+            buckets: 同一页的存储桶，就地添加 size_bytes 和 number_of_objects
+            size_metrics: 各区域已列出的指标，在同一次清单获取的多页之间复用
+        """
+        by_name = {}
+        by_region: Dict[str, List[str]] = {}
+        for bucket in buckets:
+            bucket['size_bytes'] = None
+            bucket['number_of_objects'] = None
+            by_name[bucket['bucket_name']] = bucket
+            if bucket['region'] != 'unknown':
+                by_region.setdefault(bucket['region'], []).append(bucket['bucket_name'])
+        
+        end_time = datetime.now(timezone.utc)
+        start_time = end_time - timedelta(days=3)
+        metrics, _ = self.cloudwatch.fetch_s3_storage_metrics(by_region, start_time, end_time, size_metrics)
+        for _, name, metric_name, _, result in metrics:
+            if not result['values']:
+                continue
+            bucket = by_name[name]
+            # 取最新一天的数据点
+            if metric_name == 'BucketSizeBytes':
+                bucket['size_bytes'] = (bucket['size_bytes'] or 0) + result['values'][-1]
+            else:
+                bucket['number_of_objects'] = result['values'][-1]
+    
+    def _regional_client(self, service: str, region: str, config: Optional[BotoConfig] = None):
+        """
+        获取指定区域的客户端，按 (服务, 区域) 复用
+        
+        Args:
+            service: 服务名称
+            region: 区域名称
+            config: 客户端配置，默认使用存储桶信息补充的配置(单次调用超时)
+        """
+        key = (service, region)
+        with self._regional_lock:
+            client = self._regional_clients.get(key)
+            if client is None:
+                client = boto3.client(service, region_name=region, config=config or self._enrich_config)
+                self._regional_clients[key] = client
+            return client
+    
+    @cached(ttl=Config.INVENTORY_CACHE_TTL)
+    def get_lambda_inventory(self) -> Dict:
+        """获取所有区域的Lambda函数清单"""
+        try:
+            failed_regions: Dict[str, str] = {}
+            functions = self._collect_regions(self.iter_lambda_inventory(failed_regions))
+            self._save_snapshot('lambda', functions, failed_regions)
             
             return {
-                'total_buckets': len(buckets),
-                'buckets': buckets
+                'total_functions': len(functions),
+                'functions': functions,
+                'summary': self._get_lambda_summary(functions),
+                'regions': self.get_regions(),
+                'failed_regions': failed_regions
             }
             
         except Exception as e:
-            self.logger.error(f"获取S3清单失败: {str(e)}")
+            self.logger.error(f"获取Lambda清单失败: {str(e)}")
             raise
     
-    def get_lambda_inventory(self) -> Dict:
-        """获取Lambda函数清单"""
-        try:
-            response = self.lambda_client.list_functions()
-            
-            functions = []
-            for function in response['Functions']:
-                function_info = {
+    def iter_lambda_inventory(self, failed_regions: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        并发获取所有区域的Lambda函数，逐个生成函数信息，用于流式响应
+        
+        Args:
+            failed_regions: 传入时记录获取失败的区域 {区域: 错误信息}
+        
+        Returns:
+            函数信息的迭代器，每条记录包含 region
+        """
+        return self._iter_regions('lambda', self._lambda_pages, failed_regions)
+    
+    @staticmethod
+    def _lambda_pages(client) -> Iterator[List[Dict]]:
+        """按页获取一个区域的Lambda函数"""
+        paginator = client.get_paginator('list_functions')
+        for page in paginator.paginate():
+            yield [
+                {
                     'function_name': function['FunctionName'],
-                    'runtime': function['Runtime'],
-                    'handler': function['Handler'],
+                    # 容器镜像函数没有 Runtime 和 Handler
+                    'runtime': function.get('Runtime', function.get('PackageType', 'unknown')),
+                    'handler': function.get('Handler'),
                     'code_size': function['CodeSize'],
                     'description': function.get('Description', ''),
                     'timeout': function['Timeout'],
@@ -144,16 +451,131 @@ class ResourceInventoryClient:
                     'last_modified': function['LastModified'],
                     'role': function['Role']
                 }
-                functions.append(function_info)
+                for function in page['Functions']
+            ]
+    
+    def _iter_regions(self, service: str, pages: Callable[[object], Iterator[List[Dict]]],
+                      failed_regions: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        在所有区域并发分页获取资源，按页到达顺序逐条生成
+        
+        各区域在共享线程池中执行(全局并发上限 INVENTORY_CONCURRENCY)，总耗时取决于最慢的区域。
+        单个区域失败时记录警告并跳过，不影响其他区域。
+        
+        Args:
+            service: 服务名称 (ec2, rds, lambda)
+            pages: 按页生成一个区域资源列表的函数，参数为该区域的客户端
+            failed_regions: 传入时记录获取失败的区域 {区域: 错误信息}
+        
+        Returns:
+            资源信息的迭代器，每条记录添加 region
+        """
+        regions = self.get_regions()
+        # 有界队列限制已获取但未输出的页数，消费方停止迭代后生产方随即退出
+        output: queue.Queue = queue.Queue(maxsize=2 * len(regions))
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    output.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def collect(region: str):
+            try:
+                client = self._regional_client(service, region, self._fanout_config)
+                for records in pages(client):
+                    for record in records:
+                        record['region'] = region
+                    if not put((region, records)):
+                        return
+            except Exception as e:
+                self.logger.warning(f"获取 {region} 区域的 {service} 清单失败: {str(e)}")
+                if failed_regions is not None:
+                    failed_regions[region] = str(e)
+            finally:
+                put((region, None))
+        
+        def generate() -> Iterator[Dict]:
+            for region in regions:
+                self._region_pool.submit(collect, region)
+            remaining = len(regions)
+            try:
+                while remaining:
+                    _, records = output.get()
+                    if records is None:
+                        remaining -= 1
+                        continue
+                    yield from records
+            finally:
+                stop.set()
+        
+        return generate()
+    
+    @staticmethod
+    def _collect_regions(records: Iterator[Dict]) -> List[Dict]:
+        """收集所有区域的资源，按区域排序(区域内保持分页顺序)"""
+        return sorted(records, key=lambda record: record['region'])
+    
+    def _save_snapshot(self, resource_type: str, resources: List[Dict], failed_regions: Dict[str, str]):
+        """保存清单快照，失败时只记录警告，不影响清单结果"""
+        if self.store is None:
+            return
+        try:
+            self.store.save_snapshot(resource_type, resources, SNAPSHOT_TYPES[resource_type], failed_regions)
+        except Exception as e:
+            self.logger.warning(f"保存 {resource_type} 清单快照失败: {str(e)}")
+    
+    def get_inventory_changes(self, since: Optional[int] = None,
+                              resource_types: Optional[List[str]] = None) -> Dict:
+        """
+        获取指定版本之后新增、删除和修改的资源
+        
+        先获取各类型的清单(缓存过期时重新获取并与上一版本比较)，再从仓库读取变更。
+        首次调用不指定 since，获取完整清单后用返回的 token 轮询变更；
+        返回 reset=true 时 since 已超过变更记录的保留期，需要重新获取完整清单。
+        
+        Args:
+            since: 上次返回的 token
+            resource_types: 资源类型 (ec2, rds, lambda)，默认全部
+        
+        Returns:
+            {'token', 'since', 'reset', 'summary', 'changes'}
+        """
+        resource_types = resource_types or list(SNAPSHOT_TYPES)
+        unsupported = [resource_type for resource_type in resource_types if resource_type not in SNAPSHOT_TYPES]
+        if unsupported:
+            raise ValueError(f"不支持的资源类型: {', '.join(unsupported)}")
+        if self.store is None:
+            raise ValueError("未配置资源清单仓库 (INVENTORY_STORE_PATH)")
+        
+        try:
+            collectors = {
+                'ec2': self.get_ec2_inventory,
+                'rds': self.get_rds_inventory,
+                'lambda': self.get_lambda_inventory
+            }
+            for resource_type in resource_types:
+                collectors[resource_type]()
+            
+            result = self.store.changes_since(since, resource_types)
+            summary = {'added': 0, 'removed': 0, 'modified': 0}
+            for change in result['changes']:
+                summary[change['change']] += 1
             
             return {
-                'total_functions': len(functions),
-                'functions': functions,
-                'summary': self._get_lambda_summary(functions)
+                'token': result['token'],
+                'since': since,
+                'reset': result['reset'],
+                'summary': summary,
+                'changes': result['changes']
             }
             
         except Exception as e:
-            self.logger.error(f"获取Lambda清单失败: {str(e)}")
+            self.logger.error(f"获取清单变更失败: {str(e)}")
             raise
     
     def _get_ec2_summary(self, instances: List[Dict]) -> Dict:
@@ -161,7 +583,8 @@ class ResourceInventoryClient:
         summary = {
             'by_state': {},
             'by_instance_type': {},
-            'by_availability_zone': {}
+            'by_availability_zone': {},
+            'by_region': {}
         }
         
         for instance in instances:
@@ -176,6 +599,10 @@ class ResourceInventoryClient:
             # 按可用区统计
             az = instance['availability_zone']
             summary['by_availability_zone'][az] = summary['by_availability_zone'].get(az, 0) + 1
+            
+            # 按区域统计
+            region = instance['region']
+            summary['by_region'][region] = summary['by_region'].get(region, 0) + 1
         
         return summary
     
@@ -184,7 +611,8 @@ class ResourceInventoryClient:
         summary = {
             'by_engine': {},
             'by_instance_class': {},
-            'by_status': {}
+            'by_status': {},
+            'by_region': {}
         }
         
         for instance in instances:
@@ -199,6 +627,10 @@ class ResourceInventoryClient:
             # 按状态统计
             status = instance['db_instance_status']
             summary['by_status'][status] = summary['by_status'].get(status, 0) + 1
+            
+            # 按区域统计
+            region = instance['region']
+            summary['by_region'][region] = summary['by_region'].get(region, 0) + 1
         
         return summary
     
@@ -206,6 +638,7 @@ class ResourceInventoryClient:
         """生成Lambda函数汇总"""
         summary = {
             'by_runtime': {},
+            'by_region': {},
             'total_code_size': 0,
             'average_memory_size': 0
         }
@@ -216,6 +649,10 @@ class ResourceInventoryClient:
             runtime = function['runtime']
             summary['by_runtime'][runtime] = summary['by_runtime'].get(runtime, 0) + 1
             
+            # 按区域统计
+            region = function['region']
+            summary['by_region'][region] = summary['by_region'].get(region, 0) + 1
+            
             # 代码大小统计
             summary['total_code_size'] += function['code_size']
             
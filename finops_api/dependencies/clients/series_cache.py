@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+CloudWatch 时间序列缓存
+按 (命名空间, 指标, 维度, 间隔, 统计方式) 缓存数据点。超过几个间隔的数据点不会再变化，
+再次请求时只需从最后一个已稳定的时间点开始获取
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class _Series:
+    """一条时间序列，时间戳(秒)和数值分别以数组保存"""
+
+    __slots__ = ('timestamps', 'values', 'covered_from', 'settled_until')
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, covered_from: int, settled_until: int):
+        self.timestamps = timestamps
+        self.values = values
+        self.covered_from = covered_from
+        self.settled_until = settled_until
+
+
+class SeriesCache:
+    """带LRU淘汰的时间序列增量缓存"""
+
+    def __init__(self, max_points: int = 2_000_000, settle_periods: int = 2, max_age: int = 7 * 86400):
+        """
+        初始化时间序列缓存
+
+        Args:
+            max_points: 所有序列合计最多缓存的数据点数，超出时整条淘汰最久未使用的序列
+            settle_periods: 最近多少个间隔内的数据点仍可能变化，每次都重新获取
+            max_age: 数据点最长保留时间(秒)，更早的数据点在写入时被丢弃
+        """
+        self.max_points = max_points
+        self.settle_periods = settle_periods
+        self.max_age = max_age
+        self._data: "OrderedDict[Hashable, _Series]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._points = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fetched_points = 0
+
+    @staticmethod
+    def key(namespace: str, metric_name: str, dimensions: List[Dict], period: int, stat: str,
+            region: Optional[str] = None) -> Tuple:
+        """生成序列键，维度顺序不影响键；其他区域的序列键包含区域，避免不同区域的同名资源冲突"""
+        key = (
+            namespace,
+            metric_name,
+            tuple(sorted((dimension['Name'], dimension['Value']) for dimension in dimensions)),
+            period,
+            stat
+        )
+        return key if region is None else (region,) + key
+
+    def fetch_start(self, key: Hashable, start: int, period: int) -> int:
+        """
+        确定需要从哪个时间点开始获取
+
+        Args:
+            key: 序列键
+            start: 请求的开始时间(秒)
+            period: 数据点间隔(秒)
+
+        Returns:
+            开始获取的时间(秒)，已按间隔对齐
+        """
+        start = start - start % period
+        with self._lock:
+            series = self._data.get(key)
+            if series is not None and series.covered_from <= start < series.settled_until:
+                self.hits += 1
+                return series.settled_until
+            self.misses += 1
+            return start
+
+    def merge(self, key: Hashable, fetched_from: int, end: int, period: int,
+              timestamps: List[datetime], values: List[float]):
+        """
+        写入从 fetched_from 开始获取到的数据点
+
+        缓存中 fetched_from 之前的数据点保留，之后的以新数据为准。
+
+        Args:
+            key: 序列键
+            fetched_from: 本次获取的开始时间(秒)
+            end: 本次获取的结束时间(秒)
+            period: 数据点间隔(秒)
+            timestamps: 获取到的时间戳(升序)
+            values: 获取到的数值
+        """
+        new_timestamps = np.array([timestamp.timestamp() for timestamp in timestamps], dtype=np.int64)
+        new_values = np.asarray(values, dtype=np.float64)
+        settled_until = max(fetched_from, end - end % period - self.settle_periods * period)
+        oldest = end - self.max_age
+        oldest -= oldest % period
+
+        with self._lock:
+            self.fetched_points += len(new_timestamps)
+            series = self._data.pop(key, None)
+            if series is not None:
+                self._points -= len(series.timestamps)
+
+            if series is not None and series.covered_from <= fetched_from <= series.settled_until:
+                keep = series.timestamps < fetched_from
+                merged_timestamps = np.concatenate([series.timestamps[keep], new_timestamps])
+                merged_values = np.concatenate([series.values[keep], new_values])
+                covered_from = series.covered_from
+            else:
+                merged_timestamps, merged_values, covered_from = new_timestamps, new_values, fetched_from
+
+            if covered_from < oldest:
+                keep = merged_timestamps >= oldest
+                merged_timestamps, merged_values = merged_timestamps[keep], merged_values[keep]
+                covered_from = oldest
+
+            self._data[key] = _Series(merged_timestamps, merged_values, covered_from, settled_until)
+            self._points += len(merged_timestamps)
+            while self._points > self.max_points and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._points -= len(evicted.timestamps)
+                self.evictions += 1
+
+    def read(self, key: Hashable, start: int, end: int, period: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        读取 [start, end) 内的数据点
+
+        Args:
+            key: 序列键
+            start: 开始时间(秒)，按间隔向下对齐
+            end: 结束时间(秒)
+            period: 数据点间隔(秒)
+
+        Returns:
+            (时间戳数组(秒, int64), 数值数组(float64))，序列不在缓存中或未覆盖 start 时返回None
+        """
+        start = start - start % period
+        with self._lock:
+            series = self._data.get(key)
+            if series is None or series.covered_from > start:
+                return None
+            self._data.move_to_end(key)
+            lo = int(np.searchsorted(series.timestamps, start))
+            hi = int(np.searchsorted(series.timestamps, end))
+            # 缓存中的数组只会被整体替换，不会原地修改，可以直接返回切片
+            return series.timestamps[lo:hi], series.values[lo:hi]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self._points = 0
+
+    def stats(self) -> Dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'series': len(self._data),
+                'points': self._points,
+                'max_points': self.max_points,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'fetched_points': self.fetched_points
+            }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+请求合并(single-flight)
+相同键的并发调用只执行一次，其余调用方等待并共享同一结果
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行调用，如果相同键的调用正在进行则等待其结果
+
+        Args:
+            key: 规范化的请求键
+            fn: 实际执行的无参函数
+
+        Returns:
+            调用结果；执行失败时所有等待方都会收到同一异常
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.value
+
+    def stats(self) -> Dict:
+        """获取合并统计信息"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'collapsed': self.collapsed,
+                'in_flight': len(self._calls)
+            }
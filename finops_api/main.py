@@ -11,7 +11,7 @@ import logging
 from datetime import datetime
 
 from models import APIResponse
-from dependencies import init_clients
+from dependencies import init_clients, shutdown_clients, get_cache_stats
 from routers import (
     costs_router,
     budgets_router,
@@ -44,6 +44,7 @@ async def lifespan(app: FastAPI):
     
     # 关闭时清理资源
     logger.info("清理资源...")
+    shutdown_clients()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -98,6 +99,15 @@ async def health_check():
     """健康检查"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/cache/stats", response_model=APIResponse)
+async def cache_stats():
+    """缓存命中统计"""
+    return APIResponse(
+        success=True,
+        data=get_cache_stats(),
+        message="成功获取缓存统计"
+    )
+
 if __name__ == "__main__":
     import uvicorn
     import argparse
@@ -3,5 +3,6 @@
 """
 
 from .response import APIResponse
+from .streaming import NDJSONResponse, SSEResponse
 
-__all__ = ["APIResponse"]
+__all__ = ["APIResponse", "NDJSONResponse", "SSEResponse"]
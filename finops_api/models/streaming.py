@@ -0,0 +1,62 @@
+"""
+流式响应
+"""
+
+import json
+from typing import Any, AsyncIterable, Dict, Iterable, Optional, Union
+
+from fastapi.responses import StreamingResponse
+
+
+def _encode_line(item: Any) -> str:
+    return json.dumps(item, ensure_ascii=False, default=str) + "\n"
+
+
+def _encode(items: Iterable) -> Iterable[str]:
+    for item in items:
+        yield _encode_line(item)
+
+
+async def _aencode(items: AsyncIterable) -> AsyncIterable[str]:
+    async for item in items:
+        yield _encode_line(item)
+
+
+class NDJSONResponse(StreamingResponse):
+    """以换行分隔JSON(NDJSON)逐条输出记录的流式响应"""
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, content: Union[Iterable, AsyncIterable], **kwargs):
+        body = _aencode(content) if hasattr(content, '__aiter__') else _encode(content)
+        super().__init__(body, media_type=self.media_type, **kwargs)
+
+
+def _encode_event(event: Optional[Dict]) -> str:
+    if event is None:
+        return ": keepalive\n\n"
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event.get('event', 'message')}")
+    lines.append(f"data: {json.dumps(event.get('data'), ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _aencode_events(events: AsyncIterable) -> AsyncIterable[str]:
+    async for event in events:
+        yield _encode_event(event)
+
+
+class SSEResponse(StreamingResponse):
+    """
+    Server-Sent Events 流式响应
+
+    content 逐个生成 {'event': 事件名, 'data': 数据, 'id': 可选事件ID}，生成None时发送保活注释。
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content: AsyncIterable, **kwargs):
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', **kwargs.pop('headers', {})}
+        super().__init__(_aencode_events(content), media_type=self.media_type, headers=headers, **kwargs)
@@ -7,18 +7,18 @@ import logging
 
 from models import APIResponse
 from dependencies import get_budgets_client
-from dependencies.clients import BudgetsClient
+from dependencies.clients import AsyncClient
 
 router = APIRouter(prefix="/api/v1/budgets", tags=["预算监控"])
 logger = logging.getLogger(__name__)
 
 @router.get("", response_model=APIResponse)
 async def get_budgets(
-    client: BudgetsClient = Depends(get_budgets_client)
+    client: AsyncClient = Depends(get_budgets_client)
 ):
     """获取所有预算信息"""
     try:
-        data = client.get_all_budgets()
+        data = await client.get_all_budgets()
         return APIResponse(
             success=True,
             data=data,
@@ -31,11 +31,11 @@ async def get_budgets(
 @router.get("/{budget_name}", response_model=APIResponse)
 async def get_budget_details(
     budget_name: str,
-    client: BudgetsClient = Depends(get_budgets_client)
+    client: AsyncClient = Depends(get_budgets_client)
 ):
     """获取特定预算的详细信息"""
     try:
-        data = client.get_budget_details(budget_name=budget_name)
+        data = await client.get_budget_details(budget_name=budget_name)
         return APIResponse(
             success=True,
             data=data,
@@ -3,30 +3,47 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from datetime import date
+from typing import List, Optional
 import logging
 
-from models import APIResponse
+from models import APIResponse, NDJSONResponse
 from dependencies import get_cost_client
-from dependencies.clients import CostExplorerClient
+from dependencies.clients import AsyncClient
 
 router = APIRouter(prefix="/api/v1/costs", tags=["成本管理"])
 logger = logging.getLogger(__name__)
 
+def _period_label(days: int, start: Optional[date], end: Optional[date]) -> str:
+    """生成响应消息中的时间范围描述"""
+    if start is not None:
+        return f"{start}至{end or date.today()}"
+    if end is not None:
+        return f"{end}之前{days}天"
+    return f"过去{days}天"
+
 @router.get("/daily", response_model=APIResponse)
 async def get_daily_costs(
     days: int = Query(default=30, ge=1, le=365, description="获取过去多少天的数据"),
+    start: Optional[date] = Query(default=None, description="开始日期(包含)，指定后忽略days"),
+    end: Optional[date] = Query(default=None, description="结束日期(不包含)，默认为今天"),
     granularity: str = Query(default="DAILY", description="数据粒度: DAILY 或 MONTHLY"),
-    client: CostExplorerClient = Depends(get_cost_client)
+    stream: bool = Query(default=False, description="以NDJSON逐条流式返回"),
+    client: AsyncClient = Depends(get_cost_client)
 ):
     """获取每日成本数据"""
     try:
-        data = client.get_daily_costs(days=days, granularity=granularity)
+        if stream:
+            return NDJSONResponse(await client.iter_daily_costs(days=days, granularity=granularity, start_date=start, end_date=end))
+        data = await client.get_daily_costs(days=days, granularity=granularity, start_date=start, end_date=end)
         return APIResponse(
             success=True,
             data=data,
-            message=f"成功获取过去{days}天的成本数据"
+            message=f"成功获取{_period_label(days, start, end)}的成本数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取每日成本数据失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取每日成本数据失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,16 +51,22 @@ async def get_daily_costs(
 @router.get("/by-service", response_model=APIResponse)
 async def get_costs_by_service(
     days: int = Query(default=30, ge=1, le=365, description="获取过去多少天的数据"),
-    client: CostExplorerClient = Depends(get_cost_client)
+    start: Optional[date] = Query(default=None, description="开始日期(包含)，指定后忽略days"),
+    end: Optional[date] = Query(default=None, description="结束日期(不包含)，默认为今天"),
+    top: Optional[int] = Query(default=None, ge=1, description="只返回成本最高的前N个服务"),
+    client: AsyncClient = Depends(get_cost_client)
 ):
     """获取按服务分组的成本数据"""
     try:
-        data = client.get_cost_by_service(days=days)
+        data = await client.get_cost_by_service(days=days, top=top, start_date=start, end_date=end)
         return APIResponse(
             success=True,
             data=data,
-            message=f"成功获取过去{days}天按服务分组的成本数据"
+            message=f"成功获取{_period_label(days, start, end)}按服务分组的成本数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取服务成本数据失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取服务成本数据失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -52,28 +75,72 @@ async def get_costs_by_service(
 async def get_costs_by_tags(
     tag_key: str = Query(description="标签键名"),
     days: int = Query(default=30, ge=1, le=365, description="获取过去多少天的数据"),
-    client: CostExplorerClient = Depends(get_cost_client)
+    start: Optional[date] = Query(default=None, description="开始日期(包含)，指定后忽略days"),
+    end: Optional[date] = Query(default=None, description="结束日期(不包含)，默认为今天"),
+    client: AsyncClient = Depends(get_cost_client)
 ):
     """获取按标签分组的成本数据"""
     try:
-        data = client.get_cost_by_tags(tag_key=tag_key, days=days)
+        data = await client.get_cost_by_tags(tag_key=tag_key, days=days, start_date=start, end_date=end)
         return APIResponse(
             success=True,
             data=data,
-            message=f"成功获取过去{days}天按标签'{tag_key}'分组的成本数据"
+            message=f"成功获取{_period_label(days, start, end)}按标签'{tag_key}'分组的成本数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取标签成本数据失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取标签成本数据失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/query", response_model=APIResponse)
+async def query_costs(
+    group_by: List[str] = Query(description="分组键，可重复指定，如 SERVICE、REGION 或 TAG:<标签键>"),
+    filter: List[str] = Query(default=[], description="过滤条件，格式为 键=值1,值2，可重复指定"),
+    days: int = Query(default=30, ge=1, le=365, description="获取过去多少天的数据"),
+    start: Optional[date] = Query(default=None, description="开始日期(包含)，指定后忽略days"),
+    end: Optional[date] = Query(default=None, description="结束日期(不包含)，默认为今天"),
+    granularity: str = Query(default="MONTHLY", description="数据粒度: DAILY 或 MONTHLY"),
+    client: AsyncClient = Depends(get_cost_client)
+):
+    """按任意多个维度/标签分组查询成本"""
+    try:
+        filters = {}
+        for item in filter:
+            key, sep, values = item.partition('=')
+            if not sep:
+                raise ValueError(f"过滤条件格式错误: {item}")
+            filters.setdefault(key, []).extend(values.split(','))
+        
+        data = await client.query_costs(
+            group_by=group_by,
+            filters=filters,
+            days=days,
+            granularity=granularity,
+            start_date=start,
+            end_date=end
+        )
+        return APIResponse(
+            success=True,
+            data=data,
+            message=f"成功按{', '.join(group_by)}查询{_period_label(days, start, end)}的成本数据"
+        )
+    except ValueError as e:
+        logger.warning(f"多维度成本查询失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"多维度成本查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/forecast", response_model=APIResponse)
 async def get_cost_forecast(
     days: int = Query(default=30, ge=1, le=90, description="预测未来多少天"),
-    client: CostExplorerClient = Depends(get_cost_client)
+    client: AsyncClient = Depends(get_cost_client)
 ):
     """获取成本预测数据"""
     try:
-        data = client.get_cost_forecast(days=days)
+        data = await client.get_cost_forecast(days=days)
         return APIResponse(
             success=True,
             data=data,
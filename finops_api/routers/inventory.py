@@ -2,23 +2,27 @@
 资源清单相关API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 import logging
 
-from models import APIResponse
-from dependencies import get_inventory_client
-from dependencies.clients import ResourceInventoryClient
+from models import APIResponse, NDJSONResponse
+from dependencies import get_inventory_client, get_inventory_index
+from dependencies.clients import AsyncClient
 
 router = APIRouter(prefix="/api/v1/inventory", tags=["资源清单"])
 logger = logging.getLogger(__name__)
 
 @router.get("/ec2", response_model=APIResponse)
 async def get_ec2_inventory(
-    client: ResourceInventoryClient = Depends(get_inventory_client)
+    stream: bool = Query(default=False, description="按页获取并以NDJSON逐条流式返回"),
+    client: AsyncClient = Depends(get_inventory_client)
 ):
     """获取EC2实例清单"""
     try:
-        data = client.get_ec2_inventory()
+        if stream:
+            return NDJSONResponse(await client.iter_ec2_inventory())
+        data = await client.get_ec2_inventory()
         return APIResponse(
             success=True,
             data=data,
@@ -30,11 +34,14 @@ async def get_ec2_inventory(
 
 @router.get("/rds", response_model=APIResponse)
 async def get_rds_inventory(
-    client: ResourceInventoryClient = Depends(get_inventory_client)
+    stream: bool = Query(default=False, description="按页获取并以NDJSON逐条流式返回"),
+    client: AsyncClient = Depends(get_inventory_client)
 ):
     """获取RDS实例清单"""
     try:
-        data = client.get_rds_inventory()
+        if stream:
+            return NDJSONResponse(await client.iter_rds_inventory())
+        data = await client.get_rds_inventory()
         return APIResponse(
             success=True,
             data=data,
@@ -46,27 +53,37 @@ async def get_rds_inventory(
 
 @router.get("/s3", response_model=APIResponse)
 async def get_s3_inventory(
-    client: ResourceInventoryClient = Depends(get_inventory_client)
+    detail: List[str] = Query(default=[], description="附加信息，可重复指定: size(存储量和对象数), encryption(默认加密算法), lifecycle(启用的生命周期规则数)"),
+    stream: bool = Query(default=False, description="按页获取并以NDJSON逐条流式返回"),
+    client: AsyncClient = Depends(get_inventory_client)
 ):
     """获取S3存储桶清单"""
     try:
-        data = client.get_s3_inventory()
+        if stream:
+            return NDJSONResponse(await client.iter_s3_inventory(detail))
+        data = await client.get_s3_inventory(detail)
         return APIResponse(
             success=True,
             data=data,
             message="成功获取S3存储桶清单"
         )
+    except ValueError as e:
+        logger.warning(f"获取S3清单失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取S3清单失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/lambda", response_model=APIResponse)
 async def get_lambda_inventory(
-    client: ResourceInventoryClient = Depends(get_inventory_client)
+    stream: bool = Query(default=False, description="按页获取并以NDJSON逐条流式返回"),
+    client: AsyncClient = Depends(get_inventory_client)
 ):
     """获取Lambda函数清单"""
     try:
-        data = client.get_lambda_inventory()
+        if stream:
+            return NDJSONResponse(await client.iter_lambda_inventory())
+        data = await client.get_lambda_inventory()
         return APIResponse(
             success=True,
             data=data,
@@ -75,3 +92,62 @@ async def get_lambda_inventory(
     except Exception as e:
         logger.error(f"获取Lambda清单失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/changes", response_model=APIResponse)
+async def get_inventory_changes(
+    since: Optional[int] = Query(default=None, ge=0, description="上次返回的 token，不指定时只返回当前 token"),
+    resource_type: List[str] = Query(default=[], description="资源类型，可重复指定: ec2, rds, lambda，默认全部"),
+    client: AsyncClient = Depends(get_inventory_client)
+):
+    """获取指定版本之后新增、删除和修改的资源"""
+    if client.store is None:
+        logger.warning("获取清单变更失败: 未配置资源清单仓库")
+        raise HTTPException(status_code=503, detail="未配置资源清单仓库 (INVENTORY_STORE_PATH)，无法提供清单变更")
+    try:
+        data = await client.get_inventory_changes(since, resource_type)
+        return APIResponse(
+            success=True,
+            data=data,
+            message=f"成功获取清单变更 ({len(data['changes'])} 个资源)"
+        )
+    except ValueError as e:
+        logger.warning(f"获取清单变更失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取清单变更失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search", response_model=APIResponse)
+async def search_inventory(
+    filter: List[str] = Query(default=[], description="过滤条件，格式为 键=值1,值2 或 键!=值1,值2，可重复指定；"
+                                                    "键为 resource_type、region、state、instance_type、availability_zone、"
+                                                    "engine、runtime 或 tag:<标签键>，值为 * 表示任意值"),
+    facet: List[str] = Query(default=[], description="统计分面的字段，可重复指定，默认 resource_type、region、state、instance_type"),
+    limit: int = Query(default=100, ge=0, le=1000, description="返回的最大资源数"),
+    offset: int = Query(default=0, ge=0, description="跳过的资源数"),
+    index: AsyncClient = Depends(get_inventory_index)
+):
+    """按过滤条件查询EC2、RDS、Lambda资源并统计分面"""
+    try:
+        filters, excludes = {}, {}
+        for item in filter:
+            key, sep, values = item.partition('=')
+            if not sep:
+                raise ValueError(f"过滤条件格式错误: {item}")
+            target = filters
+            if key.endswith('!'):
+                key, target = key[:-1], excludes
+            target.setdefault(key, []).extend(values.split(','))
+
+        data = await index.search(filters, excludes, facet, limit, offset)
+        return APIResponse(
+            success=True,
+            data=data,
+            message=f"成功查询资源清单 ({data['total']} 个匹配的资源)"
+        )
+    except ValueError as e:
+        logger.warning(f"查询资源清单失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"查询资源清单失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
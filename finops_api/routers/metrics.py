@@ -3,58 +3,167 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from typing import List, Optional
 import logging
 
-from models import APIResponse
-from dependencies import get_cloudwatch_client
-from dependencies.clients import CloudWatchClient
+from config import Config
+from models import APIResponse, SSEResponse
+from dependencies import get_cloudwatch_client, get_metric_tail_hub
+from dependencies.clients import AsyncClient, MetricTailHub
 
 router = APIRouter(prefix="/api/v1/metrics", tags=["资源监控"])
 logger = logging.getLogger(__name__)
 
+METRIC_NAME_DESCRIPTION = "指标名称，可重复指定或用逗号分隔，all 表示所有支持的指标"
+MAX_POINTS_DESCRIPTION = "每个序列最多返回的数据点数，超出时在服务端降采样"
+DOWNSAMPLE_DESCRIPTION = "降采样方法: lttb(保持曲线形状) 或 minmax(保留每个分桶的峰谷)"
+STREAM_STATS = ('Average', 'Maximum', 'Minimum', 'Sum', 'SampleCount')
+FORMAT_DESCRIPTION = "数据点格式: rows(每个数据点一个对象) 或 columnar(时间戳(秒)和各统计值的并列数组，单位只出现一次)"
+
+def _resolve_metric_names(service: str, values: List[str]) -> List[str]:
+    """
+    解析请求的指标名称列表
+    
+    Args:
+        service: 服务名称，用于展开 all
+        values: 查询参数中的指标名称
+        
+    Returns:
+        去重后的指标名称列表
+    """
+    names = []
+    for value in values:
+        for name in value.split(','):
+            name = name.strip()
+            if name.lower() == 'all':
+                names.extend(Config.get_supported_metrics(service))
+            elif name:
+                names.append(name)
+    if not names:
+        raise ValueError("至少需要一个指标名称")
+    return list(dict.fromkeys(names))
+
 @router.get("/ec2", response_model=APIResponse)
 async def get_ec2_metrics(
     instance_id: Optional[str] = Query(default=None, description="EC2实例ID"),
-    metric_name: str = Query(default="CPUUtilization", description="指标名称"),
-    hours: int = Query(default=24, ge=1, le=168, description="获取过去多少小时的数据"),
-    client: CloudWatchClient = Depends(get_cloudwatch_client)
+    metric_name: List[str] = Query(default=["CPUUtilization"], description=METRIC_NAME_DESCRIPTION),
+    hours: int = Query(default=24, ge=1, le=Config.MAX_HOURS, description="获取过去多少小时的数据，数据点间隔随窗口自动增大"),
+    max_points: Optional[int] = Query(default=None, ge=3, le=10000, description=MAX_POINTS_DESCRIPTION),
+    downsample: str = Query(default="lttb", description=DOWNSAMPLE_DESCRIPTION),
+    format: str = Query(default="rows", description=FORMAT_DESCRIPTION),
+    client: AsyncClient = Depends(get_cloudwatch_client)
 ):
     """获取EC2实例监控指标"""
     try:
-        data = client.get_ec2_metrics(
-            instance_id=instance_id,
-            metric_name=metric_name,
-            hours=hours
-        )
+        metric_names = _resolve_metric_names('ec2', metric_name)
+        if len(metric_names) == 1:
+            data = await client.get_ec2_metrics(
+                instance_id=instance_id,
+                metric_name=metric_names[0],
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
+        else:
+            data = await client.get_ec2_multi_metrics(
+                instance_id=instance_id,
+                metric_names=metric_names,
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
         return APIResponse(
             success=True,
             data=data,
             message=f"成功获取EC2指标数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取EC2指标失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取EC2指标失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ec2/fleet", response_model=APIResponse)
+async def get_ec2_fleet_summary(
+    metric_name: str = Query(default="CPUUtilization", description="指标名称"),
+    hours: int = Query(default=24, ge=1, le=Config.MAX_HOURS, description="获取过去多少小时的数据，数据点间隔随窗口自动增大"),
+    percentile: List[float] = Query(default=[50, 90, 95, 99], description="百分位数，可重复指定"),
+    top: int = Query(default=20, ge=1, le=1000, description="返回平均值最高的前N个实例"),
+    bins: int = Query(default=10, ge=1, le=100, description="实例平均值直方图的分桶数"),
+    tag: List[str] = Query(default=[], description="实例标签过滤，格式为 键=值，可重复指定"),
+    client: AsyncClient = Depends(get_cloudwatch_client)
+):
+    """获取EC2实例群的指标汇总(百分位数、最繁忙实例、分布直方图)"""
+    try:
+        tags = {}
+        for item in tag:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise ValueError(f"标签过滤格式错误: {item}")
+            tags[key] = value
+        
+        data = await client.get_ec2_fleet_summary(
+            metric_name=metric_name,
+            hours=hours,
+            percentiles=percentile,
+            top=top,
+            bins=bins,
+            tags=tags
+        )
+        return APIResponse(
+            success=True,
+            data=data,
+            message=f"成功获取{data['instance_count']}个EC2实例的{metric_name}指标汇总"
+        )
+    except ValueError as e:
+        logger.warning(f"获取EC2实例群指标汇总失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取EC2实例群指标汇总失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/rds", response_model=APIResponse)
 async def get_rds_metrics(
     db_instance_identifier: str = Query(description="RDS实例标识符"),
-    metric_name: str = Query(default="CPUUtilization", description="指标名称"),
-    hours: int = Query(default=24, ge=1, le=168, description="获取过去多少小时的数据"),
-    client: CloudWatchClient = Depends(get_cloudwatch_client)
+    metric_name: List[str] = Query(default=["CPUUtilization"], description=METRIC_NAME_DESCRIPTION),
+    hours: int = Query(default=24, ge=1, le=Config.MAX_HOURS, description="获取过去多少小时的数据，数据点间隔随窗口自动增大"),
+    max_points: Optional[int] = Query(default=None, ge=3, le=10000, description=MAX_POINTS_DESCRIPTION),
+    downsample: str = Query(default="lttb", description=DOWNSAMPLE_DESCRIPTION),
+    format: str = Query(default="rows", description=FORMAT_DESCRIPTION),
+    client: AsyncClient = Depends(get_cloudwatch_client)
 ):
     """获取RDS实例监控指标"""
     try:
-        data = client.get_rds_metrics(
-            db_instance_identifier=db_instance_identifier,
-            metric_name=metric_name,
-            hours=hours
-        )
+        metric_names = _resolve_metric_names('rds', metric_name)
+        if len(metric_names) == 1:
+            data = await client.get_rds_metrics(
+                db_instance_identifier=db_instance_identifier,
+                metric_name=metric_names[0],
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
+        else:
+            data = await client.get_rds_multi_metrics(
+                db_instance_identifier=db_instance_identifier,
+                metric_names=metric_names,
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
         return APIResponse(
             success=True,
             data=data,
             message=f"成功获取RDS指标数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取RDS指标失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取RDS指标失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -62,22 +171,99 @@ async def get_rds_metrics(
 @router.get("/lambda", response_model=APIResponse)
 async def get_lambda_metrics(
     function_name: str = Query(description="Lambda函数名称"),
-    metric_name: str = Query(default="Invocations", description="指标名称"),
-    hours: int = Query(default=24, ge=1, le=168, description="获取过去多少小时的数据"),
-    client: CloudWatchClient = Depends(get_cloudwatch_client)
+    metric_name: List[str] = Query(default=["Invocations"], description=METRIC_NAME_DESCRIPTION),
+    hours: int = Query(default=24, ge=1, le=Config.MAX_HOURS, description="获取过去多少小时的数据，数据点间隔随窗口自动增大"),
+    max_points: Optional[int] = Query(default=None, ge=3, le=10000, description=MAX_POINTS_DESCRIPTION),
+    downsample: str = Query(default="lttb", description=DOWNSAMPLE_DESCRIPTION),
+    format: str = Query(default="rows", description=FORMAT_DESCRIPTION),
+    client: AsyncClient = Depends(get_cloudwatch_client)
 ):
     """获取Lambda函数监控指标"""
     try:
-        data = client.get_lambda_metrics(
-            function_name=function_name,
-            metric_name=metric_name,
-            hours=hours
-        )
+        metric_names = _resolve_metric_names('lambda', metric_name)
+        if len(metric_names) == 1:
+            data = await client.get_lambda_metrics(
+                function_name=function_name,
+                metric_name=metric_names[0],
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
+        else:
+            data = await client.get_lambda_multi_metrics(
+                function_name=function_name,
+                metric_names=metric_names,
+                hours=hours,
+                max_points=max_points,
+                downsample=downsample,
+                format=format
+            )
         return APIResponse(
             success=True,
             data=data,
             message=f"成功获取Lambda指标数据"
         )
+    except ValueError as e:
+        logger.warning(f"获取Lambda指标失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取Lambda指标失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/s3", response_model=APIResponse)
+async def get_s3_metrics(
+    days: int = Query(default=7, ge=1, le=Config.MAX_HOURS // 24, description="获取过去多少天的数据"),
+    bucket_name: Optional[str] = Query(default=None, description="只获取指定存储桶，默认所有存储桶"),
+    format: str = Query(default="rows", description=FORMAT_DESCRIPTION),
+    client: AsyncClient = Depends(get_cloudwatch_client)
+):
+    """获取所有S3存储桶各存储类型的存储量和对象数"""
+    try:
+        data = await client.get_s3_bucket_metrics(days=days, bucket_name=bucket_name, format=format)
+        return APIResponse(
+            success=True,
+            data=data,
+            message=f"成功获取{data['total_buckets']}个S3存储桶的指标数据"
+        )
+    except ValueError as e:
+        logger.warning(f"获取S3指标失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取S3指标失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream")
+async def stream_metric(
+    metric_name: str = Query(description="指标名称"),
+    namespace: str = Query(default="AWS/EC2", description="指标命名空间"),
+    dimension: List[str] = Query(default=[], description="指标维度，格式为 名称=值，可重复指定，如 InstanceId=i-123"),
+    stat: str = Query(default="Average", description="统计方式 (Average, Maximum, Minimum, Sum, SampleCount)"),
+    period: int = Query(default=300, ge=60, le=86400, description="数据点间隔(秒)，必须是60的倍数"),
+    hub: MetricTailHub = Depends(get_metric_tail_hub)
+):
+    """
+    以Server-Sent Events实时推送一个指标序列
+
+    首先推送 snapshot 事件(最近几小时的数据点)，之后每当有新的数据点稳定时推送 datapoints 事件，
+    只包含新增的数据点。订阅同一序列的所有连接共享一个服务端轮询任务。
+    """
+    try:
+        if stat not in STREAM_STATS:
+            raise ValueError(f"不支持的统计方式: {stat}")
+        if period % 60:
+            raise ValueError("数据点间隔必须是60的倍数")
+        dimensions = []
+        for item in dimension:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise ValueError(f"指标维度格式错误: {item}")
+            dimensions.append({'Name': name, 'Value': value})
+    except ValueError as e:
+        logger.warning(f"订阅指标推送失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not hub.accepts(namespace, metric_name, dimensions, stat=stat, period=period):
+        logger.warning(f"订阅指标推送失败: 序列数已达到上限 {hub.max_series}")
+        raise HTTPException(status_code=503, detail=f"实时推送的序列数已达到上限 {hub.max_series}，请稍后重试")
+    return SSEResponse(hub.subscribe(namespace, metric_name, dimensions, stat=stat, period=period))
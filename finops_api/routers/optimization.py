@@ -2,23 +2,25 @@
 优化建议相关API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
 import logging
 
-from models import APIResponse
-from dependencies import get_optimization_client
-from dependencies.clients import OptimizationClient
+from config import Config
+from models import APIResponse, NDJSONResponse
+from dependencies import get_optimization_client, get_idle_detector
+from dependencies.clients import AsyncClient
 
 router = APIRouter(prefix="/api/v1/optimization", tags=["优化建议"])
 logger = logging.getLogger(__name__)
 
 @router.get("/trusted-advisor", response_model=APIResponse)
 async def get_trusted_advisor_checks(
-    client: OptimizationClient = Depends(get_optimization_client)
+    client: AsyncClient = Depends(get_optimization_client)
 ):
     """获取Trusted Advisor检查结果"""
     try:
-        data = client.get_trusted_advisor_checks()
+        data = await client.get_trusted_advisor_checks()
         return APIResponse(
             success=True,
             data=data,
@@ -30,11 +32,11 @@ async def get_trusted_advisor_checks(
 
 @router.get("/compute-optimizer", response_model=APIResponse)
 async def get_compute_optimizer_recommendations(
-    client: OptimizationClient = Depends(get_optimization_client)
+    client: AsyncClient = Depends(get_optimization_client)
 ):
     """获取Compute Optimizer建议"""
     try:
-        data = client.get_compute_optimizer_recommendations()
+        data = await client.get_compute_optimizer_recommendations()
         return APIResponse(
             success=True,
             data=data,
@@ -46,11 +48,11 @@ async def get_compute_optimizer_recommendations(
 
 @router.get("/reserved-instances", response_model=APIResponse)
 async def get_reserved_instance_recommendations(
-    client: OptimizationClient = Depends(get_optimization_client)
+    client: AsyncClient = Depends(get_optimization_client)
 ):
     """获取预留实例建议"""
     try:
-        data = client.get_reserved_instance_recommendations()
+        data = await client.get_reserved_instance_recommendations()
         return APIResponse(
             success=True,
             data=data,
@@ -62,11 +64,11 @@ async def get_reserved_instance_recommendations(
 
 @router.get("/savings-plans", response_model=APIResponse)
 async def get_savings_plans_recommendations(
-    client: OptimizationClient = Depends(get_optimization_client)
+    client: AsyncClient = Depends(get_optimization_client)
 ):
     """获取节省计划建议"""
     try:
-        data = client.get_savings_plans_recommendations()
+        data = await client.get_savings_plans_recommendations()
         return APIResponse(
             success=True,
             data=data,
@@ -75,3 +77,30 @@ async def get_savings_plans_recommendations(
     except Exception as e:
         logger.error(f"获取节省计划建议失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/idle-resources")
+async def get_idle_resources(
+    resource_type: List[str] = Query(default=["ec2", "rds", "lambda"], description="检测的资源类型 (ec2, rds, lambda)，可重复指定"),
+    hours: int = Query(default=Config.IDLE_LOOKBACK_HOURS, ge=1, le=Config.MAX_HOURS, description="统计过去多少小时的指标"),
+    cpu_percent: float = Query(default=Config.IDLE_CPU_PERCENT, ge=0, le=100, description="EC2平均CPU使用率阈值(%)"),
+    network_mb_per_day: float = Query(default=Config.IDLE_NETWORK_MB_PER_DAY, ge=0, description="EC2日均网络流量(入+出)阈值(MB)"),
+    rds_connections: float = Query(default=Config.IDLE_RDS_CONNECTIONS, ge=0, description="RDS最大连接数阈值"),
+    lambda_invocations: float = Query(default=Config.IDLE_LAMBDA_INVOCATIONS, ge=0, description="Lambda调用次数阈值"),
+    client: AsyncClient = Depends(get_idle_detector)
+):
+    """以NDJSON逐条流式返回低于阈值的闲置资源，资源类型在开始输出前校验"""
+    try:
+        return NDJSONResponse(await client.iter_idle_resources(
+            resource_types=resource_type,
+            hours=hours,
+            cpu_percent=cpu_percent,
+            network_mb_per_day=network_mb_per_day,
+            rds_connections=rds_connections,
+            lambda_invocations=lambda_invocations
+        ))
+    except ValueError as e:
+        logger.warning(f"检测闲置资源失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"检测闲置资源失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,31 +3,100 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, Awaitable, Dict, Tuple
+import asyncio
 import logging
 
+from config import Config
 from models import APIResponse
 from dependencies import get_cost_client, get_budgets_client
-from dependencies.clients import CostExplorerClient, BudgetsClient
+from dependencies.clients import AsyncClient
 
 router = APIRouter(prefix="/api/v1/reports", tags=["综合报告"])
 logger = logging.getLogger(__name__)
 
+async def _gather_sections(
+    sections: Dict[str, Awaitable],
+    timeout: float
+) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
+    """
+    并发获取报告各部分数据
+
+    所有部分同时开始，共享同一个截止时间；超时或失败的部分不影响其他部分。
+
+    Args:
+        sections: 部分名称到协程的映射
+        timeout: 整个报告的截止时间(秒)
+
+    Returns:
+        (各部分数据, 各部分状态)
+    """
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in sections.items()}
+    _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    status = {}
+    for name, task in tasks.items():
+        if task in pending:
+            results[name] = None
+            status[name] = {"ok": False, "error": f"超过{timeout}秒截止时间"}
+        elif task.exception() is not None:
+            logger.error(f"获取报告部分 {name} 失败: {str(task.exception())}")
+            results[name] = None
+            status[name] = {"ok": False, "error": str(task.exception())}
+        else:
+            results[name] = task.result()
+            status[name] = {"ok": True, "error": None}
+
+    return results, status
+
 @router.get("/cost-summary", response_model=APIResponse)
 async def get_cost_summary(
     days: int = Query(default=30, ge=1, le=365, description="统计过去多少天的数据"),
-    cost_client: CostExplorerClient = Depends(get_cost_client),
-    budgets_client: BudgetsClient = Depends(get_budgets_client)
+    timeout: float = Query(default=Config.REPORT_TIMEOUT, gt=0, le=120, description="整个报告的截止时间(秒)"),
+    cost_client: AsyncClient = Depends(get_cost_client),
+    budgets_client: AsyncClient = Depends(get_budgets_client)
 ):
     """获取成本汇总报告"""
     try:
-        # 获取成本数据
-        daily_costs = cost_client.get_daily_costs(days=days)
-        service_costs = cost_client.get_cost_by_service(days=days)
-        cost_forecast = cost_client.get_cost_forecast(days=7)
-        
-        # 获取预算数据
-        budgets_data = budgets_client.get_all_budgets()
-        
+        # 成本与预算数据相互独立，并发获取
+        results, sections = await _gather_sections({
+            "daily_costs": cost_client.get_daily_costs(days=days),
+            "service_costs": cost_client.get_cost_by_service(days=days),
+            "cost_forecast": cost_client.get_cost_forecast(days=7),
+            "budgets": budgets_client.get_all_budgets()
+        }, timeout=timeout)
+
+        if not any(section["ok"] for section in sections.values()):
+            raise RuntimeError("; ".join(f"{name}: {section['error']}" for name, section in sections.items()))
+
+        daily_costs = results["daily_costs"]
+        service_costs = results["service_costs"]
+        cost_forecast = results["cost_forecast"]
+        budgets_data = results["budgets"]
+
+        # 汇总指标只依赖已成功获取的部分，缺失部分对应的指标为None
+        summary_metrics = {
+            "total_cost": None,
+            "average_daily_cost": None,
+            "top_service": None,
+            "forecast_next_week": None,
+            "active_budgets": None
+        }
+        if daily_costs is not None:
+            summary_metrics["total_cost"] = daily_costs.get("total_cost", 0)
+            summary_metrics["average_daily_cost"] = daily_costs.get("total_cost", 0) / days if days > 0 else 0
+        if service_costs is not None:
+            summary_metrics["top_service"] = service_costs["services"][0].get("name", "N/A") if service_costs.get("services") else "N/A"
+        if cost_forecast is not None:
+            summary_metrics["forecast_next_week"] = cost_forecast.get("total_forecast", 0)
+        if budgets_data is not None:
+            summary_metrics["active_budgets"] = len(budgets_data.get("budgets", []))
+
+        partial = not all(section["ok"] for section in sections.values())
+
         # 生成汇总报告
         summary = {
             "report_period": f"过去{days}天",
@@ -35,19 +104,15 @@ async def get_cost_summary(
             "service_costs": service_costs,
             "cost_forecast": cost_forecast,
             "budgets": budgets_data,
-            "summary_metrics": {
-                "total_cost": daily_costs.get("total_cost", 0),
-                "average_daily_cost": daily_costs.get("total_cost", 0) / days if days > 0 else 0,
-                "top_service": service_costs.get("services", [{}])[0].get("service", "N/A") if service_costs.get("services") else "N/A",
-                "forecast_next_week": cost_forecast.get("total_forecast", 0),
-                "active_budgets": len(budgets_data.get("budgets", []))
-            }
+            "summary_metrics": summary_metrics,
+            "sections": sections,
+            "partial": partial
         }
-        
+
         return APIResponse(
             success=True,
             data=summary,
-            message=f"成功生成过去{days}天的成本汇总报告"
+            message=f"成功生成过去{days}天的成本汇总报告" + ("(部分数据缺失)" if partial else "")
         )
     except Exception as e:
         logger.error(f"获取成本汇总报告失败: {str(e)}")
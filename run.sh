@@ -239,6 +239,9 @@ check_status() {
 run_tests() {
     echo -e "${YELLOW}运行测试套件...${NC}"
     cd "$PROJECT_ROOT"
+    # 单元测试不需要AWS凭证；simple_test.py 等脚本需要运行中的API服务器
+    uv run --with pytest python -m pytest -q tests \
+        --ignore=tests/simple_test.py --ignore=tests/test_client.py --ignore=tests/test_startup.py || return 1
     uv run python tests/simple_test.py
 }
 
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+pytest 配置
+单元测试直接导入 finops_api 下的模块(与 main.py 的导入方式一致)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'finops_api'))
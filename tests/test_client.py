@@ -7,7 +7,7 @@ AWS FinOps API 测试客户端
 import requests
 import json
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 class FinOpsAPIClient:
     """FinOps API客户端"""
@@ -69,6 +69,12 @@ class FinOpsAPIClient:
         params = {'tag_key': tag_key, 'days': days}
         return self._make_request('GET', '/api/v1/costs/by-tags', params=params)
     
+    def query_costs(self, group_by: List[str], filters: Optional[List[str]] = None,
+                    days: int = 30, granularity: str = 'MONTHLY') -> Dict:
+        """按多个维度分组查询成本数据，filters 格式为 键=值1,值2"""
+        params = {'group_by': group_by, 'filter': filters or [], 'days': days, 'granularity': granularity}
+        return self._make_request('GET', '/api/v1/costs/query', params=params)
+    
     def get_cost_forecast(self, days: int = 30) -> Dict:
         """获取成本预测数据"""
         params = {'days': days}
@@ -113,6 +119,33 @@ class FinOpsAPIClient:
         }
         return self._make_request('GET', '/api/v1/metrics/lambda', params=params)
     
+    def get_ec2_fleet_summary(self, metric_name: str = 'CPUUtilization', hours: int = 24,
+                              top: int = 20, tags: Optional[List[str]] = None) -> Dict:
+        """获取EC2实例群的指标汇总(百分位数、直方图和平均值最高的实例)，tags 格式为 键=值"""
+        params = {'metric_name': metric_name, 'hours': hours, 'top': top, 'tag': tags or []}
+        return self._make_request('GET', '/api/v1/metrics/ec2/fleet', params=params)
+    
+    def get_s3_metrics(self, days: int = 7, bucket_name: Optional[str] = None) -> Dict:
+        """获取S3存储桶大小和对象数量(按存储桶所在区域查询)"""
+        params = {'days': days}
+        if bucket_name:
+            params['bucket_name'] = bucket_name
+        return self._make_request('GET', '/api/v1/metrics/s3', params=params)
+    
+    def get_inventory_changes(self, since: Optional[int] = None,
+                              resource_types: Optional[List[str]] = None) -> Dict:
+        """获取上次返回的 token 之后资源清单的变更，不指定 since 时只返回当前 token"""
+        params = {'resource_type': resource_types or []}
+        if since is not None:
+            params['since'] = since
+        return self._make_request('GET', '/api/v1/inventory/changes', params=params)
+    
+    def search_inventory(self, filters: Optional[List[str]] = None, facets: Optional[List[str]] = None,
+                         limit: int = 100, offset: int = 0) -> Dict:
+        """按过滤条件查询资源清单并统计分面，filters 格式为 键=值1,值2 或 键!=值1,值2"""
+        params = {'filter': filters or [], 'facet': facets or [], 'limit': limit, 'offset': offset}
+        return self._make_request('GET', '/api/v1/inventory/search', params=params)
+    
     def get_cost_summary(self, days: int = 30) -> Dict:
         """获取成本汇总报告"""
         params = {'days': days}
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+时间序列降采样单元测试
+"""
+
+import numpy as np
+import pytest
+
+from dependencies.clients.downsample import downsample_indices, lttb, minmax
+
+
+def series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64) * 60, rng.normal(size=n).cumsum()
+
+
+def test_short_series_is_returned_unchanged():
+    x, y = series(10)
+    for method in ('lttb', 'minmax'):
+        assert downsample_indices(x, y, 10, method).tolist() == list(range(10))
+
+
+def test_unknown_method_is_rejected():
+    x, y = series(10)
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 5, 'mean')
+
+
+@pytest.mark.parametrize('n, threshold', [(1000, 100), (1001, 3), (10, 9), (500, 499)])
+def test_lttb_keeps_endpoints_and_threshold(n, threshold):
+    x, y = series(n)
+    indices = lttb(x, y, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_keeps_isolated_peak():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[437] = 100.0
+    assert 437 in lttb(x, y, 50)
+
+
+def test_lttb_small_threshold_returns_all_points():
+    x, y = series(20)
+    assert lttb(x, y, 2).tolist() == list(range(20))
+
+
+@pytest.mark.parametrize('n, max_points', [(1000, 100), (1001, 100), (7, 2), (1000, 7)])
+def test_minmax_bounds_and_extremes(n, max_points):
+    _, y = series(n)
+    indices = minmax(y, max_points)
+    assert len(indices) <= max_points
+    assert (np.diff(indices) > 0).all()
+    assert 0 <= indices[0] and indices[-1] < n
+    assert int(y.argmin()) in indices and int(y.argmax()) in indices
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+资源清单索引单元测试
+查询结果和分面统计与逐条遍历资源的结果比较
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from dependencies.clients.inventory_index import FACET_LIMIT, INDEXED_TYPES, InventoryIndex
+
+REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1']
+
+
+class FakeInventory:
+    """返回固定清单的资源清单客户端"""
+
+    def __init__(self, seed: int = 0, size: int = 3000):
+        rng = random.Random(seed)
+        self.ec2 = {'instances': [
+            {
+                'instance_id': f'i-{i}',
+                'region': rng.choice(REGIONS),
+                'state': rng.choice(['running'] * 8 + ['stopped', 'terminated']),
+                'instance_type': rng.choice(['t3.micro', 'm5.large', 'c5.xlarge', 'r5.2xlarge']),
+                'availability_zone': rng.choice(['a', 'b', 'c']),
+                'tags': {
+                    'Name': f'web-{i}',
+                    **({'env': rng.choice(['prod', 'dev'])} if rng.random() < 0.7 else {}),
+                    **({'team': 'data'} if rng.random() < 0.005 else {})
+                }
+            }
+            for i in range(size)
+        ]}
+        self.rds = {'instances': [
+            {
+                'db_instance_identifier': f'db-{i}',
+                'region': rng.choice(REGIONS),
+                'db_instance_status': rng.choice(['available', 'stopped']),
+                'db_instance_class': rng.choice(['db.t3.micro', 'db.m5.large']),
+                'availability_zone': rng.choice(['a', 'b', None]),
+                'engine': rng.choice(['mysql', 'postgres']),
+                'tags': {'env': 'prod'} if i % 2 else {}
+            }
+            for i in range(size // 10)
+        ]}
+        self.functions = {'functions': [
+            {
+                'function_name': f'fn-{i}',
+                'region': rng.choice(REGIONS),
+                'runtime': rng.choice(['python3.12', 'nodejs20.x']),
+                'tags': {}
+            }
+            for i in range(size // 5)
+        ]}
+
+    def get_ec2_inventory(self):
+        return self.ec2
+
+    def get_rds_inventory(self):
+        return self.rds
+
+    def get_lambda_inventory(self):
+        return self.functions
+
+
+def documents(inventory: FakeInventory):
+    """按索引的顺序展开资源为 {字段: 值}"""
+    sources = (('ec2', inventory.ec2['instances']), ('rds', inventory.rds['instances']),
+               ('lambda', inventory.functions['functions']))
+    for resource_type, resources in sources:
+        id_field, fields = INDEXED_TYPES[resource_type]
+        for resource in resources:
+            values = {'resource_type': resource_type, 'region': resource['region']}
+            values.update((field, resource.get(record_field)) for field, record_field in fields.items())
+            values.update((f'tag:{key}', value) for key, value in resource['tags'].items())
+            yield resource[id_field], {field: value for field, value in values.items() if value is not None}
+
+
+def matches(values, field, wanted):
+    if field not in values:
+        return False
+    return '*' in wanted or values[field] in wanted
+
+
+def brute_force(inventory, filters, excludes, facets):
+    matched = [
+        (resource_id, values) for resource_id, values in documents(inventory)
+        if all(matches(values, field, wanted) for field, wanted in filters.items())
+        and not any(matches(values, field, wanted) for field, wanted in excludes.items())
+    ]
+    counts = {field: Counter(values[field] for _, values in matched if field in values) for field in facets}
+    return [resource_id for resource_id, _ in matched], counts
+
+
+QUERIES = [
+    ({}, {}),
+    ({'resource_type': ['ec2']}, {}),
+    ({'state': ['running'], 'region': ['us-east-1', 'eu-west-1']}, {}),
+    ({'tag:env': ['prod']}, {'instance_type': ['t3.micro']}),
+    ({'tag:env': ['*']}, {}),
+    ({}, {'tag:env': ['*']}),
+    ({'tag:team': ['data']}, {}),
+    ({'tag:Name': ['web-1', 'web-2', 'missing']}, {}),
+    ({'engine': ['postgres'], 'availability_zone': ['a']}, {}),
+    ({'runtime': ['python3.12']}, {'region': ['us-west-2']}),
+    ({'state': ['running']}, {'state': ['running']}),
+    ({'tag:unknown': ['x']}, {}),
+]
+FACETS = ['resource_type', 'region', 'state', 'instance_type', 'availability_zone', 'engine', 'runtime',
+          'tag:env', 'tag:team']
+
+
+@pytest.mark.parametrize('filters, excludes', QUERIES)
+def test_search_matches_brute_force(filters, excludes):
+    inventory = FakeInventory()
+    index = InventoryIndex(inventory)
+    expected_ids, expected_facets = brute_force(inventory, filters, excludes, FACETS)
+
+    result = index.search(filters, excludes, facets=FACETS, limit=len(expected_ids) + 1)
+    assert result['total'] == len(expected_ids)
+    assert [resource['resource_id'] for resource in result['resources']] == expected_ids
+    for field in FACETS:
+        assert result['facets'][field] == dict(expected_facets[field])
+        assert list(result['facets'][field].values()) == sorted(result['facets'][field].values(), reverse=True)
+
+
+def test_pagination():
+    inventory = FakeInventory()
+    index = InventoryIndex(inventory)
+    expected_ids, _ = brute_force(inventory, {'state': ['stopped']}, {}, [])
+    page = index.search({'state': ['stopped']}, limit=10, offset=5)
+    assert page['total'] == len(expected_ids)
+    assert [resource['resource_id'] for resource in page['resources']] == expected_ids[5:15]
+
+
+def test_facet_limit_keeps_largest_values():
+    inventory = FakeInventory()
+    index = InventoryIndex(inventory)
+    _, expected = brute_force(inventory, {'resource_type': ['ec2']}, {}, ['tag:Name'])
+    facet = index.search({'resource_type': ['ec2']}, facets=['tag:Name'], limit=0)['facets']['tag:Name']
+    assert len(facet) == FACET_LIMIT
+    assert all(expected['tag:Name'][value] == count for value, count in facet.items())
+
+
+def test_unsupported_field_is_rejected():
+    with pytest.raises(ValueError):
+        InventoryIndex(FakeInventory()).search({'color': ['red']})
+
+
+def test_index_is_rebuilt_only_when_inventory_changes():
+    inventory = FakeInventory(size=100)
+    index = InventoryIndex(inventory)
+    index.search()
+    index.search({'state': ['running']})
+    assert index.stats()['builds'] == 1
+
+    inventory.ec2 = {'instances': inventory.ec2['instances'][:10]}
+    assert index.search({'resource_type': ['ec2']})['total'] == 10
+    assert index.stats()['builds'] == 2
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+资源清单路由单元测试
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import Config
+from dependencies import get_inventory_client, get_inventory_index
+from dependencies.clients import AsyncClient, InventoryIndex, ResourceInventoryClient
+from dependencies.clients.executor import ServiceExecutor
+from routers import inventory
+
+
+@pytest.fixture
+def inventory_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'INVENTORY_STORE_PATH', str(tmp_path / 'inventory.db'))
+    return ResourceInventoryClient()
+
+
+@pytest.fixture
+def client(inventory_client):
+    app = FastAPI()
+    app.include_router(inventory.router)
+    executor = ServiceExecutor()
+    proxy = AsyncClient(inventory_client, 'inventory', executor)
+    index = AsyncClient(InventoryIndex(inventory_client), 'inventory', executor)
+    app.dependency_overrides[get_inventory_client] = lambda: proxy
+    app.dependency_overrides[get_inventory_index] = lambda: index
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_unsupported_s3_detail_is_bad_request(client, stream):
+    response = client.get('/api/v1/inventory/s3', params={'detail': 'bogus', 'stream': stream})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "不支持的存储桶信息: bogus"
+
+
+def fixed_inventory(inventory_client):
+    """替换清单获取方法，避免调用AWS"""
+    instances = {'instances': [{'instance_id': 'i-1', 'region': 'us-east-1', 'state': 'running'}]}
+    inventory_client.get_ec2_inventory = lambda: instances
+    inventory_client.get_rds_inventory = lambda: {'instances': []}
+    inventory_client.get_lambda_inventory = lambda: {'functions': []}
+    inventory_client.store.save_snapshot('ec2', instances['instances'], 'instance_id')
+
+
+def test_unsupported_change_resource_type_is_bad_request(client):
+    response = client.get('/api/v1/inventory/changes', params={'resource_type': 's3'})
+    assert response.status_code == 400
+
+
+def test_future_change_token_is_bad_request(client, inventory_client):
+    fixed_inventory(inventory_client)
+    assert client.get('/api/v1/inventory/changes').json()['data']['token'] == 1
+    response = client.get('/api/v1/inventory/changes', params={'since': 5})
+    assert response.status_code == 400
+
+
+def test_changes_without_store_are_unavailable(client, inventory_client):
+    inventory_client.store = None
+    assert client.get('/api/v1/inventory/changes').status_code == 503
+
+
+@pytest.mark.parametrize('filters', [['bogus'], ['color=red'], ['state=running', 'tag=x']])
+def test_invalid_search_filter_is_bad_request(client, inventory_client, filters):
+    fixed_inventory(inventory_client)
+    assert client.get('/api/v1/inventory/search', params={'filter': filters}).status_code == 400
+
+
+def test_search(client, inventory_client):
+    fixed_inventory(inventory_client)
+    response = client.get('/api/v1/inventory/search', params={'filter': ['state=running'], 'facet': ['region']})
+    assert response.status_code == 200
+    assert response.json()['data']['facets'] == {'region': {'us-east-1': 1}}
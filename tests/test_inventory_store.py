@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+资源清单仓库单元测试
+"""
+
+import pytest
+
+from dependencies.clients.inventory_store import InventoryStore
+
+
+def instance(instance_id: str, state: str = 'running', region: str = 'us-east-1'):
+    return {'instance_id': instance_id, 'region': region, 'state': state}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return InventoryStore(str(tmp_path / 'inventory.db'))
+
+
+def changes(store: InventoryStore, since: int):
+    return {
+        change['resource_id']: change
+        for change in store.changes_since(since, ['ec2'])['changes']
+    }
+
+
+def test_unchanged_snapshot_creates_no_version(store):
+    assert store.save_snapshot('ec2', [instance('i-1')], 'instance_id') == 1
+    assert store.save_snapshot('ec2', [instance('i-1')], 'instance_id') is None
+    assert store.changes_since(None, ['ec2']) == {'token': 1, 'reset': False, 'changes': []}
+
+
+def test_modified_fields(store):
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1', state='stopped')], 'instance_id')
+    result = changes(store, 1)
+    assert result['i-1']['change'] == 'modified'
+    assert result['i-1']['changed_fields'] == ['state']
+    assert result['i-1']['data']['state'] == 'stopped'
+
+
+def test_added_then_removed_is_omitted(store):
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    assert changes(store, 1) == {}
+    assert changes(store, 2)['i-2']['change'] == 'removed'
+
+
+def test_added_then_modified_stays_added(store):
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2', state='stopped')], 'instance_id')
+    result = changes(store, 1)
+    assert result['i-2']['change'] == 'added'
+    assert result['i-2']['changed_fields'] is None
+    assert result['i-2']['data']['state'] == 'stopped'
+
+
+def test_removed_then_readded_is_modified(store):
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2', state='stopped')], 'instance_id')
+    result = changes(store, 1)
+    assert result['i-2']['change'] == 'modified'
+    assert result['i-2']['changed_fields'] is None
+
+
+def test_skipped_region_is_not_removed(store):
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2', region='eu-west-1')], 'instance_id')
+    assert store.save_snapshot('ec2', [instance('i-1')], 'instance_id', skip_regions=['eu-west-1']) is None
+
+
+def test_pruned_changes_require_reset(tmp_path):
+    path = str(tmp_path / 'inventory.db')
+    InventoryStore(path).save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    # 保留期为0时保存后立即删除所有变更记录
+    store = InventoryStore(path, changes_retention_days=0)
+    store.save_snapshot('ec2', [instance('i-1'), instance('i-2')], 'instance_id')
+
+    assert store.changes_since(1, ['ec2']) == {'token': 2, 'reset': True, 'changes': []}
+    assert store.changes_since(2, ['ec2']) == {'token': 2, 'reset': False, 'changes': []}
+
+
+def test_future_token_is_rejected(store):
+    store.save_snapshot('ec2', [instance('i-1')], 'instance_id')
+    with pytest.raises(ValueError):
+        store.changes_since(5, ['ec2'])
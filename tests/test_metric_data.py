@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+GetMetricData 批量查询单元测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import Config
+from dependencies.clients.cloudwatch_client import CloudWatchClient
+from dependencies.clients.metric_data import MetricDataEngine
+
+
+def test_time_chunks_single_chunk_within_limit():
+    engine = MetricDataEngine(client=None)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    assert engine._time_chunks(start, end, 60, 10) == [(start, end)]
+
+
+def test_time_chunks_respect_datapoint_limit():
+    engine = MetricDataEngine(client=None)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=14)
+    query_count = 500
+    chunks = engine._time_chunks(start, end, 60, query_count)
+
+    assert chunks[0][0] == start and chunks[-1][1] == end
+    assert all(prev[1] == cur[0] for prev, cur in zip(chunks, chunks[1:]))
+    for chunk_start, chunk_end in chunks:
+        points = (chunk_end - chunk_start).total_seconds() / 60
+        assert points * query_count <= MetricDataEngine.MAX_DATAPOINTS_PER_CALL
+        assert (chunk_start - start).total_seconds() % 60 == 0
+
+
+@pytest.mark.parametrize('age, expected', [
+    (timedelta(days=1), 60),
+    (timedelta(days=15, minutes=30), 60),
+    (timedelta(days=16), 300),
+    (timedelta(days=63, minutes=30), 300),
+    (timedelta(days=64), 3600),
+    (timedelta(days=455), 3600),
+])
+def test_choose_period_follows_retention_tiers(age, expected):
+    start = datetime.now(timezone.utc) - age
+    assert MetricDataEngine.choose_period(start, start + timedelta(hours=1), 60, 1440) == expected
+
+
+def test_choose_period_beyond_retention_is_rejected():
+    start = datetime.now(timezone.utc) - timedelta(days=456)
+    with pytest.raises(ValueError):
+        MetricDataEngine.choose_period(start, start + timedelta(hours=1), 60, 1440)
+
+
+def test_choose_period_supports_naive_utc():
+    start = datetime.utcnow() - timedelta(days=20)
+    assert MetricDataEngine.choose_period(start, start + timedelta(hours=1), 60, 1440) == 300
+
+
+def test_choose_period_limits_points_and_honours_minimum():
+    start = datetime.now(timezone.utc) - timedelta(days=7)
+    end = start + timedelta(days=7)
+    period = MetricDataEngine.choose_period(start, end, 60, 1440)
+    assert period == 900
+    assert (end - start).total_seconds() / period <= 1440
+    assert MetricDataEngine.choose_period(start, start + timedelta(hours=1), 3600, 1440) == 3600
+
+
+def test_client_period_uses_retention_tiers_below_default_floor(monkeypatch):
+    end = datetime.utcnow()
+    window = end - timedelta(days=20)
+    assert CloudWatchClient._choose_period(window, end) == Config.METRICS_DEFAULT_PERIOD
+
+    # 调低默认间隔并放宽数据点上限后，开始时间超过15天的窗口按保留期使用300秒间隔
+    monkeypatch.setattr(Config, 'METRICS_DEFAULT_PERIOD', 60)
+    monkeypatch.setattr(Config, 'METRICS_MAX_SERIES_POINTS', 100000)
+    assert CloudWatchClient._choose_period(window, end) == 300
+    assert CloudWatchClient._choose_period(end - timedelta(days=1), end) == 60
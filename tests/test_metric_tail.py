@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+指标实时推送单元测试
+"""
+
+import asyncio
+
+from dependencies.clients.metric_tail import MetricTailHub
+
+DIMENSIONS = [{'Name': 'InstanceId', 'Value': 'i-1'}]
+
+
+class FakeCloudWatch:
+    """返回固定数据点的CloudWatch客户端异步代理"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def get_settled_datapoints(self, namespace, metric_name, dimensions, stat, period, since):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("throttled")
+        return {'timestamps': [since], 'values': [1.0], 'settled_until': since + period}
+
+
+def sleeps(monkeypatch):
+    """记录轮询任务的等待时间，第二次等待时结束轮询"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) > 1:
+            raise asyncio.CancelledError
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def poll(hub: MetricTailHub, period: int):
+    async def run():
+        subscription = hub.subscribe('AWS/EC2', 'CPUUtilization', DIMENSIONS, period=period)
+        await subscription.__anext__()
+        tail = next(iter(hub._tails.values()))
+        try:
+            await tail.task
+        except asyncio.CancelledError:
+            pass
+        await subscription.aclose()
+    asyncio.run(run())
+
+
+def test_polls_once_per_period_after_boundary(monkeypatch):
+    monkeypatch.setattr('time.time', lambda: 10_000 * 300 + 42.0)
+    delays = sleeps(monkeypatch)
+    client = FakeCloudWatch()
+    poll(MetricTailHub(client, poll_interval=60), period=300)
+
+    assert client.calls == 2
+    assert delays == [300 - 42.0 + MetricTailHub.POLL_DELAY] * 2
+
+
+def test_failed_poll_retries_within_poll_interval(monkeypatch):
+    monkeypatch.setattr('time.time', lambda: 10_000 * 300 + 42.0)
+    delays = sleeps(monkeypatch)
+    poll(MetricTailHub(FakeCloudWatch(fail=True), poll_interval=60, keepalive=0.01), period=300)
+
+    assert delays == [60, 60]
+
+
+def test_series_cap_and_slow_subscriber_resync(monkeypatch):
+    sleeps(monkeypatch)
+
+    async def run():
+        hub = MetricTailHub(FakeCloudWatch(), max_series=1, queue_size=2)
+        subscription = hub.subscribe('AWS/EC2', 'CPUUtilization', DIMENSIONS)
+        assert (await subscription.__anext__())['event'] == 'snapshot'
+
+        assert hub.accepts('AWS/EC2', 'CPUUtilization', DIMENSIONS)
+        assert not hub.accepts('AWS/EC2', 'NetworkIn', DIMENSIONS)
+        rejected = hub.subscribe('AWS/EC2', 'NetworkIn', DIMENSIONS)
+        assert (await rejected.__anext__())['event'] == 'error'
+
+        tail = next(iter(hub._tails.values()))
+        for i in range(5):
+            hub._broadcast(tail, {'event': 'datapoints', 'data': i})
+        queue = next(iter(tail.subscribers))
+        # 积压超出上限时丢弃旧事件，从最新快照重新开始
+        assert queue.qsize() <= 2 and queue.get_nowait()['event'] == 'snapshot'
+        assert hub.stats()['resyncs'] >= 1 and hub.stats()['rejected'] == 2
+        await subscription.aclose()
+        assert hub.stats()['series'] == 0
+    asyncio.run(run())
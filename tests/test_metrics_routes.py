@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+资源监控路由单元测试
+参数错误在访问AWS之前被拒绝，应返回400而不是500
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dependencies import get_cloudwatch_client
+from dependencies.clients import AsyncClient, CloudWatchClient
+from dependencies.clients.executor import ServiceExecutor
+from routers import metrics
+
+SERIES_ROUTES = [
+    ('/api/v1/metrics/ec2', {'instance_id': 'i-1'}),
+    ('/api/v1/metrics/rds', {'db_instance_identifier': 'db-1'}),
+    ('/api/v1/metrics/lambda', {'function_name': 'fn-1'})
+]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    cloudwatch = AsyncClient(CloudWatchClient(), 'cloudwatch', ServiceExecutor())
+    app.dependency_overrides[get_cloudwatch_client] = lambda: cloudwatch
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('path, params', SERIES_ROUTES)
+@pytest.mark.parametrize('metric_name', [',', ' ', ' , '])
+def test_blank_metric_name_is_bad_request(client, path, params, metric_name):
+    response = client.get(path, params={**params, 'metric_name': metric_name})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "至少需要一个指标名称"
+
+
+@pytest.mark.parametrize('params', [
+    {'percentile': [50, 150]},
+    {'percentile': [-1]},
+    {'tag': ['env']}
+])
+def test_invalid_fleet_summary_parameters_are_bad_request(client, params):
+    assert client.get('/api/v1/metrics/ec2/fleet', params=params).status_code == 400
+
+
+@pytest.mark.parametrize('path, params', SERIES_ROUTES)
+@pytest.mark.parametrize('metric_name', ['CPUUtilization', 'CPUUtilization,Duration'])
+def test_unknown_downsample_method_is_bad_request(client, path, params, metric_name):
+    response = client.get(path, params={**params, 'metric_name': metric_name, 'downsample': 'bogus'})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "不支持的降采样方法: bogus"
+
+
+@pytest.mark.parametrize('path, params', SERIES_ROUTES + [('/api/v1/metrics/s3', {})])
+def test_unknown_format_is_bad_request(client, path, params):
+    response = client.get(path, params={**params, 'format': 'xml'})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "不支持的数据点格式: xml"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+优化建议路由单元测试
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dependencies import get_idle_detector
+from dependencies.clients import AsyncClient, IdleResourceDetector
+from dependencies.clients.executor import ServiceExecutor
+from routers import optimization
+
+
+class EmptyInventory:
+    """没有任何资源的资源清单客户端"""
+
+    def get_ec2_inventory(self):
+        return {'instances': []}
+
+    def get_rds_inventory(self):
+        return {'instances': []}
+
+    def get_lambda_inventory(self):
+        return {'functions': []}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(optimization.router)
+    detector = AsyncClient(IdleResourceDetector(EmptyInventory(), cloudwatch=None), 'optimization', ServiceExecutor())
+    app.dependency_overrides[get_idle_detector] = lambda: detector
+    return TestClient(app)
+
+
+def test_unsupported_resource_type_is_rejected_before_streaming(client):
+    response = client.get('/api/v1/optimization/idle-resources', params={'resource_type': ['ec2', 's3']})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "不支持的资源类型: s3"
+
+
+def test_no_resources_streams_empty_body(client):
+    response = client.get('/api/v1/optimization/idle-resources')
+    assert response.status_code == 200
+    assert response.text == ''
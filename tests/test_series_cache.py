@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+时间序列缓存单元测试
+"""
+
+from datetime import datetime, timezone
+
+from dependencies.clients.series_cache import SeriesCache
+
+PERIOD = 300
+KEY = SeriesCache.key('AWS/EC2', 'CPUUtilization', [{'Name': 'InstanceId', 'Value': 'i-1'}], PERIOD, 'Average')
+
+
+def points(start: int, end: int, value: float = 1.0):
+    """[start, end) 内每个间隔一个数据点"""
+    timestamps = [datetime.fromtimestamp(ts, timezone.utc) for ts in range(start, end, PERIOD)]
+    return timestamps, [value] * len(timestamps)
+
+
+def test_key_ignores_dimension_order_and_separates_regions():
+    dimensions = [{'Name': 'A', 'Value': '1'}, {'Name': 'B', 'Value': '2'}]
+    key = SeriesCache.key('NS', 'M', dimensions, PERIOD, 'Sum')
+    assert key == SeriesCache.key('NS', 'M', list(reversed(dimensions)), PERIOD, 'Sum')
+    assert SeriesCache.key('NS', 'M', dimensions, PERIOD, 'Sum', region='eu-west-1') != key
+
+
+def test_fetch_start_miss_aligns_to_period():
+    cache = SeriesCache()
+    assert cache.fetch_start(KEY, 3000 + 17, PERIOD) == 3000
+    assert cache.stats()['misses'] == 1
+
+
+def test_fetch_start_resumes_from_settled_point():
+    cache = SeriesCache(settle_periods=2)
+    cache.merge(KEY, 0, 30000, PERIOD, *points(0, 30000))
+    # 最近 settle_periods 个间隔的数据点仍可能变化
+    settled_until = 30000 - 2 * PERIOD
+    assert cache.fetch_start(KEY, 0, PERIOD) == settled_until
+    assert cache.fetch_start(KEY, 6000, PERIOD) == settled_until
+    assert cache.stats()['hits'] == 2
+    # 开始时间不早于 settled_until 时没有可复用的已稳定数据点
+    assert cache.fetch_start(KEY, settled_until, PERIOD) == settled_until
+    assert cache.stats()['misses'] == 1
+
+
+def test_fetch_start_with_zero_settle_periods():
+    cache = SeriesCache(settle_periods=0)
+    cache.merge(KEY, 0, 30000, PERIOD, *points(0, 30000))
+    assert cache.fetch_start(KEY, 0, PERIOD) == 30000
+
+
+def test_merge_replaces_unsettled_points():
+    cache = SeriesCache(settle_periods=2)
+    cache.merge(KEY, 0, 30000, PERIOD, *points(0, 30000, 1.0))
+    fetched_from = cache.fetch_start(KEY, 0, PERIOD)
+    cache.merge(KEY, fetched_from, 36000, PERIOD, *points(fetched_from, 36000, 2.0))
+
+    timestamps, values = cache.read(KEY, 0, 36000, PERIOD)
+    assert timestamps.tolist() == list(range(0, 36000, PERIOD))
+    assert (values[timestamps < fetched_from] == 1.0).all()
+    assert (values[timestamps >= fetched_from] == 2.0).all()
+    assert cache.stats()['points'] == len(timestamps)
+
+
+def test_merge_with_gap_starts_new_series():
+    cache = SeriesCache(settle_periods=2)
+    cache.merge(KEY, 0, 3000, PERIOD, *points(0, 3000))
+    cache.merge(KEY, 30000, 33000, PERIOD, *points(30000, 33000))
+    assert cache.read(KEY, 0, 33000, PERIOD) is None
+    timestamps, _ = cache.read(KEY, 30000, 33000, PERIOD)
+    assert timestamps.tolist() == list(range(30000, 33000, PERIOD))
+
+
+def test_merge_drops_points_older_than_max_age():
+    cache = SeriesCache(max_age=3000)
+    cache.merge(KEY, 0, 30000, PERIOD, *points(0, 30000))
+    assert cache.read(KEY, 0, 30000, PERIOD) is None
+    timestamps, _ = cache.read(KEY, 27000, 30000, PERIOD)
+    assert timestamps[0] == 27000
+
+
+def test_merge_evicts_least_recently_used_series():
+    cache = SeriesCache(max_points=15)
+    other = SeriesCache.key('AWS/EC2', 'NetworkIn', [{'Name': 'InstanceId', 'Value': 'i-1'}], PERIOD, 'Sum')
+    cache.merge(KEY, 0, 3000, PERIOD, *points(0, 3000))
+    cache.merge(other, 0, 3000, PERIOD, *points(0, 3000))
+    assert cache.read(KEY, 0, 3000, PERIOD) is None
+    assert cache.read(other, 0, 3000, PERIOD) is not None
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+时间序列数据点格式(rows / columnar)单元测试
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from dependencies.clients.cloudwatch_client import CloudWatchClient
+
+TIMESTAMPS = np.arange(1_700_000_000, 1_700_000_000 + 300 * 20, 300, dtype=np.int64)
+AVERAGES = np.linspace(1.0, 20.0, 20)
+# Maximum 序列缺少部分时间点，缺失处使用 Average 的值
+MAX_TIMESTAMPS = TIMESTAMPS[::2]
+MAXIMUMS = AVERAGES[::2] + 5.0
+
+
+def columnar_to_rows(columnar, value_keys):
+    """columnar 格式还原为 rows 格式，value_keys 为 {rows 字段: columnar 字段}"""
+    return [
+        {
+            'timestamp': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            **{key: columnar[column][i] for key, column in value_keys.items()},
+            'unit': columnar['unit']
+        }
+        for i, timestamp in enumerate(columnar['timestamps'])
+    ]
+
+
+def test_average_maximum_round_trip():
+    stats = {'Average': (TIMESTAMPS, AVERAGES), 'Maximum': (MAX_TIMESTAMPS, MAXIMUMS)}
+    rows = CloudWatchClient._average_maximum_datapoints('CPUUtilization', stats)
+    columnar = CloudWatchClient._average_maximum_datapoints('CPUUtilization', stats, format='columnar')
+
+    assert columnar['unit'] == rows[0]['unit'] == 'Percent'
+    assert len(columnar['timestamps']) == len(columnar['average']) == len(columnar['maximum']) == len(rows)
+    assert columnar_to_rows(columnar, {'average': 'average', 'maximum': 'maximum'}) == rows
+    assert columnar['maximum'][0] == AVERAGES[0] + 5.0
+    assert columnar['maximum'][1] == AVERAGES[1]
+
+
+def test_value_round_trip_with_downsampling():
+    series = (TIMESTAMPS, AVERAGES)
+    rows = CloudWatchClient._value_datapoints('NetworkIn', series, max_points=5)
+    columnar = CloudWatchClient._value_datapoints('NetworkIn', series, max_points=5, format='columnar')
+
+    assert len(rows) == len(columnar['timestamps']) == 5
+    assert columnar_to_rows(columnar, {'value': 'values'}) == rows
+    assert all(isinstance(timestamp, int) for timestamp in columnar['timestamps'])
+
+
+def test_empty_series():
+    empty = (np.array([], dtype=np.int64), np.array([], dtype=np.float64))
+    assert CloudWatchClient._value_datapoints('NetworkIn', empty) == []
+    assert CloudWatchClient._value_datapoints('NetworkIn', empty, format='columnar')['timestamps'] == []